@@ -1,22 +1,31 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
+import argparse
 import datetime
 import django
 import json
 import logging
 import os
 import re
-import socket
+import signal
 import sys
+import threading
+import time
 
 from collections import namedtuple
 from copy import deepcopy
 from ipaddress import ip_address
-from pyzabbix import ZabbixMetric, ZabbixSender
+from pyzabbix import ZabbixMetric
 from systemd import journal
 
-from pyminers import Sender
+from pyminers import (
+    Sender, WorkerPool, HealthTracker, ZabbixDelivery, ZabbixSpool,
+    MetricsExporter,
+)
+
+# Интервал агрегирования статистики в режиме службы (секунд)
+ROLLUP_INTERVAL = 300
 
 
 class Worker():
@@ -26,34 +35,32 @@ class Worker():
     """
 
     def __init__(self, config='Default'):
-        # Получаем общие настройки, как словарь
-        self.__config = Config.objects.filter(
-            name=config,
-            enabled=True,
-        ).values().first()
-        if not self.__config:
-            # Конфигурация должна существовать
-            # и быть включена
-            raise ValueError(
-                "Config \"{config}\" does not"
-                " exists or disabled".format(
-                    config=config,
-                )
-            )
+        self.__config_name = config
+        self.__plan_version = None
+        self.reload()
 
         # Инициализация логирования
         if self.config.log == 'FI':
             self.log = self.config.log_file
         else:
             self.log = self.config.log
+        self.__check_plan(self.__plan)
 
-        # Получаем настроки опроса майнеров
-        self.__server_tasks = ServerTask.objects.filter(enabled=True)
-        if not self.__server_tasks:
-            raise ValueError(
-                "Tasks do not exists, check"
-                " miners request settings"
-            )
+    def reload(self):
+        """Загружает план опроса из кэша (или из БД, если
+        план был изменен), в режиме службы вызывается
+        перед каждым циклом опроса
+        """
+        plan = get_plan(self.__config_name)
+
+        # Предупреждаем о неизвестных майнерах
+        # только при изменении плана опроса
+        if self.log and plan['version'] != self.__plan_version:
+            self.__check_plan(plan)
+
+        self.__config = plan['config']
+        self.__plan = plan
+        self.__plan_version = plan['version']
 
     @property
     def config(self):
@@ -70,39 +77,24 @@ class Worker():
 
     @property
     def tasks(self):
-        """Параметры опроса майнеров
+        """Параметры опроса майнеров из плана опроса
         """
-        tasks = {}
-
-        # Соответствие между именами майнеров
-        # из pyminers и майнерами из БД django
-        miner_name_map = {
-            "antminer-s9-cgminer-490": "CGMiner",
-            "claymores-cryptonote-gpu-97": "Monero",
-            "claymores-dual-ethereum-amd-gpu-98": "Etherium",
-            "ewbfs-cuda-zcash-034b": "ZCash",
-        }
+        return self.__plan['tasks']
 
-        # Формируем список заданий для Sender
-        for task in self.__server_tasks:
-            task_miner = miner_name_map.get(task.server.miner.slug, 'Miner')
-            tasks[task.id] = {
-                'Host': task.server.host,
-                'Port': task.server.port,
-                'Miner': task_miner,
-                'Timeout': task.timeout,
-                'Request': [request.request for request in task.requests.all()]
-            }
-            if task_miner == 'Miner':
+    def __check_plan(self, plan):
+        """Записывает в лог предупреждения
+        о заданиях для неизвестных майнеров
+        """
+        for task_id, task in plan['tasks'].items():
+            if task['Miner'] == 'Miner':
                 self.log.warning(
                     "Задан опрос неизвестного майнера '{miner}',"
                     " задание '{task}'. Обработка полей"
                     " запрос/ответ выполнена не будет.".format(
-                        miner=task.server.miner,
-                        task=task.id,
+                        miner=plan['miners'][task_id],
+                        task=task_id,
                     ),
                 )
-        return tasks
 
     @property
     def log(self):
@@ -154,99 +146,64 @@ class Worker():
     def get_server_names(self):
         """Возвращает словарь {task.id: server.name, }
         """
-        return {task.id: task.server.name for task in self.__server_tasks}
-
-    def save(self, data):
-        """Добавляет результаты выполнения заданий в БД
+        return self.__plan['servers']
+
+    def save(self, data, cycle=None):
+        """Добавляет результаты выполнения заданий в БД.
+        Результаты проверяются в памяти и сохраняются
+        пакетно в одной транзакции
+
+        Аргументы:
+        data: результаты заданий в формате
+            {task.id: Sender.union[task.id], }
+        cycle: опрос PollCycle, если не задан,
+            создается новый опрос
         """
+        if cycle is None:
+            cycle = self.start_cycle()
+
         # Представляет ответ от майнера в требуемом формате
         convert = Converter()
 
-        # Получаем идентификатор опроса
-        if ServerStatistic.objects.count():
-            # Есть записи в таблице
-            request_id = ServerStatistic.objects.aggregate(
-                Max('request_id'),
-            )['request_id__max'] + 1
-        else:
-            request_id = 1
-
-        # Добавяем результаты выполнения заданий
+        statistics = []
         for task_id, task_data in data.items():
-            task = ServerTask.objects.get(id=task_id)
-            # Готовим данные для добавения
-            data = {
-                # Идентификатор задания
-                'task': task.id,
-                # Идентификатор опроса
-                'request_id': request_id,
-                # True, если все запросы успешны
-                'status': all(
-                    [not line['Error']
-                     for line in task_data['Exchange']],
-                ),
-                # Время выполнения последнего запроса
-                'executed': max(
-                    [line['When']
-                     for line in task_data['Exchange']],
-                ),
-                # Результаты запросов
-                'result': dict(),
-            }
-
-            # Добавляем результаты запросов
-            for line in task_data['Exchange']:
-                if line['Error']:
-                    # Если любой из запросов завершился ошибкой
-                    # добавляем только ответ с описанием ошибки
-                    data['result'] = line['Response']
-                    break
-                for request in task.requests.values('name', 'request'):
-                    # Определяем имя запроса по телу запроса из ответа
-                    if line['Request'] == json.loads(request['request']):
-                        # Добавляем в виде {'RequestName': Response, }
-                        data['result'][request['name']] = line['Response']
-                        break
-
-            # Если запрос не завершился ошибкой
-            # преобразуем результаты к требуемому формату
-            if data['status']:
-                data['result'] = convert(
-                    task.server.miner.slug,
-                    data['result'],
-                )
-
-            # Форма ожидает строку а не объект
-            data['result'] = json.dumps(data['result'])
-
-            # Форма обеспечивает проверку данных
-            form = ServerStatisticForm(data)
-
-            if form.is_valid():
-                # Сохраняем результаты в БД
-                form.save()
-
-                # Обновляем статус задания
-                task.executed = form.instance.executed
-                task.status = form.instance.status
-                task.save()
-
-                # Запись в лог
-                self.log.info(
-                    "Сохранение в БД:  Задание: '{data}'".format(
-                        data=form.instance,
-                    ),
-                )
-            else:
-                # Запись в лог
+            try:
+                statistics.append(build_statistic(
+                    self.__plan, task_id, task_data, cycle, convert,
+                ))
+            except (ValidationError, ValueError) as e:
+                # Ошибка в результатах одного задания
+                # не должна отменять сохранение остальных
                 self.log.error(
-                    "Ошибка записи  в БД: Задание: '{data}'"
+                    "Ошибка записи  в БД: Задание: '{task}'"
                     " Причина: {error}".format(
-                        data=form.instance,
-                        error=(form.errors, ),
+                        task=self.__plan['servers'].get(task_id, task_id),
+                        error=getattr(e, 'messages', e),
                     ),
                 )
 
+        # Сохраняем результаты и статус заданий в БД
+        statistics = save_statistics(statistics, cycle)
+
+        # Запись в лог
+        self.log.info(
+            "Сохранение в БД: Опрос: {cycle}"
+            " Заданий: {count} Ошибок: {failed}"
+            " Длительность: {duration}".format(
+                cycle=cycle.id,
+                count=cycle.servers,
+                failed=cycle.failed,
+                duration=cycle.duration,
+            ),
+        )
+        return statistics
+
+    @staticmethod
+    def start_cycle():
+        """Создает запись о начале нового опроса
+        """
+        return PollCycle.objects.create()
+
 
 class Converter():
     """Приводит ответы от майнеров к требуемому формату
@@ -479,7 +436,7 @@ class Zabbix():
             'Etherium': self.__etherium
         }
 
-        self.miners = deepcopy(miners)
+        self.miners = miners
         self.server = server
         self.port = port
         self.timeout = timeout
@@ -623,68 +580,162 @@ class Zabbix():
 
         return deepcopy(self.__metrics)
 
-    def send(self):
-        """Отправляет статистику работы майнеров на серввер"""
+    def add(self, name, data):
+        """Добавляет результаты опроса майнера и формирует его
+        метрики. Если отправка начата (start), метрики сразу
+        передаются на отправку, не дожидаясь остальных майнеров
 
-        for name, metrics in self.__metrics.items():
-            server = ZabbixSender(
+        Аргументы:
+        name: имя майнера
+        data: результаты опроса майнера в формате miners
+
+        return:
+        список метрик майнера
+        """
+        metrics = self.__minerMetrics(name, data)
+        self.__metrics[name] = metrics
+        if self.__spool is not None:
+            self.__spool.put(metrics)
+        elif self.__delivery is not None:
+            self.__delivery.submit(metrics)
+        return metrics
+
+    def start(self, spool=None):
+        """Начинает отправку метрик: уже сформированные метрики
+        передаются на отправку, метрики майнеров, добавленных
+        позже (add), отправляются по мере добавления
+
+        Аргументы:
+        spool: очередь ZabbixSpool, если задана, метрики
+            добавляются в нее и отправляются нитью очереди
+        """
+        if spool is not None:
+            self.__spool = spool
+        else:
+            self.__delivery = ZabbixDelivery(
                 self.server,
                 self.port,
-                chunk_size=len(metrics),
+                self.timeout,
+                log=self.log,
             )
-            try:
-                self.log.info(
-                    "metrics sended to {server}:{port} "
-                    "for {miner} ({result})".format(
-                        server=self.server,
-                        port=self.port,
-                        miner=name,
-                        result=server.send(metrics),
-                    ),
-                )
-            except socket.error as e:
-                self.log.error(
-                    "error on sending metrics to {server}:{port} "
-                    "for {miner} ({message})".format(
-                        server=self.server,
-                        port=self.port,
-                        miner=name, message=e,
-                    ),
-                )
-                break
+        for name, metrics in self.__metrics.items():
+            if self.__spool is not None:
+                self.__spool.put(metrics)
+            else:
+                self.__delivery.submit(metrics)
+
+    def finish(self):
+        """Завершает отправку метрик, начатую start
+
+        return:
+        результат отправки DeliveryResult, None - если
+        метрики добавлены в очередь
+        """
+        count = sum(len(metrics) for metrics in self.__metrics.values())
+        if self.__spool is not None:
+            self.__spool = None
+            self.log.info(
+                "{count} metrics for {miners} miners added "
+                "to zabbix spool".format(
+                    count=count,
+                    miners=len(self.__metrics),
+                ),
+            )
+            return None
+
+        try:
+            result = self.__delivery.flush()
+        finally:
+            self.__delivery.shutdown()
+            self.__delivery = None
+
+        self.log.info(
+            "metrics sended to {server}:{port} for {count} miners "
+            "(processed: {processed}, failed: {failed}, "
+            "chunks: {chunks})".format(
+                server=self.server,
+                port=self.port,
+                count=len(self.__metrics),
+                processed=result.processed,
+                failed=result.failed,
+                chunks=result.chunks,
+            ),
+        )
+        if result.undelivered:
+            self.log.error(
+                "error on sending metrics to {server}:{port}, "
+                "{count} metrics for {miners} not delivered".format(
+                    server=self.server,
+                    port=self.port,
+                    count=len(result.undelivered),
+                    miners=', '.join(sorted(
+                        {metric.host for metric in result.undelivered},
+                    )),
+                ),
+            )
+        return result
+
+    def send(self, spool=None):
+        """Отправляет статистику работы майнеров на серввер.
+        Метрики всех майнеров отправляются пакетами через
+        ZabbixDelivery, недоставленные пакеты повторяются
+
+        Аргументы:
+        spool: очередь ZabbixSpool, если задана, метрики
+            добавляются в нее и отправляются нитью очереди
+
+        return:
+        результат отправки DeliveryResult, None - если
+        метрики добавлены в очередь
+        """
+        self.start(spool)
+        return self.finish()
 
     def __createMetrics(self):
         """Формирует метрики для отправки статистики на сервер"""
         self.__metrics = {}
+        self.__delivery = None
+        self.__spool = None
 
         for name, data in self.miners.items():
-            # Ищем ошибки
-            errorResponses = [
-                item['Response']
-                for item in data['Exchange']
-                if item['Error']]
-            # Если при получении статистики работы майнера произошла ошибка
-            if errorResponses:
-                # Создаем соответвующую метрику
-                self.__metrics[name] = [ZabbixMetric(
-                    name,
-                    'miner.status', 0), ]
-                # Записываем сообщение в лог
-                self.log.error(
-                    "error in request for miner {name} at "
-                    "{host}:{port} ({message})".format(
-                        name=name,
-                        host=data['Host'],
-                        port=data['Port'],
-                        message=errorResponses[0],
-                    ),
-                )
-            else:
-                # Создаем все метрики для майнера
-                self.__metrics[name] = [
-                    ZabbixMetric(name, key, value)
-                    for key, value in
-                    self.__supportedMiners[data['Miner']](data['Exchange'])]
+            self.__metrics[name] = self.__minerMetrics(name, data)
+
+    def __minerMetrics(self, name, data):
+        """Формирует метрики майнера
+
+        return:
+        список экземпляров ZabbixMetric
+        """
+        # Метрики могут отправляться после завершения опроса,
+        # поэтому передаем время получения ответа майнера
+        clock = int(max(
+            item['When'] for item in data['Exchange']
+        ).timestamp())
+        # Ищем ошибки
+        errorResponses = [
+            item['Response']
+            for item in data['Exchange']
+            if item['Error']]
+        # Если при получении статистики работы майнера произошла ошибка
+        if errorResponses:
+            # Записываем сообщение в лог
+            self.log.error(
+                "error in request for miner {name} at "
+                "{host}:{port} ({message})".format(
+                    name=name,
+                    host=data['Host'],
+                    port=data['Port'],
+                    message=errorResponses[0],
+                ),
+            )
+            # Создаем соответвующую метрику
+            return [ZabbixMetric(name, 'miner.status', 0, clock), ]
+
+        # Создаем все метрики для майнера
+        return [
+            ZabbixMetric(name, key, value, clock)
+            for key, value in
+            self.__supportedMiners[data['Miner']](data['Exchange'])]
 
     @staticmethod
     def __cGMiner(value):
@@ -692,11 +743,11 @@ class Zabbix():
         # К маинеру делается два запроса. В зависимости от
         # того какой ответ попал в список первым назначаем переменные
         if 'SUMMARY' in value[0]['Response']:
-            summary = deepcopy(value[0]['Response']['SUMMARY'][0])
-            stats = deepcopy(value[1]['Response']['STATS'][0])
+            summary = value[0]['Response']['SUMMARY'][0]
+            stats = value[1]['Response']['STATS'][0]
         else:
-            summary = deepcopy(value[1]['Response']['SUMMARY'][0])
-            stats = deepcopy(value[0]['Response']['STATS'][0])
+            summary = value[1]['Response']['SUMMARY'][0]
+            stats = value[0]['Response']['STATS'][0]
 
         metric = {}
         metric['miner.status'] = 1
@@ -796,19 +847,18 @@ class Zabbix():
                       for num in range(metric['miner.gpu.number'])]}
         )
 
-        for index, item in enumerate(value['ETH Detailed']):
-            if not isinstance(item, int):
-                value['ETH Detailed'][index] = 0
-
-        for index, item in enumerate(value['DCR Detailed']):
-            if not isinstance(item, int):
-                value['DCR Detailed'][index] = 0
+        # Нечисловые значения хешрейта считаем нулевыми,
+        # ответ майнера при этом не изменяется
+        eth = [item if isinstance(item, int) else 0
+               for item in value['ETH Detailed']]
+        dcr = [item if isinstance(item, int) else 0
+               for item in value['DCR Detailed']]
 
-        for num, _ in enumerate(value['ETH Detailed']):
+        for num, _ in enumerate(eth):
             metric['miner.gpu.dcr.hashrate[{gpu}]'.format(
-                gpu=num)] = value['DCR Detailed'][num] * 10**6
+                gpu=num)] = dcr[num] * 10**6
             metric['miner.gpu.eth.hashrate[{gpu}]'.format(
-                gpu=num)] = value['ETH Detailed'][num] * 10**6
+                gpu=num)] = eth[num] * 10**6
             metric['miner.gpu.fspeed[{gpu}]'.format(
                 gpu=num)] = value['GPU']['Fan Speeds'][num]
             metric['miner.gpu.temperature[{gpu}]'.format(
@@ -816,32 +866,243 @@ class Zabbix():
         return metric.items()
 
 
-def main():
-    # Загружаем задания из БД
-    works = Worker(config='Develop')
+def poll(works, workers=None, health=None, spool=None, exporter=None):
+    """Выполняет один цикл опроса майнеров
 
+    Аргументы:
+    works: экземпляр Worker
+    workers: общий пул нитей WorkerPool
+    health: история опроса майнеров HealthTracker
+    spool: очередь отправки метрик Zabbix ZabbixSpool
+    exporter: экспорт метрик для Prometheus MetricsExporter
+    """
     # Опрашиваем майнеры
-    sender = Sender(works.tasks)
-    sender.sendRequests()
+    sender = Sender(works.tasks, workers=workers, health=health)
 
-    # Добавление результатов в БД
-    works.save(sender.results)
+    # Новый опрос и имена серверов для Zabbix
+    cycle = works.start_cycle()
+    server_names = works.get_server_names()
 
-    # Отправляем собранные данные Zabbix серверу
+    # Метрики майнеров формируются и передаются на отправку Zabbix
+    # серверу по мере получения результатов, пакеты для всех
+    # майнеров отправляются, не дожидаясь завершения опроса
+    zabbix = None
     if works.config.zabbix_send:
-        # Меняем ID задания на имя сервера
-        server_names = works.get_server_names()
-        zabbix_data = {server_names[key]: value
-                       for key, value in sender.union.items()}
-
         zabbix = Zabbix(
-            zabbix_data,
+            {},
             works.config.zabbix_server,
             works.config.zabbix_port,
             works.config.zabbix_timeout,
             works.log,
         )
-        zabbix.send()
+        zabbix.start(spool)
+    elif exporter is not None:
+        zabbix = Zabbix({}, log=works.log)
+
+    # Результаты сохраняются в БД одной транзакцией
+    # после завершения опроса всех майнеров
+    results = dict()
+    metrics = []
+
+    try:
+        # Результаты обрабатываются по мере получения ответов,
+        # не дожидаясь завершения опроса остальных майнеров
+        for task_id, task_data in sender.iterResults():
+            results[task_id] = task_data
+            if zabbix is not None:
+                # Меняем ID задания на имя сервера
+                metrics.extend(
+                    zabbix.add(server_names[task_id], task_data),
+                )
+
+        # Обновляем метрики для Prometheus один раз за цикл
+        if exporter is not None:
+            exporter.update(metrics)
+
+        # Добавление результатов в БД
+        works.save(results, cycle)
+    finally:
+        # Отправляем неполный пакет и ожидаем
+        # завершения отправки остальных
+        if works.config.zabbix_send:
+            zabbix.finish()
+
+
+def daemon(works, spool_path=None, metrics_address=None, workers_size=128):
+    """Выполняет циклы опроса с интервалом Config.refresh
+    до получения сигнала остановки
+
+    Циклы запускаются по расписанию от момента запуска службы,
+    поэтому время выполнения цикла не накапливает смещение.
+    Если цикл не уложился в интервал, пропущенные запуски
+    не выполняются, следующий цикл начинается по расписанию.
+    Не чаще, чем раз в ROLLUP_INTERVAL секунд, после цикла опроса
+    статистика агрегируется и устаревшие данные удаляются.
+
+    Если задан файл очереди, метрики Zabbix добавляются в очередь
+    и отправляются отдельной нитью, поэтому недоступность Zabbix
+    сервера не задерживает опрос, а метрики не теряются.
+
+    Если задан адрес экспорта, метрики майнеров отдаются по HTTP
+    в формате OpenMetrics (/metrics), данные обновляются после
+    каждого цикла опроса.
+
+    Аргументы:
+    works: экземпляр Worker
+    spool_path: путь к файлу очереди метрик Zabbix
+    metrics_address: (адрес, порт) для экспорта метрик
+    workers_size: количество нитей опроса майнеров
+    """
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *args: stop.set())
+    signal.signal(signal.SIGINT, lambda *args: stop.set())
+
+    # Пул нитей и история опроса сохраняются между циклами
+    workers = WorkerPool(size=workers_size)
+    health = HealthTracker()
+
+    # Очередь метрик Zabbix, адрес сервера
+    # обновляется при изменении настроек
+    spool = None
+    if spool_path:
+        spool = ZabbixSpool(
+            spool_path,
+            ZabbixDelivery(log=works.log),
+            log=works.log,
+        )
+
+    # Экспорт метрик для Prometheus
+    exporter = None
+    if metrics_address:
+        exporter = MetricsExporter(*metrics_address)
+        exporter.start()
+
+    # Время следующего агрегирования статистики
+    rollup_deadline = time.monotonic()
+
+    deadline = time.monotonic()
+    try:
+        while not stop.is_set():
+            # Соединения с БД используются повторно,
+            # пока не истечет CONN_MAX_AGE
+            close_old_connections()
+
+            # План опроса берется из кэша и формируется
+            # заново, только если изменились настройки
+            try:
+                works.reload()
+            except ValueError as e:
+                # Продолжаем работу с прежними заданиями
+                works.log.error(
+                    "Ошибка загрузки заданий: {error}".format(error=e),
+                )
+
+            # Нить очереди запускается после получения адреса сервера
+            if spool is not None and works.config.zabbix_send:
+                spool.delivery.server = works.config.zabbix_server
+                spool.delivery.port = works.config.zabbix_port
+                spool.delivery.timeout = works.config.zabbix_timeout
+                spool.start()
+
+            started = time.monotonic()
+            try:
+                poll(works, workers, health, spool, exporter)
+            except Exception:
+                # Ошибка в цикле не должна останавливать службу
+                works.log.exception("Ошибка выполнения цикла опроса")
+            finally:
+                close_old_connections()
+
+            # Агрегируем статистику и удаляем устаревшие данные
+            if time.monotonic() >= rollup_deadline:
+                rollup_deadline = time.monotonic() + ROLLUP_INTERVAL
+                try:
+                    deleted = maintain()
+                except Exception:
+                    works.log.exception("Ошибка агрегирования статистики")
+                else:
+                    works.log.info(
+                        "Агрегирование статистики: удалено {deleted}".format(
+                            deleted=deleted,
+                        ),
+                    )
+
+            # Время запуска следующего цикла
+            refresh = works.config.refresh
+            deadline += refresh
+            now = time.monotonic()
+            if now > deadline:
+                skipped = int((now - deadline) // refresh) + 1
+                deadline += skipped * refresh
+                works.log.warning(
+                    "Цикл опроса выполнялся {elapsed:.1f} сек. при интервале"
+                    " {refresh} сек., пропущено запусков: {skipped}".format(
+                        elapsed=now - started,
+                        refresh=refresh,
+                        skipped=skipped,
+                    ),
+                )
+            stop.wait(deadline - now)
+    finally:
+        workers.shutdown(wait=False)
+        if spool is not None:
+            spool.close()
+            spool.delivery.shutdown()
+        if exporter is not None:
+            exporter.shutdown()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Опрос майнеров по заданиям из БД miningstatistic',
+    )
+    parser.add_argument(
+        '--config', default='Develop',
+        help='имя конфигурации в БД',
+    )
+    parser.add_argument(
+        '--daemon', action='store_true',
+        help='работать в режиме службы, опрашивая майнеры'
+             ' с интервалом из конфигурации',
+    )
+    parser.add_argument(
+        '--spool', default=getattr(settings, 'ZABBIX_SPOOL', None),
+        help='файл очереди метрик Zabbix в режиме службы',
+    )
+    parser.add_argument(
+        '--metrics-host', default=getattr(settings, 'METRICS_HOST', ''),
+        help='адрес экспорта метрик для Prometheus в режиме службы',
+    )
+    parser.add_argument(
+        '--metrics-port', type=int,
+        default=getattr(settings, 'METRICS_PORT', None),
+        help='порт экспорта метрик для Prometheus в режиме службы',
+    )
+    parser.add_argument(
+        '--workers', type=int,
+        default=getattr(settings, 'POLL_WORKERS', 128),
+        help='количество нитей опроса майнеров',
+    )
+    args = parser.parse_args(argv)
+
+    # Загружаем задания из БД
+    works = Worker(config=args.config)
+
+    if args.daemon:
+        daemon(
+            works,
+            args.spool,
+            (args.metrics_host, args.metrics_port)
+            if args.metrics_port else None,
+            args.workers,
+        )
+    else:
+        workers = WorkerPool(size=args.workers)
+        try:
+            poll(works, workers)
+        finally:
+            workers.shutdown(wait=False)
+    return 0
 
 
 if __name__ == '__main__':
@@ -869,9 +1130,12 @@ if __name__ == '__main__':
     django.setup()
 
     # Здесь импортируем модули проекта
-    from task.models import Config, ServerTask
-    from statistic.models import ServerStatistic
-    from statistic.forms import ServerStatisticForm
-    from django.db.models import Max
+    from task.plan import get_plan
+    from statistic.models import PollCycle
+    from statistic.ingest import build_statistic, save_statistics
+    from statistic.rollup import maintain
+    from django.conf import settings
+    from django.core.exceptions import ValidationError
+    from django.db import close_old_connections
 
     sys.exit(main())
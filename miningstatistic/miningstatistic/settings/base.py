@@ -133,3 +133,14 @@ STATIC_URL = '/static/'
 STATICFILES_DIRS = (
     os.path.join(BASE_DIR, 'static'),
 )
+
+# Statistic
+
+# Срок хранения (дней) результатов опроса и агрегированных показателей
+# серверов за 5 минут, час и сутки, None - хранить без ограничения
+STATISTIC_RETENTION = {
+    'raw': 7,
+    '5m': 30,
+    '1h': 365,
+    '1d': None,
+}
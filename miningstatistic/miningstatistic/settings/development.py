@@ -30,6 +30,32 @@ DATABASES = {
     }
 }
 
+# Cache
+
+# Общий для веб-приложения и dj-miners кэш,
+# в нем хранится план опроса майнеров
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache'),
+    }
+}
+
+# Zabbix
+
+# Количество нитей опроса майнеров dj-miners
+POLL_WORKERS = 128
+
+# Очередь метрик Zabbix dj-miners в режиме службы
+ZABBIX_SPOOL = os.path.join(BASE_DIR, 'zabbix-spool.sqlite3')
+
+# Prometheus
+
+# Адрес и порт экспорта метрик майнеров (/metrics)
+# dj-miners в режиме службы, None - не экспортировать
+METRICS_HOST = '127.0.0.1'
+METRICS_PORT = 9350
+
 # Logging
 
 verbose = (
@@ -0,0 +1,101 @@
+/*
+ * Графики истории показателей сервера.
+ *
+ * Ряды значений за выбранный период запрашиваются в формате json,
+ * сервер прореживает их до заданного количества точек, поэтому
+ * объем данных не зависит от длины периода.
+ */
+(function () {
+    'use strict';
+
+    var WIDTH = 1000;
+    var HEIGHT = 200;
+    var SVG = 'http://www.w3.org/2000/svg';
+
+    function draw(section, points) {
+        var svg = section.getElementsByTagName('svg')[0];
+        var caption = section.getElementsByTagName('p')[0];
+
+        while (svg.firstChild) {
+            svg.removeChild(svg.firstChild);
+        }
+        if (!points.length) {
+            caption.textContent = '—';
+            return;
+        }
+
+        var minX = points[0][0];
+        var maxX = points[points.length - 1][0];
+        var minY = Infinity;
+        var maxY = -Infinity;
+        for (var i = 0; i < points.length; i++) {
+            minY = Math.min(minY, points[i][1]);
+            maxY = Math.max(maxY, points[i][1]);
+        }
+
+        var coordinates = points.map(function (point) {
+            var x = maxX > minX ?
+                (point[0] - minX) / (maxX - minX) * WIDTH : 0;
+            var y = maxY > minY ?
+                HEIGHT - (point[1] - minY) / (maxY - minY) * HEIGHT :
+                HEIGHT / 2;
+            return x.toFixed(1) + ',' + y.toFixed(1);
+        });
+
+        var line = document.createElementNS(SVG, 'polyline');
+        line.setAttribute('points', coordinates.join(' '));
+        line.setAttribute('fill', 'none');
+        line.setAttribute('stroke', '#1eaedb');
+        line.setAttribute('stroke-width', '2');
+        line.setAttribute('vector-effect', 'non-scaling-stroke');
+        svg.appendChild(line);
+
+        caption.textContent =
+            new Date(minX).toLocaleString() + ' – ' +
+            new Date(maxX).toLocaleString() +
+            ': ' + minY + ' – ' + maxY;
+    }
+
+    function load(container, days) {
+        var end = new Date();
+        var start = new Date(end.getTime() - days * 86400000);
+        var url = container.dataset.historyUrl +
+            '?start=' + encodeURIComponent(start.toISOString()) +
+            '&end=' + encodeURIComponent(end.toISOString()) +
+            '&points=' + container.dataset.points;
+
+        var request = new XMLHttpRequest();
+        request.open('GET', url);
+        request.responseType = 'json';
+        request.onload = function () {
+            if (request.status !== 200) {
+                return;
+            }
+            var sections = container.getElementsByClassName('chart');
+            for (var i = 0; i < sections.length; i++) {
+                draw(
+                    sections[i],
+                    request.response.series[sections[i].dataset.metric] || []
+                );
+            }
+        };
+        request.send();
+    }
+
+    function start() {
+        var container = document.getElementById('statistic-history');
+        if (!container) {
+            return;
+        }
+
+        var buttons = container.querySelectorAll('button[data-days]');
+        for (var i = 0; i < buttons.length; i++) {
+            buttons[i].addEventListener('click', function (event) {
+                load(container, parseInt(event.target.dataset.days, 10));
+            });
+        }
+        load(container, 1);
+    }
+
+    document.addEventListener('DOMContentLoaded', start);
+})();
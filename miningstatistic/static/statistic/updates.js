@@ -0,0 +1,76 @@
+/*
+ * Обновление таблиц статистики без перезагрузки страницы.
+ *
+ * Страница периодически запрашивает изменения относительно
+ * отображаемого опроса. Пока новых результатов нет, сервер
+ * отвечает 204. После завершения опроса сервер возвращает
+ * изменившиеся ячейки таблиц, они заменяются на странице, или
+ * признак reload (изменился состав таблиц), и страница
+ * перезагружается.
+ */
+(function () {
+    'use strict';
+
+    function start() {
+        var container = document.getElementById('statistic-tables');
+        if (!container) {
+            return;
+        }
+        var interval = parseInt(container.dataset.pollInterval, 10) || 5;
+
+        function schedule() {
+            window.setTimeout(poll, interval * 1000);
+        }
+
+        function update(data) {
+            if (data.reload) {
+                window.location.reload();
+                return false;
+            }
+
+            var rows = data.rows;
+            for (var i = 0; i < rows.length; i++) {
+                var row = container.querySelector(
+                    'tr[data-task="' + rows[i].task + '"]'
+                );
+                if (!row) {
+                    window.location.reload();
+                    return false;
+                }
+                for (var name in rows[i].cells) {
+                    var cell = row.getElementsByClassName(name)[0];
+                    if (!cell) {
+                        window.location.reload();
+                        return false;
+                    }
+                    cell.innerHTML = rows[i].cells[name];
+                }
+            }
+            container.dataset.cycle = data.cycle;
+            return true;
+        }
+
+        function poll() {
+            var request = new XMLHttpRequest();
+            request.open(
+                'GET',
+                container.dataset.updatesUrl + '?cycle=' +
+                encodeURIComponent(container.dataset.cycle)
+            );
+            request.onload = function () {
+                if (request.status === 200 &&
+                        !update(JSON.parse(request.responseText))) {
+                    return;
+                }
+                schedule();
+            };
+            // При ошибке повторяем запрос через интервал
+            request.onerror = schedule;
+            request.send();
+        }
+
+        schedule();
+    }
+
+    document.addEventListener('DOMContentLoaded', start);
+})();
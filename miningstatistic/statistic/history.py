@@ -0,0 +1,222 @@
+"""История показателей сервера.
+
+Значения показателей за период берутся из результатов опроса
+(ServerMetric), если период помещается в срок их хранения и значений
+не больше MAX_SAMPLES, иначе из наиболее подробных агрегированных
+показателей (ServerRollup), хранящихся за весь период. Ряды значений
+прореживаются на сервере алгоритмом LTTB (Largest-Triangle-Three-Buckets)
+до заданного количества точек, сохраняющего форму графика, поэтому
+объем ответа не зависит от длины периода.
+"""
+
+import datetime
+
+from django.db.models import ExpressionWrapper, F, FloatField, Max, Min, Sum
+from django.utils import timezone
+
+from .metrics import METRICS
+from .models import PollCycle, ServerMetric, ServerRollup
+from .rollup import get_retention
+
+# Показатели графиков истории
+SERIES = ('hashrate', 'temperature', 'fan')
+
+# Количество точек ряда по умолчанию и максимальное
+POINTS = 500
+MAX_POINTS = 2000
+
+# Максимальное количество значений показателя,
+# читаемых из БД для построения ряда
+MAX_SAMPLES = 20000
+
+# Объединение значений заданий сервера в БД,
+# как значений по цепочкам и GPU (metrics.METRICS)
+AGGREGATES = {
+    sum: Sum,
+    max: Max,
+}
+
+# Агрегированные показатели и их сроки хранения
+ROLLUPS = (
+    (ServerRollup.RESOLUTION_5M, '5m'),
+    (ServerRollup.RESOLUTION_1H, '1h'),
+    (ServerRollup.RESOLUTION_1D, '1d'),
+)
+
+
+def lttb(data, threshold):
+    """Прореживает ряд алгоритмом Largest-Triangle-Three-Buckets
+
+    Аргументы:
+    data: список точек [(x, y), ], упорядоченный по x
+    threshold: количество точек результата
+
+    return:
+    список точек, первая и последняя точки ряда сохраняются,
+    из остальных интервалов выбирается точка, образующая
+    треугольник наибольшей площади с выбранной точкой
+    предыдущего интервала и средней точкой следующего
+    """
+    if threshold >= len(data) or threshold < 3:
+        return list(data)
+
+    sampled = [data[0]]
+    every = (len(data) - 2) / (threshold - 2)
+    selected = 0
+
+    for index in range(threshold - 2):
+        # Средняя точка следующего интервала
+        start = int((index + 1) * every) + 1
+        end = min(int((index + 2) * every) + 1, len(data))
+        start = min(start, end - 1)
+        average_x = sum(x for x, _ in data[start:end]) / (end - start)
+        average_y = sum(y for _, y in data[start:end]) / (end - start)
+
+        # Точка текущего интервала с наибольшей площадью треугольника
+        point_x, point_y = data[selected]
+        area_max = -1
+        for position in range(int(index * every) + 1,
+                              int((index + 1) * every) + 1):
+            x, y = data[position]
+            area = abs(
+                (point_x - average_x) * (y - point_y)
+                - (point_x - x) * (average_y - point_y)
+            )
+            if area > area_max:
+                area_max = area
+                selected = position
+        sampled.append(data[selected])
+
+    sampled.append(data[-1])
+    return sampled
+
+
+def cycle_range(start, end):
+    """Идентификаторы (первый, последний) опросов, начатых
+    в период [start, end). По ним значения показателей
+    выбираются по индексу без обращения к таблице опросов
+    """
+    cycles = PollCycle.objects.filter(
+        started__gte=start,
+        started__lt=end,
+    ).aggregate(first=Min('id'), last=Max('id'))
+    return cycles['first'], cycles['last']
+
+
+def choose_resolution(task_ids, metrics, start, end,
+                      now=None, retention=None):
+    """Выбирает источник значений показателей за период
+
+    return:
+    интервал агрегированных показателей (секунд),
+    None - результаты опроса
+    """
+    now = now or timezone.now()
+    retention = get_retention(retention)
+
+    def covered(key):
+        """Данные key хранятся за весь период"""
+        days = retention.get(key)
+        return days is None or start >= now - datetime.timedelta(days=days)
+
+    if covered('raw'):
+        first, last = cycle_range(start, end)
+        if first is None:
+            return None
+        samples = ServerMetric.objects.servers().filter(
+            task_id__in=task_ids,
+            metric__in=metrics,
+            cycle_id__gte=first,
+            cycle_id__lte=last,
+        ).count()
+        if samples <= MAX_SAMPLES * len(metrics):
+            return None
+
+    seconds = (end - start).total_seconds()
+    for resolution, key in ROLLUPS:
+        if seconds / resolution <= MAX_SAMPLES and covered(key):
+            return resolution
+    return ServerRollup.RESOLUTION_1D
+
+
+def timestamp(value):
+    """Время в миллисекундах от начала эпохи"""
+    return int(value.timestamp() * 1000)
+
+
+def read_series(task_ids, metric, start, end, resolution):
+    """Значения показателя metric за период [start, end).
+    Значения заданий сервера в одном опросе или интервале
+    объединяются в одно значение ряда (сумма или наибольшее)
+
+    return:
+    список [(время в мсек, значение), ], для агрегированных
+    показателей - среднее значение за интервал
+    """
+    aggregate = AGGREGATES[METRICS[metric]]
+
+    if resolution is None:
+        first, last = cycle_range(start, end)
+        if first is None:
+            return []
+        values = ServerMetric.objects.servers().filter(
+            task_id__in=task_ids,
+            metric=metric,
+            cycle_id__gte=first,
+            cycle_id__lte=last,
+        ).order_by('cycle_id').values('cycle_id', 'cycle__started').annotate(
+            total=aggregate('value'),
+        )
+        return [
+            (timestamp(value['cycle__started']), value['total'])
+            for value in values
+        ]
+
+    values = ServerRollup.objects.filter(
+        task_id__in=task_ids,
+        resolution=resolution,
+        metric=metric,
+        start__gte=start,
+        start__lt=end,
+        count__gt=0,
+    ).order_by('start').values('start').annotate(
+        average=aggregate(ExpressionWrapper(
+            F('total') / F('count'),
+            output_field=FloatField(),
+        )),
+    )
+    return [
+        (timestamp(value['start']), value['average']) for value in values
+    ]
+
+
+def get_history(server, start, end, metrics=SERIES, points=POINTS,
+                now=None, retention=None):
+    """Возвращает прореженные ряды значений показателей сервера
+
+    Аргументы:
+    server: сервер Server
+    start, end: период
+    metrics: показатели
+    points: количество точек каждого ряда
+
+    return:
+    dict {'resolution': интервал или None,
+          'series': {показатель: [[время в мсек, значение], ], }}
+    """
+    task_ids = list(server.tasks.values_list('id', flat=True))
+    resolution = choose_resolution(
+        task_ids, metrics, start, end, now, retention,
+    )
+    return {
+        'resolution': resolution,
+        'series': {
+            metric: [
+                list(point) for point in lttb(
+                    read_series(task_ids, metric, start, end, resolution),
+                    points,
+                )
+            ]
+            for metric in metrics
+        },
+    }
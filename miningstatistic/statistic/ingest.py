@@ -0,0 +1,174 @@
+"""Добавление результатов опроса майнеров в БД.
+
+Результаты проверяются в памяти и сохраняются пакетно: все записи
+ServerStatistic добавляются одним запросом bulk_create, а время
+и статус заданий ServerTask обновляются одним запросом bulk_update
+в общей транзакции. В той же транзакции добавляются числовые
+показатели ServerMetric и обновляется таблица последних результатов
+ServerLatest. Имена запросов определяются по плану опроса (task.plan)
+без обращения к БД. После завершения транзакции идентификатор опроса
+сохраняется в кэше (LATEST_CYCLE_CACHE_KEY), по нему страница статистики
+узнает о новых результатах без запросов к БД.
+"""
+
+import json
+
+from django.core.cache import cache
+from django.db import transaction
+
+from task.models import ServerTask
+from task.plan import request_key
+
+from .metrics import metric_values
+from .models import ServerLatest, ServerMetric, ServerStatistic
+
+# Ключ кэша идентификатора последнего завершенного опроса
+LATEST_CYCLE_CACHE_KEY = 'statistic:cycle'
+
+
+def build_statistic(plan, task_id, task_data, cycle, convert=None):
+    """Формирует и проверяет запись ServerStatistic (без сохранения в БД)
+
+    Аргументы:
+    plan: план опроса, по которому выполнялось задание
+    task_id: идентификатор задания
+    task_data: результаты задания в формате Sender.union
+    cycle: опрос PollCycle
+    convert: функция convert(miner_slug, result), преобразующая
+        ответы майнера к требуемому формату
+
+    return:
+    экземпляр ServerStatistic, при ошибке проверки вызывается
+    ValidationError. Числовые показатели успешного опроса
+    (несохраненные экземпляры ServerMetric) передаются
+    в атрибуте metrics
+    """
+    exchange = task_data['Exchange']
+    names = plan['names'].get(task_id, {})
+
+    # True, если все запросы успешны
+    status = all(not line['Error'] for line in exchange)
+    result = dict()
+
+    # Добавляем результаты запросов
+    for line in exchange:
+        if line['Error']:
+            # Если любой из запросов завершился ошибкой
+            # добавляем только ответ с описанием ошибки
+            result = line['Response']
+            break
+        # Определяем имя запроса по телу запроса из ответа
+        name = names.get(request_key(line['Request']))
+        if name is not None:
+            # Добавляем в виде {'RequestName': Response, }
+            result[name] = line['Response']
+
+    # Числовые показатели извлекаются из исходных ответов
+    metrics = metric_values(plan['miners'][task_id], result) \
+        if status else []
+
+    # Если запрос не завершился ошибкой
+    # преобразуем результаты к требуемому формату
+    if status and convert is not None:
+        result = convert(plan['miners'][task_id], result)
+
+    statistic = ServerStatistic(
+        task_id=task_id,
+        cycle=cycle,
+        # Время выполнения последнего запроса
+        executed=max(line['When'] for line in exchange),
+        status=status,
+        result=json.dumps(result),
+    )
+
+    # Результат только что сформирован json.dumps, а задание и опрос
+    # известны заранее: проверяем остальные поля без запросов к БД
+    statistic.full_clean(
+        exclude=['task', 'cycle', 'result'],
+        validate_unique=False,
+    )
+
+    statistic.metrics = [
+        ServerMetric(
+            task_id=task_id,
+            cycle=cycle,
+            metric=metric,
+            gpu_index=index,
+            value=value,
+        )
+        for metric, index, value in metrics
+    ]
+    return statistic
+
+
+def update_latest(statistics):
+    """Добавляет или обновляет записи ServerLatest
+    для заданий из списка statistics
+
+    Аргументы:
+    statistics: список экземпляров ServerStatistic
+    """
+    fields = ['cycle', 'result', 'executed', 'status']
+
+    latest = ServerLatest.objects.only('task').in_bulk(
+        [statistic.task_id for statistic in statistics],
+    )
+    created = []
+    for statistic in statistics:
+        item = latest.get(statistic.task_id)
+        if item is None:
+            item = ServerLatest(task_id=statistic.task_id)
+            created.append(item)
+        for field in fields:
+            setattr(item, field, getattr(statistic, field))
+
+    ServerLatest.objects.bulk_update(latest.values(), fields)
+    ServerLatest.objects.bulk_create(created)
+
+
+def save_statistics(statistics, cycle=None):
+    """Сохраняет записи ServerStatistic, обновляет время
+    и статус выполнения заданий и завершает опрос
+    в одной транзакции
+
+    Аргументы:
+    statistics: список экземпляров ServerStatistic
+    cycle: опрос PollCycle, к которому относятся записи
+
+    return:
+    список сохраненных записей, записи для заданий,
+    удаленных во время опроса, не сохраняются
+    """
+    with transaction.atomic():
+        tasks = ServerTask.objects.only('id').in_bulk(
+            {statistic.task_id for statistic in statistics},
+        )
+        statistics = [
+            statistic for statistic in statistics
+            if statistic.task_id in tasks
+        ]
+        ServerStatistic.objects.bulk_create(statistics)
+        ServerMetric.objects.bulk_create([
+            metric
+            for statistic in statistics
+            for metric in getattr(statistic, 'metrics', [])
+        ], batch_size=500)
+
+        # Обновляем статус заданий
+        for statistic in statistics:
+            task = tasks[statistic.task_id]
+            task.executed = statistic.executed
+            task.status = statistic.status
+        ServerTask.objects.bulk_update(
+            tasks.values(),
+            ['executed', 'status'],
+        )
+
+        update_latest(statistics)
+
+        if cycle is not None:
+            cycle.finish(statistics)
+            transaction.on_commit(
+                lambda: cache.set(LATEST_CYCLE_CACHE_KEY, cycle.id, None),
+            )
+    return statistics
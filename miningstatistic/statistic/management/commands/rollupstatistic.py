@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from statistic.rollup import maintain
+
+
+class Command(BaseCommand):
+    help = (
+        'Aggregates new polling results into 5 minute, hourly and daily '
+        'server metrics and deletes data older than STATISTIC_RETENTION'
+    )
+
+    def handle(self, *args, **options):
+        deleted = maintain()
+        for key, count in sorted(deleted.items()):
+            self.stdout.write(
+                "Deleted {key}: {count}".format(key=key, count=count),
+            )
+        self.stdout.write(self.style.SUCCESS('Statistic rollup completed'))
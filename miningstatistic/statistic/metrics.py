@@ -0,0 +1,150 @@
+"""Числовые показатели работы майнеров.
+
+Показатели извлекаются из ответов майнеров до их преобразования для
+отображения (dj-miners Converter), в котором значения по цепочкам и GPU
+объединяются в строки. Ответы передаются в формате
+{'ИмяЗапроса': ответ майнера, }, как они разобраны и проверены
+pyminers. Показатели сохраняются в таблицу ServerMetric при
+добавлении результатов опроса.
+"""
+
+import re
+
+from task.plan import MINER_CLASSES
+
+# Поля статистики CGMiner со значениями по цепочкам
+CGMINER_FANS = re.compile(r'^fan(\d+)$')
+CGMINER_TEMPS_1 = re.compile(r'^temp(\d+)$')
+CGMINER_TEMPS_2 = re.compile(r'^temp2_(\d+)$')
+
+# Показатели и способ их объединения по цепочкам и GPU
+METRICS = {
+    'hashrate': sum,
+    'temperature': max,
+    'fan': max,
+    'power': sum,
+    'accepted': sum,
+    'rejected': sum,
+    'hardware_errors': sum,
+}
+
+
+def numbers(values):
+    """Возвращает список чисел из списка значений,
+    нечисловые значения пропускаются
+    """
+    return [
+        float(value) for value in values
+        if isinstance(value, (int, float)) and not isinstance(value, bool)
+    ]
+
+
+def chain_values(stats, pattern):
+    """Возвращает значения полей статистики CGMiner, имена которых
+    соответствуют шаблону pattern, в порядке номеров цепочек.
+    Нулевые значения (цепочка отсутствует) пропускаются
+    """
+    fields = sorted(
+        (int(match.group(1)), value)
+        for match, value in (
+            (pattern.match(key), value) for key, value in stats.items()
+        )
+        if match and value
+    )
+    return numbers(value for _, value in fields)
+
+
+def parse_cgminer(result):
+    """Показатели CGMiner (Antminer)"""
+    summary = result['Summary']['SUMMARY'][0]
+    stats = result['Stats']['STATS'][0]
+    return {
+        'hashrate': numbers([summary.get('GHS av')]),
+        # Температура чипов, если не передается - плат
+        'temperature': chain_values(stats, CGMINER_TEMPS_2)
+        or chain_values(stats, CGMINER_TEMPS_1),
+        'fan': chain_values(stats, CGMINER_FANS),
+        'accepted': numbers([summary.get('Accepted')]),
+        'rejected': numbers([summary.get('Rejected')]),
+        'hardware_errors': numbers([summary.get('Hardware Errors')]),
+    }
+
+
+def parse_claymore(result):
+    """Показатели Claymore's Dual Ethereum и CryptoNote"""
+    statistic = result['Statistic']
+    total = statistic['ETH']
+    hashrate = numbers([total.get('Hashrate')])
+    return {
+        # Хешрейт в тех же единицах, что и на странице статистики
+        'hashrate': [value / 1000 for value in hashrate],
+        'accepted': numbers([total.get('Shares')]),
+        'rejected': numbers([total.get('Rejected')]),
+        'temperature': numbers(statistic['GPU']['Temperatures']),
+        'fan': numbers(statistic['GPU']['Fan Speeds']),
+    }
+
+
+def parse_zcash(result):
+    """Показатели EWBF's CUDA ZCash miner"""
+    # Ответ содержит список со статистикой по каждому GPU
+    gpus = result['Statistic']
+    return {
+        metric: numbers(gpu.get(key) for gpu in gpus)
+        for metric, key in (
+            ('hashrate', 'speed_sps'),
+            ('temperature', 'temperature'),
+            ('power', 'gpu_power_usage'),
+            ('accepted', 'accepted_shares'),
+            ('rejected', 'rejected_shares'),
+        )
+    }
+
+
+# Разбор результатов для классов майнеров pyminers
+PARSERS = {
+    'CGMiner': parse_cgminer,
+    'Etherium': parse_claymore,
+    'Monero': parse_claymore,
+    'ZCash': parse_zcash,
+}
+
+
+def parse_metrics(miner, result):
+    """Извлекает числовые показатели из ответов майнера
+
+    Аргументы:
+    miner: slug майнера
+    result: ответы успешного опроса в формате
+        {'ИмяЗапроса': ответ майнера, }
+
+    return:
+    dict {показатель: [значение по цепочкам или GPU, ], }
+    """
+    parser = PARSERS.get(MINER_CLASSES.get(miner))
+    if parser is None or not isinstance(result, dict):
+        return {}
+    try:
+        metrics = parser(result)
+    except (LookupError, TypeError, AttributeError):
+        # Ответ не содержит ожидаемых полей
+        return {}
+    return {key: values for key, values in metrics.items() if values}
+
+
+def metric_values(miner, result):
+    """Возвращает показатели сервера и, если их несколько,
+    значения по цепочкам или GPU
+
+    return:
+    список [(показатель, номер цепочки или GPU, значение), ],
+    для значения сервера номер равен None
+    """
+    values = []
+    for key, items in parse_metrics(miner, result).items():
+        values.append((key, None, METRICS[key](items)))
+        if len(items) > 1:
+            values.extend(
+                (key, index, value) for index, value in enumerate(items)
+            )
+    return values
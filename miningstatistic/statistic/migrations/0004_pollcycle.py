@@ -0,0 +1,89 @@
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+def create_cycles(apps, schema_editor):
+    """Создает опросы PollCycle для существующих
+    идентификаторов опроса ServerStatistic.request_id
+    """
+    PollCycle = apps.get_model('statistic', 'PollCycle')
+    ServerStatistic = apps.get_model('statistic', 'ServerStatistic')
+
+    cycles = ServerStatistic.objects.values('request_id').annotate(
+        started=models.Min('executed'),
+        finished=models.Max('executed'),
+        servers=models.Count('id'),
+        succeeded=models.Count('id', filter=models.Q(status=True)),
+    ).order_by('request_id')
+
+    for item in cycles:
+        cycle = PollCycle.objects.create(
+            started=item['started'],
+            finished=item['finished'],
+            duration=item['finished'] - item['started'],
+            servers=item['servers'],
+            succeeded=item['succeeded'],
+            failed=item['servers'] - item['succeeded'],
+        )
+        ServerStatistic.objects.filter(
+            request_id=item['request_id'],
+        ).update(cycle=cycle)
+
+
+def restore_request_ids(apps, schema_editor):
+    """Восстанавливает идентификаторы опроса по опросам PollCycle
+    """
+    ServerStatistic = apps.get_model('statistic', 'ServerStatistic')
+    ServerStatistic.objects.update(request_id=models.F('cycle_id'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('statistic', '0003_i18n_en_ru'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PollCycle',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('started', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Started at')),
+                ('finished', models.DateTimeField(blank=True, null=True, verbose_name='Finished at')),
+                ('duration', models.DurationField(blank=True, null=True, verbose_name='Duration')),
+                ('servers', models.PositiveIntegerField(default=0, verbose_name='Servers')),
+                ('succeeded', models.PositiveIntegerField(default=0, verbose_name='Succeeded')),
+                ('failed', models.PositiveIntegerField(default=0, verbose_name='Failed')),
+            ],
+            options={
+                'verbose_name': 'Poll cycle',
+                'verbose_name_plural': 'Poll cycles',
+                'ordering': ['-id'],
+            },
+        ),
+        migrations.AddField(
+            model_name='serverstatistic',
+            name='cycle',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='statistic', to='statistic.PollCycle', verbose_name='Poll cycle'),
+        ),
+        migrations.AlterField(
+            model_name='serverstatistic',
+            name='request_id',
+            field=models.IntegerField(help_text='Request ID', null=True),
+        ),
+        migrations.RunPython(create_cycles, restore_request_ids),
+        migrations.AlterModelOptions(
+            name='serverstatistic',
+            options={'ordering': ['-cycle', 'task', '-status'], 'verbose_name': 'Server statistic', 'verbose_name_plural': 'Servers statistics'},
+        ),
+        migrations.RemoveField(
+            model_name='serverstatistic',
+            name='request_id',
+        ),
+        migrations.AlterField(
+            model_name='serverstatistic',
+            name='cycle',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='statistic', to='statistic.PollCycle', verbose_name='Poll cycle'),
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 2.2.28 on 2026-10-18 02:28
+
+import core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_latest(apps, schema_editor):
+    """Заполняет таблицу ServerLatest последними
+    результатами опроса каждого задания
+    """
+    ServerLatest = apps.get_model('statistic', 'ServerLatest')
+    ServerStatistic = apps.get_model('statistic', 'ServerStatistic')
+
+    # Сортировка по умолчанию отключается для DISTINCT
+    task_ids = ServerStatistic.objects.order_by().values_list(
+        'task_id', flat=True,
+    ).distinct()
+    latest = []
+    for task_id in task_ids:
+        statistic = ServerStatistic.objects.filter(
+            task_id=task_id,
+        ).order_by('-cycle_id', '-executed').first()
+        latest.append(ServerLatest(
+            task_id=task_id,
+            cycle_id=statistic.cycle_id,
+            result=statistic.result,
+            executed=statistic.executed,
+            status=statistic.status,
+        ))
+    ServerLatest.objects.bulk_create(latest)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('task', '0015_i18n_en_ru'),
+        ('statistic', '0004_pollcycle'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ServerLatest',
+            fields=[
+                ('task', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='latest', serialize=False, to='task.ServerTask', verbose_name='Task')),
+                ('result', models.TextField(validators=[core.validators.validate_json], verbose_name='Request result')),
+                ('executed', models.DateTimeField(verbose_name='Executed at')),
+                ('status', models.BooleanField(verbose_name='Request status')),
+                ('cycle', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='statistic.PollCycle', verbose_name='Poll cycle')),
+            ],
+            options={
+                'verbose_name': 'Server latest statistic',
+                'verbose_name_plural': 'Servers latest statistics',
+                'ordering': ['task'],
+            },
+        ),
+        migrations.RunPython(fill_latest, migrations.RunPython.noop),
+    ]
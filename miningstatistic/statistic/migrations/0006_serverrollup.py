@@ -0,0 +1,48 @@
+# Generated by Django 2.2.28 on 2026-10-18 02:31
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('task', '0015_i18n_en_ru'),
+        ('statistic', '0005_serverlatest'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='pollcycle',
+            name='started',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now, verbose_name='Started at'),
+        ),
+        migrations.CreateModel(
+            name='ServerRollup',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('resolution', models.PositiveIntegerField(choices=[(300, '5 minutes'), (3600, 'Hour'), (86400, 'Day')], verbose_name='Resolution')),
+                ('start', models.DateTimeField(verbose_name='Interval start')),
+                ('metric', models.CharField(max_length=32, verbose_name='Metric')),
+                ('count', models.PositiveIntegerField(verbose_name='Samples')),
+                ('minimum', models.FloatField(verbose_name='Minimum')),
+                ('maximum', models.FloatField(verbose_name='Maximum')),
+                ('total', models.FloatField(verbose_name='Total')),
+                ('task', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rollups', to='task.ServerTask', verbose_name='Task')),
+            ],
+            options={
+                'verbose_name': 'Server rollup',
+                'verbose_name_plural': 'Servers rollups',
+                'ordering': ['task', 'resolution', 'metric', 'start'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='serverrollup',
+            index=models.Index(fields=['resolution', 'start'], name='statistic_s_resolut_0e2cca_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='serverrollup',
+            unique_together={('task', 'resolution', 'metric', 'start')},
+        ),
+    ]
@@ -0,0 +1,174 @@
+# Generated by Django 2.2.28 on 2026-10-18 02:33
+
+from django.db import migrations, models
+import django.db.models.deletion
+import json
+import re
+
+# Сохраненные результаты опроса преобразованы для отображения
+# (dj-miners Converter), значения по цепочкам и GPU объединены
+# в строки. Разбор строк скопирован в миграцию, чтобы она не
+# зависела от изменений кода приложения
+
+# Числа в строковых значениях показателей
+NUMBER = re.compile(r'-?\d+(?:\.\d+)?')
+# Хешрейт и шары Claymore's: '{T} GH/s, {A}/{R} ({P}%)'
+CLAYMORE_TOTAL = re.compile(r'^\s*([\d.]+) GH/s, (\d+)/(\d+)')
+# Температура и скорость вентилятора GPU Claymore's: '(65C:40%)'
+CLAYMORE_GPU = re.compile(r'\((\d+)C:(\d+)%\)')
+
+# Показатели и способ их объединения по цепочкам и GPU
+METRICS = {
+    'hashrate': sum,
+    'temperature': max,
+    'fan': max,
+    'power': sum,
+    'accepted': sum,
+    'rejected': sum,
+    'hardware_errors': sum,
+}
+
+
+def numbers(value):
+    """Возвращает список чисел из значения показателя"""
+    if isinstance(value, bool):
+        return []
+    if isinstance(value, (int, float)):
+        return [float(value)]
+    if isinstance(value, str):
+        return [float(item) for item in NUMBER.findall(value)]
+    return []
+
+
+def parse_cgminer(result):
+    """Показатели CGMiner (Antminer)"""
+    return {
+        'hashrate': numbers(result.get('ghs_av')),
+        'temperature': numbers(result.get('temps_2'))
+        or numbers(result.get('temps_1')),
+        'fan': numbers(result.get('fans')),
+        'accepted': numbers(result.get('accepted')),
+        'rejected': numbers(result.get('rejected')),
+        'hardware_errors': numbers(result.get('hardware_errors')),
+    }
+
+
+def parse_claymore(result):
+    """Показатели Claymore's Dual Ethereum и CryptoNote"""
+    metrics = {}
+    total = CLAYMORE_TOTAL.match(str(result.get('eth', '')))
+    if total:
+        metrics['hashrate'] = [float(total.group(1))]
+        metrics['accepted'] = [float(total.group(2))]
+        metrics['rejected'] = [float(total.group(3))]
+    gpu = CLAYMORE_GPU.findall(str(result.get('gpu', '')))
+    metrics['temperature'] = [float(temp) for temp, _ in gpu]
+    metrics['fan'] = [float(fan) for _, fan in gpu]
+    return metrics
+
+
+def parse_zcash(result):
+    """Показатели EWBF's CUDA ZCash miner"""
+    return {
+        'hashrate': numbers(result.get('speed_sps')),
+        'temperature': numbers(result.get('temperature')),
+        'power': numbers(result.get('gpu_power_usage')),
+        'accepted': numbers(result.get('accepted_shares')),
+        'rejected': numbers(result.get('rejected_shares')),
+    }
+
+
+# Разбор результатов по slug майнера
+PARSERS = {
+    'antminer-s9-cgminer-490': parse_cgminer,
+    'claymores-cryptonote-gpu-97': parse_claymore,
+    'claymores-dual-ethereum-amd-gpu-98': parse_claymore,
+    'ewbfs-cuda-zcash-034b': parse_zcash,
+}
+
+
+def metric_values(miner, result):
+    """Возвращает список [(показатель, номер цепочки
+    или GPU, значение), ] из результата опроса
+    """
+    parser = PARSERS.get(miner)
+    if parser is None or not isinstance(result, dict):
+        return []
+    values = []
+    for key, items in parser(result).items():
+        if not items:
+            continue
+        values.append((key, None, METRICS[key](items)))
+        if len(items) > 1:
+            values.extend(
+                (key, index, value) for index, value in enumerate(items)
+            )
+    return values
+
+
+def fill_metrics(apps, schema_editor):
+    """Заполняет таблицу ServerMetric показателями
+    из сохраненных результатов опроса
+    """
+    ServerMetric = apps.get_model('statistic', 'ServerMetric')
+    ServerStatistic = apps.get_model('statistic', 'ServerStatistic')
+
+    results = ServerStatistic.objects.filter(
+        status=True,
+    ).order_by().values_list(
+        'task_id', 'cycle_id', 'task__server__miner__slug', 'result',
+    )
+    metrics = []
+    for task_id, cycle_id, miner, result in results.iterator():
+        metrics.extend(
+            ServerMetric(
+                task_id=task_id,
+                cycle_id=cycle_id,
+                metric=metric,
+                gpu_index=index,
+                value=value,
+            )
+            for metric, index, value in metric_values(
+                miner, json.loads(result),
+            )
+        )
+        if len(metrics) >= 5000:
+            ServerMetric.objects.bulk_create(metrics, batch_size=500)
+            metrics = []
+    ServerMetric.objects.bulk_create(metrics, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('task', '0015_i18n_en_ru'),
+        ('statistic', '0006_serverrollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ServerMetric',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('metric', models.CharField(max_length=32, verbose_name='Metric')),
+                ('gpu_index', models.PositiveSmallIntegerField(blank=True, null=True, verbose_name='GPU index')),
+                ('value', models.FloatField(verbose_name='Value')),
+                ('cycle', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='metrics', to='statistic.PollCycle', verbose_name='Poll cycle')),
+                ('task', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='metrics', to='task.ServerTask', verbose_name='Task')),
+            ],
+            options={
+                'verbose_name': 'Server metric',
+                'verbose_name_plural': 'Servers metrics',
+                'ordering': ['-cycle_id', 'task_id', 'metric', 'gpu_index'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='servermetric',
+            index=models.Index(fields=['task', 'metric', 'gpu_index', 'cycle', 'value'], name='statistic_s_task_id_d8ce42_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='servermetric',
+            index=models.Index(fields=['cycle', 'metric', 'gpu_index', 'value'], name='statistic_s_cycle_i_fb0e82_idx'),
+        ),
+        migrations.RunPython(fill_metrics, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,6 @@
 from django.db import models
 from django.urls import reverse
-from django.core.validators import MinValueValidator
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 from task.models import ServerTask
@@ -8,15 +8,85 @@ from core.validators import validate_json
 
 # Create your models here.
 
+class PollCycleQueryset(models.QuerySet):
+    def finished(self):
+        return self.filter(finished__isnull=False)
+
+    def last_finished(self):
+        """Последний завершенный опрос, поиск
+        выполняется по индексу первичного ключа
+        """
+        return self.finished().order_by('-id').first()
+
+    def last_finished_id(self):
+        """Идентификатор последнего завершенного опроса"""
+        return self.finished().order_by('-id').values_list(
+            'id', flat=True,
+        ).first()
+
+
+class PollCycle(models.Model):
+    started = models.DateTimeField(
+        default=timezone.now,
+        db_index=True,
+        verbose_name=_('Started at'),
+    )
+    finished = models.DateTimeField(
+        blank=True,
+        null=True,
+        verbose_name=_('Finished at'),
+    )
+    duration = models.DurationField(
+        blank=True,
+        null=True,
+        verbose_name=_('Duration'),
+    )
+    servers = models.PositiveIntegerField(
+        default=0,
+        verbose_name=_('Servers'),
+    )
+    succeeded = models.PositiveIntegerField(
+        default=0,
+        verbose_name=_('Succeeded'),
+    )
+    failed = models.PositiveIntegerField(
+        default=0,
+        verbose_name=_('Failed'),
+    )
+
+    objects = PollCycleQueryset.as_manager()
+
+    class Meta:
+        verbose_name = _('Poll cycle')
+        verbose_name_plural = _('Poll cycles')
+        ordering = ['-id']
+
+    def __str__(self):
+        return "{id} - {started}".format(
+            id=self.id,
+            started=self.started,
+        )
+
+    def finish(self, statistics):
+        """Сохраняет время выполнения опроса
+        и количество опрошенных серверов
+
+        Аргументы:
+        statistics: список сохраненных записей ServerStatistic
+        """
+        self.finished = timezone.now()
+        self.duration = self.finished - self.started
+        self.servers = len(statistics)
+        self.succeeded = sum(1 for item in statistics if item.status)
+        self.failed = self.servers - self.succeeded
+        self.save(update_fields=[
+            'finished', 'duration', 'servers', 'succeeded', 'failed',
+        ])
+
+
 class ServerStatisticQueryset(models.QuerySet):
     def results_last(self):
-        if ServerStatistic.objects.count():
-            request_id_max = ServerStatistic.objects.aggregate(
-                models.Max('request_id'),
-            )['request_id__max']
-        else:
-            request_id_max = 0
-        return self.filter(request_id=request_id_max)
+        return self.filter(cycle=PollCycle.objects.last_finished())
 
 
 class ServerStatistic(models.Model):
@@ -26,11 +96,11 @@ class ServerStatistic(models.Model):
         related_name='statistic',
         verbose_name=_('Task'),
     )
-    request_id = models.IntegerField(
-        validators=[
-            MinValueValidator(1),
-        ],
-        help_text=_('Request ID'),
+    cycle = models.ForeignKey(
+        PollCycle,
+        on_delete=models.CASCADE,
+        related_name='statistic',
+        verbose_name=_('Poll cycle'),
     )
     result = models.TextField(
         validators=[
@@ -50,7 +120,7 @@ class ServerStatistic(models.Model):
     class Meta:
         verbose_name = _('Server statistic')
         verbose_name_plural = _('Servers statistics')
-        ordering = ['-request_id', 'task', '-status']
+        ordering = ['-cycle', 'task', '-status']
 
     def __str__(self):
         return "{task} - {executed} - {status}".format(
@@ -76,3 +146,214 @@ class ServerStatistic(models.Model):
             'statistic:server:delete',
             kwargs={'pk': self.pk},
         )
+
+
+class ServerLatestQueryset(models.QuerySet):
+    def enabled(self):
+        """Состояние серверов с включенными заданиями
+        в порядке майнеров и серверов
+        """
+        return self.filter(
+            task__enabled=True,
+        ).select_related(
+            'task__server__miner',
+        ).order_by(
+            'task__server__miner__name',
+            'task__server__miner__version',
+            'task__server__name',
+            'task',
+        )
+
+
+class ServerLatest(models.Model):
+    """Результат последнего опроса сервера. Обновляется
+    при добавлении результатов опроса, содержит одну запись
+    для каждого задания
+    """
+    task = models.OneToOneField(
+        ServerTask,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='latest',
+        verbose_name=_('Task'),
+    )
+    cycle = models.ForeignKey(
+        PollCycle,
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name='+',
+        verbose_name=_('Poll cycle'),
+    )
+    result = models.TextField(
+        validators=[
+            validate_json,
+        ],
+        verbose_name=_('Request result'),
+    )
+    executed = models.DateTimeField(
+        verbose_name=_('Executed at'),
+    )
+    status = models.BooleanField(
+        verbose_name=_('Request status'),
+    )
+
+    objects = ServerLatestQueryset.as_manager()
+
+    class Meta:
+        verbose_name = _('Server latest statistic')
+        verbose_name_plural = _('Servers latest statistics')
+        ordering = ['task']
+
+    def __str__(self):
+        return "{task} - {executed} - {status}".format(
+            task=self.task,
+            executed=self.executed,
+            status=_('Success') if self.status else _('Failure'),
+        )
+
+
+class ServerRollup(models.Model):
+    """Агрегированные показатели сервера за интервал времени.
+    Хранятся сумма и количество значений, чтобы интервалы можно
+    было объединять без потери точности среднего
+    """
+    RESOLUTION_5M = 300
+    RESOLUTION_1H = 3600
+    RESOLUTION_1D = 86400
+    RESOLUTION_CHOICES = (
+        (RESOLUTION_5M, _('5 minutes')),
+        (RESOLUTION_1H, _('Hour')),
+        (RESOLUTION_1D, _('Day')),
+    )
+
+    task = models.ForeignKey(
+        ServerTask,
+        on_delete=models.CASCADE,
+        related_name='rollups',
+        verbose_name=_('Task'),
+    )
+    resolution = models.PositiveIntegerField(
+        choices=RESOLUTION_CHOICES,
+        verbose_name=_('Resolution'),
+    )
+    start = models.DateTimeField(
+        verbose_name=_('Interval start'),
+    )
+    metric = models.CharField(
+        max_length=32,
+        verbose_name=_('Metric'),
+    )
+    count = models.PositiveIntegerField(
+        verbose_name=_('Samples'),
+    )
+    minimum = models.FloatField(
+        verbose_name=_('Minimum'),
+    )
+    maximum = models.FloatField(
+        verbose_name=_('Maximum'),
+    )
+    total = models.FloatField(
+        verbose_name=_('Total'),
+    )
+
+    class Meta:
+        verbose_name = _('Server rollup')
+        verbose_name_plural = _('Servers rollups')
+        ordering = ['task', 'resolution', 'metric', 'start']
+        unique_together = (('task', 'resolution', 'metric', 'start'),)
+        indexes = [
+            models.Index(fields=['resolution', 'start']),
+        ]
+
+    def __str__(self):
+        return "{task} - {metric} - {start}".format(
+            task=self.task,
+            metric=self.metric,
+            start=self.start,
+        )
+
+    @property
+    def average(self):
+        """Среднее значение за интервал"""
+        return self.total / self.count if self.count else None
+
+
+class ServerMetricQueryset(models.QuerySet):
+    def servers(self):
+        """Значения показателей серверов (без цепочек и GPU)"""
+        return self.filter(gpu_index__isnull=True)
+
+    def totals(self, metric):
+        """Сумма значений показателя metric по всем серверам
+        для каждого опроса в формате [{'cycle': id, 'total': сумма}, ]
+        """
+        return self.servers().filter(
+            metric=metric,
+        ).order_by('cycle_id').values('cycle').annotate(
+            total=models.Sum('value'),
+        )
+
+    def exceeding(self, metric, threshold):
+        """Значения показателя metric, превышающие threshold"""
+        return self.filter(metric=metric, value__gt=threshold)
+
+
+class ServerMetric(models.Model):
+    """Числовой показатель сервера в одном опросе. Значения
+    по цепочкам или GPU хранятся с их номером gpu_index,
+    значение сервера - с gpu_index равным NULL
+    """
+    cycle = models.ForeignKey(
+        PollCycle,
+        on_delete=models.CASCADE,
+        related_name='metrics',
+        db_index=False,
+        verbose_name=_('Poll cycle'),
+    )
+    task = models.ForeignKey(
+        ServerTask,
+        on_delete=models.CASCADE,
+        related_name='metrics',
+        db_index=False,
+        verbose_name=_('Task'),
+    )
+    metric = models.CharField(
+        max_length=32,
+        verbose_name=_('Metric'),
+    )
+    gpu_index = models.PositiveSmallIntegerField(
+        blank=True,
+        null=True,
+        verbose_name=_('GPU index'),
+    )
+    value = models.FloatField(
+        verbose_name=_('Value'),
+    )
+
+    objects = ServerMetricQueryset.as_manager()
+
+    class Meta:
+        verbose_name = _('Server metric')
+        verbose_name_plural = _('Servers metrics')
+        ordering = ['-cycle_id', 'task_id', 'metric', 'gpu_index']
+        # Индексы содержат значение показателя, поэтому графики
+        # и пороги вычисляются без чтения строк таблицы
+        indexes = [
+            models.Index(
+                fields=['task', 'metric', 'gpu_index', 'cycle', 'value'],
+            ),
+            models.Index(
+                fields=['cycle', 'metric', 'gpu_index', 'value'],
+            ),
+        ]
+
+    def __str__(self):
+        return "{task} - {metric}{gpu} - {value}".format(
+            task=self.task,
+            metric=self.metric,
+            gpu='' if self.gpu_index is None else '[{}]'.format(
+                self.gpu_index,
+            ),
+            value=self.value,
+        )
@@ -0,0 +1,285 @@
+"""Агрегирование и удаление устаревшей статистики.
+
+Показатели серверов из результатов опроса (ServerMetric) агрегируются
+в показатели за 5 минут, из них - за час, из часовых - за сутки
+(ServerRollup). Обрабатываются только завершенные интервалы, начиная
+с последнего агрегированного, поэтому каждый результат опроса
+обрабатывается один раз. После агрегирования удаляются данные старше
+срока хранения (settings.STATISTIC_RETENTION), но только уже
+агрегированные в интервалы следующего уровня.
+
+Интервалы каждого прохода добавляются одной транзакцией. Агрегируются
+только завершенные интервалы, поэтому при одновременном запуске
+(служба dj-miners и команда rollupstatistic) оба процесса вычисляют
+одинаковые записи, и уже добавленные другим процессом пропускаются.
+"""
+
+import datetime
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max, Min, Sum
+from django.db.models.functions import TruncDay, TruncHour
+from django.utils import timezone
+
+from .models import PollCycle, ServerMetric, ServerRollup, ServerStatistic
+
+# Срок хранения (дней) по умолчанию, None - без ограничения
+RETENTION = {
+    'raw': 7,
+    '5m': 30,
+    '1h': 365,
+    '1d': None,
+}
+
+# Задержка агрегирования: интервал обрабатывается, если
+# он завершился раньше, чем ROLLUP_DELAY назад, чтобы успели
+# сохраниться результаты выполняемого опроса
+ROLLUP_DELAY = datetime.timedelta(minutes=5)
+
+# Количество дней, результаты опроса за которые
+# агрегируются за один проход
+RAW_CHUNK = datetime.timedelta(days=1)
+
+# Уровни агрегирования: (интервал, исходный интервал, функция усечения)
+LEVELS = (
+    (ServerRollup.RESOLUTION_1H, ServerRollup.RESOLUTION_5M, TruncHour),
+    (ServerRollup.RESOLUTION_1D, ServerRollup.RESOLUTION_1H, TruncDay),
+)
+
+
+def get_retention(retention=None):
+    """Сроки хранения (дней): значения по умолчанию, замененные
+    переданными или заданными в settings.STATISTIC_RETENTION
+    """
+    return dict(
+        RETENTION,
+        **(retention or getattr(settings, 'STATISTIC_RETENTION', {}))
+    )
+
+
+def floor_time(value, resolution):
+    """Возвращает начало интервала resolution (секунд),
+    к которому относится время value. Интервалы отсчитываются
+    в UTC
+    """
+    timestamp = value.timestamp()
+    return datetime.datetime.fromtimestamp(
+        timestamp - timestamp % resolution,
+        tz=datetime.timezone.utc,
+    )
+
+
+def next_start(resolution):
+    """Начало интервала, следующего за последним
+    агрегированным, None - интервалов нет
+    """
+    start = ServerRollup.objects.filter(
+        resolution=resolution,
+    ).aggregate(Max('start'))['start__max']
+    if start is None:
+        return None
+    return start + datetime.timedelta(seconds=resolution)
+
+
+def save_rollups(rollups):
+    """Добавляет интервалы одной транзакцией, интервалы, уже
+    добавленные другим процессом, пропускаются
+    """
+    with transaction.atomic():
+        ServerRollup.objects.bulk_create(
+            rollups,
+            batch_size=500,
+            ignore_conflicts=True,
+        )
+
+
+def rollup_raw(now):
+    """Агрегирует результаты опроса в интервалы по 5 минут
+
+    return:
+    время, до которого результаты опроса агрегированы
+    """
+    resolution = ServerRollup.RESOLUTION_5M
+    boundary = floor_time(now - ROLLUP_DELAY, resolution)
+
+    position = next_start(resolution)
+    if position is None:
+        started = PollCycle.objects.aggregate(Min('started'))['started__min']
+        if started is None:
+            return boundary
+        position = floor_time(started, resolution)
+
+    while position < boundary:
+        end = min(position + RAW_CHUNK, boundary)
+
+        # Показатели за интервалы в формате
+        # {(task_id, start, metric): [count, min, max, total], }
+        buckets = {}
+        metrics = ServerMetric.objects.servers().filter(
+            cycle__started__gte=position,
+            cycle__started__lt=end,
+        ).order_by().values_list(
+            'task_id',
+            'metric',
+            'cycle__started',
+            'value',
+        )
+        for task_id, metric, started, value in metrics.iterator():
+            start = floor_time(started, resolution)
+            bucket = buckets.get((task_id, start, metric))
+            if bucket is None:
+                buckets[(task_id, start, metric)] = [
+                    1, value, value, value,
+                ]
+            else:
+                bucket[0] += 1
+                bucket[1] = min(bucket[1], value)
+                bucket[2] = max(bucket[2], value)
+                bucket[3] += value
+
+        save_rollups([
+            ServerRollup(
+                task_id=task_id,
+                resolution=resolution,
+                start=start,
+                metric=metric,
+                count=count,
+                minimum=minimum,
+                maximum=maximum,
+                total=total,
+            )
+            for (task_id, start, metric), (count, minimum, maximum, total)
+            in buckets.items()
+        ])
+        position = end
+
+    return boundary
+
+
+def rollup_level(resolution, source, trunc, ready):
+    """Агрегирует интервалы source в интервалы resolution
+
+    Аргументы:
+    resolution: интервал агрегирования (секунд)
+    source: исходный интервал (секунд)
+    trunc: функция усечения времени до интервала resolution
+    ready: время, до которого агрегированы исходные интервалы
+
+    return:
+    время, до которого интервалы resolution агрегированы
+    """
+    boundary = floor_time(ready, resolution)
+
+    position = next_start(resolution)
+    if position is None:
+        start = ServerRollup.objects.filter(
+            resolution=source,
+        ).aggregate(Min('start'))['start__min']
+        if start is None:
+            return boundary
+        position = floor_time(start, resolution)
+
+    if position >= boundary:
+        return boundary
+
+    buckets = ServerRollup.objects.filter(
+        resolution=source,
+        start__gte=position,
+        start__lt=boundary,
+    ).order_by().annotate(
+        bucket=trunc('start', tzinfo=datetime.timezone.utc),
+    ).values(
+        'task_id', 'metric', 'bucket',
+    ).annotate(
+        samples=Sum('count'),
+        low=Min('minimum'),
+        high=Max('maximum'),
+        amount=Sum('total'),
+    )
+    save_rollups([
+        ServerRollup(
+            task_id=item['task_id'],
+            resolution=resolution,
+            start=item['bucket'],
+            metric=item['metric'],
+            count=item['samples'],
+            minimum=item['low'],
+            maximum=item['high'],
+            total=item['amount'],
+        )
+        for item in buckets.iterator()
+    ])
+    return boundary
+
+
+def prune(now, ready, retention):
+    """Удаляет данные старше срока хранения
+
+    Аргументы:
+    now: текущее время
+    ready: {интервал: время, до которого данные агрегированы, }
+    retention: сроки хранения (дней)
+
+    return:
+    dict {данные: количество удаленных записей, }
+    """
+    def cutoff(key, aggregated=None):
+        """Время, до которого удаляются данные key"""
+        if retention.get(key) is None:
+            return None
+        time = now - datetime.timedelta(days=retention[key])
+        # Удаляются только агрегированные данные
+        return time if aggregated is None else min(time, aggregated)
+
+    deleted = {}
+
+    # Результаты опроса и показатели удаляются вместе с опросами
+    time = cutoff('raw', ready[ServerRollup.RESOLUTION_5M])
+    if time is not None:
+        with transaction.atomic():
+            deleted['raw'] = ServerStatistic.objects.filter(
+                cycle__started__lt=time,
+            ).delete()[0]
+            ServerMetric.objects.filter(cycle__started__lt=time).delete()
+            PollCycle.objects.filter(started__lt=time).delete()
+
+    for key, resolution, time in (
+            ('5m', ServerRollup.RESOLUTION_5M,
+             cutoff('5m', ready[ServerRollup.RESOLUTION_1H])),
+            ('1h', ServerRollup.RESOLUTION_1H,
+             cutoff('1h', ready[ServerRollup.RESOLUTION_1D])),
+            ('1d', ServerRollup.RESOLUTION_1D, cutoff('1d'))):
+        if time is not None:
+            deleted[key] = ServerRollup.objects.filter(
+                resolution=resolution,
+                start__lt=time,
+            ).delete()[0]
+
+    return deleted
+
+
+def maintain(now=None, retention=None):
+    """Агрегирует новые результаты опроса и удаляет
+    устаревшие данные. Записи каждого прохода добавляются
+    одной транзакцией (save_rollups), поэтому при прерывании
+    агрегирование продолжится с последнего сохраненного интервала
+
+    Аргументы:
+    now: текущее время, по умолчанию timezone.now()
+    retention: сроки хранения (дней), по умолчанию
+        settings.STATISTIC_RETENTION
+
+    return:
+    dict {данные: количество удаленных записей, }
+    """
+    now = now or timezone.now()
+    retention = get_retention(retention)
+
+    ready = {ServerRollup.RESOLUTION_5M: rollup_raw(now)}
+    for resolution, source, trunc in LEVELS:
+        ready[resolution] = rollup_level(
+            resolution, source, trunc, ready[source],
+        )
+
+    return prune(now, ready, retention)
@@ -9,12 +9,27 @@ class ServerStatisticTable(tables.Table):
         verbose_name=_('Server'),
     )
 
+    class Meta:
+        # Строки и ячейки таблицы обновляются на странице
+        # по событиям о завершении опроса
+        row_attrs = {
+            'data-task': lambda record: record['task'],
+        }
+
     def __init__(self, *args, **kwargs):
         self.verbose_name_prefix = kwargs.pop('verbose_name_prefix', None)
         self.miner = kwargs.pop('miner', None)
         self.rename_columns(kwargs.get('extra_columns', None))
         super().__init__(*args, **kwargs)
 
+    def get_column_class_names(self, classes_set, bound_column):
+        """Добавляет имя столбца в классы ячеек"""
+        classes_set = super().get_column_class_names(
+            classes_set, bound_column,
+        )
+        classes_set.add(bound_column.name)
+        return classes_set
+
     def rename_columns(self, columns):
         """Переименовывает заголовки таблиц
         для известных майнеров"""
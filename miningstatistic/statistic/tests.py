@@ -1,3 +1,991 @@
-from django.test import TestCase
+import datetime
+import json
+
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from miner.models import Miner, Server
+from task.models import Config, ServerTask
+from task.plan import get_plan, invalidate_plan
+
+from .history import lttb
+from .ingest import (
+    LATEST_CYCLE_CACHE_KEY, build_statistic, save_statistics,
+)
+from .metrics import metric_values, parse_metrics
+from .models import (
+    PollCycle, ServerLatest, ServerMetric, ServerRollup, ServerStatistic,
+)
+from . import rollup
+from .rollup import maintain
 
 # Create your tests here.
+
+@override_settings(CACHES={
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+})
+class IngestTest(TestCase):
+    """Тестирование пакетного добавления результатов опроса
+    """
+
+    def setUp(self):
+        invalidate_plan()
+
+        # Данные, добавленные миграциями, не используются
+        ServerTask.objects.all().delete()
+        Config.objects.update(enabled=False)
+        Config.objects.create(name='Test', enabled=True)
+
+        miner = Miner.objects.get(slug='antminer-s9-cgminer-490')
+        requests = miner.requests.filter(name__in=['Stats', 'Summary'])
+        for index in range(5):
+            server = Server.objects.create(
+                name='test{}'.format(index),
+                host='192.168.0.{}'.format(index + 1),
+                port=4028,
+                miner=miner,
+            )
+            task = ServerTask.objects.create(server=server, enabled=True)
+            task.requests.set(requests)
+
+        self.plan = get_plan('Test')
+        self.cycle = PollCycle.objects.create()
+        self.when = timezone.make_aware(
+            datetime.datetime(2019, 4, 1, 12, 0, 0),
+        )
+
+    def tearDown(self):
+        invalidate_plan()
+
+    def exchange(self, error=False, responses=None):
+        """Результаты задания в формате Sender.union,
+        responses - ответы майнера по именам запросов
+        """
+        if error:
+            return {'Exchange': [{
+                'Request': {'command': 'stats+summary'},
+                'Response': {'error_type': 'timeout'},
+                'When': self.when,
+                'Error': True,
+            }]}
+        return {'Exchange': [
+            {
+                # Порядок полей запроса не важен
+                'Request': json.loads(body),
+                'Response': (responses or {}).get(name, {'Name': name}),
+                'When': self.when + datetime.timedelta(seconds=index),
+                'Error': False,
+            }
+            for index, (name, body) in enumerate(
+                next(iter(self.plan['requests'].values())),
+            )
+        ]}
+
+    def test_build_statistic(self):
+        """Имена запросов определяются по плану опроса
+        """
+        task_id = next(iter(self.plan['tasks']))
+        with self.assertNumQueries(0):
+            statistic = build_statistic(
+                self.plan, task_id, self.exchange(), self.cycle,
+            )
+
+        self.assertTrue(statistic.status)
+        self.assertEqual(statistic.executed, self.when
+                         + datetime.timedelta(seconds=1))
+        self.assertDictEqual(
+            json.loads(statistic.result),
+            {'Stats': {'Name': 'Stats'}, 'Summary': {'Name': 'Summary'}},
+        )
+
+        statistic = build_statistic(
+            self.plan, task_id, self.exchange(error=True), self.cycle,
+        )
+        self.assertFalse(statistic.status)
+        self.assertDictEqual(
+            json.loads(statistic.result),
+            {'error_type': 'timeout'},
+        )
+
+    def test_build_statistic_metrics(self):
+        """Показатели извлекаются из ответов майнера
+        до преобразования для отображения
+        """
+        task_id = next(iter(self.plan['tasks']))
+        task_data = self.exchange(responses={
+            'Summary': {'SUMMARY': [{'GHS av': 13500.5}]},
+            'Stats': {'STATS': [{'fan1': 5500}]},
+        })
+
+        statistic = build_statistic(
+            self.plan, task_id, task_data, self.cycle,
+            convert=lambda miner, result: {'ghs_av': '13.5 TH/s'},
+        )
+        self.assertCountEqual(
+            [(metric.metric, metric.gpu_index, metric.value)
+             for metric in statistic.metrics],
+            [('hashrate', None, 13500.5), ('fan', None, 5500.0)],
+        )
+
+    def test_build_statistic_invalid(self):
+        """Не задано время выполнения запроса
+        """
+        task_id = next(iter(self.plan['tasks']))
+        task_data = self.exchange(error=True)
+        task_data['Exchange'][0]['When'] = None
+        with self.assertRaises(ValidationError):
+            build_statistic(self.plan, task_id, task_data, self.cycle)
+
+    def test_save_statistics(self):
+        """Результаты и статус заданий сохраняются
+        постоянным количеством запросов к БД
+        """
+        statistics = [
+            build_statistic(
+                self.plan, task_id, self.exchange(error=task_id % 2),
+                self.cycle,
+            )
+            for task_id in self.plan['tasks']
+        ]
+        # Задание удалено во время опроса
+        ServerTask.objects.filter(id=statistics[0].task_id).delete()
+
+        with self.assertNumQueries(8):
+            saved = save_statistics(statistics, self.cycle)
+
+        self.assertEqual(len(saved), 4)
+        self.assertEqual(ServerStatistic.objects.count(), 4)
+
+        # Опрос завершен
+        cycle = PollCycle.objects.get(id=self.cycle.id)
+        self.assertIsNotNone(cycle.finished)
+        self.assertEqual(cycle.duration, cycle.finished - cycle.started)
+        self.assertEqual(cycle.servers, 4)
+        self.assertEqual(
+            cycle.failed,
+            sum(1 for statistic in saved if not statistic.status),
+        )
+        self.assertEqual(cycle.succeeded + cycle.failed, cycle.servers)
+        for statistic in saved:
+            task = ServerTask.objects.get(id=statistic.task_id)
+            self.assertEqual(task.executed, statistic.executed)
+            self.assertEqual(task.status, statistic.status)
+
+        # Последние результаты заданий
+        self.assertEqual(ServerLatest.objects.count(), 4)
+        for statistic in saved:
+            latest = ServerLatest.objects.get(task_id=statistic.task_id)
+            self.assertEqual(latest.cycle, cycle)
+            self.assertEqual(latest.result, statistic.result)
+            self.assertEqual(latest.status, statistic.status)
+
+    def test_save_statistics_metrics(self):
+        """Числовые показатели сохраняются вместе с результатами
+        """
+        responses = {
+            'Summary': {'SUMMARY': [{'GHS av': 13500}]},
+            'Stats': {'STATS': [{'temp2_1': 70, 'temp2_2': 72}]},
+        }
+
+        statistics = [
+            build_statistic(
+                self.plan, task_id,
+                self.exchange(error=task_id % 2, responses=responses),
+                self.cycle,
+            )
+            for task_id in self.plan['tasks']
+        ]
+        save_statistics(statistics, self.cycle)
+
+        succeeded = [item.task_id for item in statistics if item.status]
+        metrics = ServerMetric.objects.filter(cycle=self.cycle)
+        # Хешрейт, температура сервера и двух цепочек
+        self.assertEqual(metrics.count(), 4 * len(succeeded))
+        self.assertCountEqual(
+            metrics.servers().filter(metric='hashrate').values_list(
+                'task_id', flat=True,
+            ),
+            succeeded,
+        )
+        self.assertListEqual(
+            list(ServerMetric.objects.totals('hashrate')),
+            [{'cycle': self.cycle.id, 'total': 13500.0 * len(succeeded)}],
+        )
+        self.assertEqual(
+            ServerMetric.objects.exceeding('temperature', 71).count(),
+            2 * len(succeeded),
+        )
+
+    def test_save_statistics_latest(self):
+        """Последние результаты заданий обновляются
+        при сохранении следующего опроса
+        """
+        for error in (False, True):
+            cycle = PollCycle.objects.create()
+            save_statistics([
+                build_statistic(
+                    self.plan, task_id, self.exchange(error=error), cycle,
+                )
+                for task_id in self.plan['tasks']
+            ], cycle)
+
+        self.assertEqual(ServerStatistic.objects.count(), 10)
+        self.assertEqual(ServerLatest.objects.count(), 5)
+        self.assertEqual(
+            ServerLatest.objects.filter(cycle=cycle, status=False).count(),
+            5,
+        )
+        self.assertEqual(len(ServerLatest.objects.enabled()), 5)
+
+
+class PollCycleTest(TestCase):
+    """Тестирование опросов PollCycle
+    """
+
+    def setUp(self):
+        miner = Miner.objects.get(slug='antminer-s9-cgminer-490')
+        server = Server.objects.create(
+            name='test',
+            host='192.168.0.1',
+            port=4028,
+            miner=miner,
+        )
+        self.task = ServerTask.objects.create(server=server, enabled=True)
+
+    def add_cycle(self, finish=True):
+        """Добавляет опрос с результатом задания
+        """
+        cycle = PollCycle.objects.create()
+        statistic = ServerStatistic.objects.create(
+            task=self.task,
+            cycle=cycle,
+            result='{}',
+            executed=timezone.now(),
+            status=True,
+        )
+        if finish:
+            cycle.finish([statistic])
+        return cycle, statistic
+
+    def test_results_last(self):
+        """Результаты последнего завершенного опроса
+        """
+        self.assertFalse(ServerStatistic.objects.results_last().exists())
+
+        self.add_cycle()
+        cycle, statistic = self.add_cycle()
+        # Опрос выполняется
+        self.add_cycle(finish=False)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(PollCycle.objects.last_finished(), cycle)
+        self.assertListEqual(
+            list(ServerStatistic.objects.results_last()),
+            [statistic],
+        )
+
+
+@override_settings(CACHES={
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+})
+class ServerStatisticListTest(TestCase):
+    """Тестирование представления статистики серверов
+    """
+
+    def setUp(self):
+        cache.clear()
+        miner = Miner.objects.get(slug='antminer-s9-cgminer-490')
+        cycle = PollCycle.objects.create()
+        cycle.finish([])
+        for index in range(10):
+            server = Server.objects.create(
+                name='test{}'.format(index),
+                host='192.168.0.{}'.format(index + 1),
+                port=4028,
+                miner=miner,
+            )
+            task = ServerTask.objects.create(server=server, enabled=True)
+            ServerLatest.objects.create(
+                task=task,
+                cycle=cycle,
+                result=json.dumps(
+                    {'elapsed': index} if index % 2 else
+                    {'error_type': 'timeout', 'error_message': 'timed out'},
+                ),
+                executed=timezone.now(),
+                status=bool(index % 2),
+            )
+
+    def test_list(self):
+        """Таблицы формируются одним запросом
+        к последним результатам опроса
+        """
+        url = reverse('statistic:server:list')
+        # Последний опрос, последние результаты
+        # и интервал обновления
+        with self.assertNumQueries(3):
+            response = self.client.get(url)
+
+        self.assertEqual(response.status_code, 200)
+        tables = response.context['tables']
+        self.assertEqual(len(tables), 2)
+        self.assertEqual(len(tables[0].rows), 5)
+        self.assertEqual(len(tables[1].rows), 5)
+        self.assertContains(response, 'TEST9')
+
+
+    def test_list_cache(self):
+        """Данные таблиц берутся из кэша до завершения
+        следующего опроса
+        """
+        url = reverse('statistic:server:list')
+        self.client.get(url)
+
+        # Данные таблиц из кэша
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+        self.assertEqual(len(response.context['tables']), 2)
+
+        # Все серверы без ошибок в новом опросе
+        cycle = PollCycle.objects.create()
+        ServerLatest.objects.update(cycle=cycle, status=True, result='{}')
+        response = self.client.get(url)
+        self.assertEqual(len(response.context['tables']), 2)
+
+        cycle.finish([])
+        with self.assertNumQueries(3):
+            response = self.client.get(url)
+        self.assertEqual(len(response.context['tables']), 1)
+        self.assertEqual(len(response.context['tables'][0].rows), 10)
+
+    def updates(self, cycle=None):
+        """Возвращает изменения таблиц для страницы
+        с результатами опроса cycle, None - изменений нет
+        """
+        response = self.client.get(
+            reverse('statistic:server:updates'),
+            {'cycle': cycle} if cycle else {},
+        )
+        if response.status_code == 204:
+            return None
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_list_updates(self):
+        """Страница содержит адрес запроса изменений,
+        строки таблиц и ячейки отмечены для обновления
+        """
+        response = self.client.get(reverse('statistic:server:list'))
+        self.assertContains(
+            response,
+            'data-updates-url="{}"'.format(
+                reverse('statistic:server:updates'),
+            ),
+        )
+        self.assertContains(
+            response,
+            'data-cycle="{}"'.format(PollCycle.objects.last_finished_id()),
+        )
+        self.assertContains(
+            response,
+            'data-task="{}"'.format(
+                ServerTask.objects.get(server__name='test1').pk,
+            ),
+        )
+        self.assertContains(response, 'class="elapsed"')
+
+    def test_updates(self):
+        """При завершении опроса передаются только изменившиеся
+        ячейки, при изменении состава таблиц - признак reload
+        """
+        previous = PollCycle.objects.last_finished_id()
+        self.client.get(reverse('statistic:server:list'))
+
+        # Страница отображает последний опрос
+        self.assertIsNone(self.updates(previous))
+        # Опрос определяется по кэшу без запросов к БД
+        with self.assertNumQueries(0):
+            self.assertIsNone(self.updates(previous))
+
+        cycle = PollCycle.objects.create()
+        ServerLatest.objects.filter(task__server__name='test1').update(
+            cycle=cycle, result=json.dumps({'elapsed': 100}),
+        )
+        cycle.finish([])
+        # Как при добавлении результатов опроса (save_statistics)
+        cache.set(LATEST_CYCLE_CACHE_KEY, cycle.id, None)
+
+        self.assertDictEqual(self.updates(previous), {
+            'cycle': cycle.id,
+            'rows': [{
+                'task': ServerTask.objects.get(server__name='test1').pk,
+                'cells': {'elapsed': '100'},
+            }],
+        })
+
+        # Данные отображаемого опроса неизвестны
+        self.assertDictEqual(
+            self.updates(), {'cycle': cycle.id, 'reload': True},
+        )
+
+        # Сервер перешел в таблицу ошибок
+        following = PollCycle.objects.create()
+        ServerLatest.objects.filter(task__server__name='test3').update(
+            cycle=following, status=False,
+        )
+        following.finish([])
+        cache.set(LATEST_CYCLE_CACHE_KEY, following.id, None)
+        self.assertDictEqual(
+            self.updates(cycle.id), {'cycle': following.id, 'reload': True},
+        )
+
+    def test_updates_several_tasks(self):
+        """Строки заданий одного сервера обновляются отдельно
+        """
+        server = Server.objects.get(name='test1')
+        task = ServerTask.objects.create(server=server, enabled=True)
+        ServerLatest.objects.create(
+            task=task,
+            cycle_id=PollCycle.objects.last_finished_id(),
+            result=json.dumps({'elapsed': 1}),
+            executed=timezone.now(),
+            status=True,
+        )
+        previous = PollCycle.objects.last_finished_id()
+        response = self.client.get(reverse('statistic:server:list'))
+        self.assertContains(response, 'data-task="{}"'.format(task.pk))
+
+        cycle = PollCycle.objects.create()
+        ServerLatest.objects.filter(task=task).update(
+            cycle=cycle, result=json.dumps({'elapsed': 200}),
+        )
+        cycle.finish([])
+        cache.set(LATEST_CYCLE_CACHE_KEY, cycle.id, None)
+
+        self.assertDictEqual(self.updates(previous), {
+            'cycle': cycle.id,
+            'rows': [{'task': task.pk, 'cells': {'elapsed': '200'}}],
+        })
+
+@override_settings(CACHES={
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+})
+class ServerLatestApiTest(TestCase):
+    """Тестирование API последних результатов опроса
+    """
+
+    def setUp(self):
+        cache.clear()
+        miner = Miner.objects.get(slug='antminer-s9-cgminer-490')
+        server = Server.objects.create(
+            name='test',
+            host='192.168.0.1',
+            port=4028,
+            miner=miner,
+        )
+        task = ServerTask.objects.create(server=server, enabled=True)
+        self.cycle = PollCycle.objects.create()
+        ServerLatest.objects.create(
+            task=task,
+            cycle=self.cycle,
+            result='{"elapsed": 10}',
+            executed=timezone.now(),
+            status=True,
+        )
+        self.url = reverse('statistic:api:latest')
+
+    def test_latest(self):
+        """Результаты последнего завершенного опроса
+        """
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.json()['cycle'])
+        self.assertFalse(response.has_header('ETag'))
+
+        self.cycle.finish([])
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(
+            response['ETag'].startswith('"cycle-{}-'.format(self.cycle.id)),
+        )
+        self.assertTrue(response.has_header('Last-Modified'))
+
+        data = response.json()
+        self.assertEqual(data['cycle']['id'], self.cycle.id)
+        self.assertEqual(len(data['servers']), 1)
+        self.assertEqual(data['servers'][0]['server'], 'test')
+        self.assertDictEqual(data['servers'][0]['result'], {'elapsed': 10})
+
+    def test_latest_not_modified(self):
+        """Условный запрос без нового опроса не обращается
+        к таблицам результатов
+        """
+        self.cycle.finish([])
+        response = self.client.get(self.url)
+
+        with self.assertNumQueries(1):
+            response = self.client.get(
+                self.url,
+                HTTP_IF_NONE_MATCH=response['ETag'],
+            )
+        self.assertEqual(response.status_code, 304)
+
+        # Завершен новый опрос
+        PollCycle.objects.create().finish([])
+        response = self.client.get(
+            self.url,
+            HTTP_IF_NONE_MATCH=response['ETag'],
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_latest_settings_changed(self):
+        """Изменение настроек опроса без нового опроса
+        изменяет ETag, Last-Modified и ответ
+        """
+        self.cycle.finish([])
+        PollCycle.objects.filter(pk=self.cycle.pk).update(
+            finished=timezone.now() - datetime.timedelta(hours=1),
+        )
+        # Настройки не изменялись после завершения опроса
+        cache.clear()
+        response = self.client.get(self.url)
+        etag = response['ETag']
+        last_modified = response['Last-Modified']
+
+        # Задание выключено
+        ServerTask.objects.update(enabled=False)
+        invalidate_plan()
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertListEqual(response.json()['servers'], [])
+
+        response = self.client.get(
+            self.url, HTTP_IF_MODIFIED_SINCE=last_modified,
+        )
+        self.assertEqual(response.status_code, 200)
+
+
+class MetricsTest(TestCase):
+    """Тестирование извлечения числовых показателей
+    """
+
+    def test_cgminer(self):
+        """Показатели CGMiner
+        """
+        result = {
+            'Summary': {'SUMMARY': [{
+                'GHS av': 13500.5,
+                'Accepted': 100,
+                'Rejected': 2,
+                'Hardware Errors': 5,
+            }]},
+            'Stats': {'STATS': [{
+                'Type': 'Antminer S9',
+                'fan3': 5500,
+                'fan6': 5700,
+                'fan1': 0,
+                'temp6': 60,
+                'temp7': 62,
+                'temp8': 61,
+                'temp2_6': 75,
+                'temp2_7': 77,
+                'temp2_8': 76,
+            }]},
+        }
+        self.assertListEqual(
+            parse_metrics('antminer-s9-cgminer-490', result)['temperature'],
+            [75.0, 77.0, 76.0],
+        )
+        self.assertCountEqual(
+            metric_values('antminer-s9-cgminer-490', result),
+            [
+                ('hashrate', None, 13500.5),
+                ('accepted', None, 100.0),
+                ('rejected', None, 2.0),
+                ('hardware_errors', None, 5.0),
+                ('fan', None, 5700.0),
+                ('fan', 0, 5500.0),
+                ('fan', 1, 5700.0),
+                ('temperature', None, 77.0),
+                ('temperature', 0, 75.0),
+                ('temperature', 1, 77.0),
+                ('temperature', 2, 76.0),
+            ],
+        )
+
+    def test_claymore(self):
+        """Показатели Claymore's
+        """
+        result = {'Statistic': {
+            'ETH': {'Hashrate': 180500, 'Shares': 1000, 'Rejected': 3},
+            'GPU': {'Temperatures': [65, 71], 'Fan Speeds': [40, 55]},
+        }}
+        self.assertCountEqual(
+            metric_values('claymores-dual-ethereum-amd-gpu-98', result),
+            [
+                ('hashrate', None, 180.5),
+                ('accepted', None, 1000.0),
+                ('rejected', None, 3.0),
+                ('temperature', None, 71.0),
+                ('temperature', 0, 65.0),
+                ('temperature', 1, 71.0),
+                ('fan', None, 55.0),
+                ('fan', 0, 40.0),
+                ('fan', 1, 55.0),
+            ],
+        )
+
+    def test_zcash(self):
+        """Показатели EWBF's ZCash
+        """
+        result = {'Statistic': [
+            {'speed_sps': 300, 'temperature': 60, 'gpu_power_usage': 120,
+             'accepted_shares': 10, 'rejected_shares': 0},
+            {'speed_sps': 310, 'temperature': 64, 'gpu_power_usage': 125,
+             'accepted_shares': 12, 'rejected_shares': 1},
+        ]}
+        metrics = parse_metrics('ewbfs-cuda-zcash-034b', result)
+        self.assertListEqual(metrics['hashrate'], [300.0, 310.0])
+        self.assertIn(
+            ('power', None, 245.0),
+            metric_values('ewbfs-cuda-zcash-034b', result),
+        )
+
+    def test_unknown(self):
+        """Показатели неизвестного майнера и ошибки
+        """
+        self.assertListEqual(metric_values('unknown', {'a': 1}), [])
+        self.assertListEqual(
+            metric_values('antminer-s9-cgminer-490', {'error_type': 'x'}),
+            [],
+        )
+        self.assertListEqual(
+            metric_values('antminer-s9-cgminer-490', {'Summary': {}}),
+            [],
+        )
+
+
+class RollupTest(TestCase):
+    """Тестирование агрегирования и удаления устаревшей статистики
+    """
+
+    def setUp(self):
+        miner = Miner.objects.get(slug='antminer-s9-cgminer-490')
+        server = Server.objects.create(
+            name='test',
+            host='192.168.0.1',
+            port=4028,
+            miner=miner,
+        )
+        self.task = ServerTask.objects.create(server=server, enabled=True)
+        self.start = datetime.datetime(
+            2019, 4, 1, tzinfo=datetime.timezone.utc,
+        )
+
+        # Опросы каждые 30 секунд в течение 2 часов
+        for index in range(240):
+            started = self.start + datetime.timedelta(seconds=30 * index)
+            cycle = PollCycle.objects.create(
+                started=started,
+                finished=started,
+            )
+            ServerStatistic.objects.create(
+                task=self.task,
+                cycle=cycle,
+                result=json.dumps({'ghs_av': index}),
+                executed=started,
+                status=True,
+            )
+            ServerMetric.objects.create(
+                task=self.task,
+                cycle=cycle,
+                metric='hashrate',
+                value=index,
+            )
+
+    def rollups(self, resolution):
+        return ServerRollup.objects.filter(
+            task=self.task,
+            resolution=resolution,
+            metric='hashrate',
+        ).order_by('start')
+
+    def test_maintain(self):
+        """Агрегирование завершенных интервалов
+        """
+        now = self.start + datetime.timedelta(hours=2, minutes=10)
+        maintain(now, retention={'raw': None, '5m': None, '1h': None})
+
+        rollups = self.rollups(ServerRollup.RESOLUTION_5M)
+        self.assertEqual(rollups.count(), 24)
+        first = rollups.first()
+        self.assertEqual(first.start, self.start)
+        self.assertEqual(first.count, 10)
+        self.assertEqual(first.minimum, 0)
+        self.assertEqual(first.maximum, 9)
+        self.assertEqual(first.average, 4.5)
+
+        hours = self.rollups(ServerRollup.RESOLUTION_1H)
+        self.assertEqual(hours.count(), 2)
+        self.assertEqual(hours[1].start, self.start
+                         + datetime.timedelta(hours=1))
+        self.assertEqual(hours[1].count, 120)
+        self.assertEqual(hours[1].minimum, 120)
+        self.assertEqual(hours[1].maximum, 239)
+        self.assertEqual(hours[1].average, 179.5)
+
+        # Сутки не завершены
+        self.assertFalse(self.rollups(ServerRollup.RESOLUTION_1D).exists())
+
+        # Повторное агрегирование не добавляет записей, часовые
+        # интервалы не агрегированы в сутки и не удаляются
+        deleted = maintain(now, retention={'raw': None, '5m': None, '1h': 0})
+        self.assertEqual(deleted['1h'], 0)
+        self.assertEqual(self.rollups(ServerRollup.RESOLUTION_5M).count(), 24)
+        self.assertEqual(self.rollups(ServerRollup.RESOLUTION_1H).count(), 2)
+
+    def test_maintain_concurrent(self):
+        """Интервалы, добавленные другим процессом,
+        пропускаются без ошибки
+        """
+        now = self.start + datetime.timedelta(hours=2, minutes=10)
+        retention = {'raw': None, '5m': None, '1h': None}
+        maintain(now, retention=retention)
+
+        # Другой процесс начал агрегирование до сохранения интервалов
+        with mock.patch.object(rollup, 'next_start', return_value=None):
+            maintain(now, retention=retention)
+
+        self.assertEqual(self.rollups(ServerRollup.RESOLUTION_5M).count(), 24)
+        self.assertEqual(self.rollups(ServerRollup.RESOLUTION_1H).count(), 2)
+
+    def test_retention(self):
+        """Удаляются только агрегированные данные
+        старше срока хранения
+        """
+        now = self.start + datetime.timedelta(days=1, hours=1)
+        deleted = maintain(now, retention={'raw': 1, '5m': 0})
+
+        # Результаты первого часа старше суток
+        self.assertEqual(deleted['raw'], 120)
+        self.assertEqual(ServerStatistic.objects.count(), 120)
+        self.assertEqual(ServerMetric.objects.count(), 120)
+        self.assertEqual(
+            PollCycle.objects.filter(started__lt=self.start
+                                     + datetime.timedelta(hours=1)).count(),
+            0,
+        )
+
+        # Интервалы по 5 минут агрегированы
+        # в часовые и удалены
+        self.assertFalse(self.rollups(ServerRollup.RESOLUTION_5M).exists())
+        self.assertEqual(self.rollups(ServerRollup.RESOLUTION_1H).count(), 2)
+
+        # Часовые интервалы агрегированы в сутки и удалены
+        deleted = maintain(now, retention={'1h': 0})
+        self.assertEqual(deleted['1h'], 2)
+        days = self.rollups(ServerRollup.RESOLUTION_1D)
+        self.assertEqual(days.count(), 1)
+        self.assertEqual(days[0].count, 240)
+        self.assertEqual(days[0].average, 119.5)
+
+
+class HistoryTest(TestCase):
+    """Тестирование истории показателей сервера
+    """
+
+    def setUp(self):
+        miner = Miner.objects.get(slug='antminer-s9-cgminer-490')
+        self.server = Server.objects.create(
+            name='test',
+            host='192.168.0.1',
+            port=4028,
+            miner=miner,
+        )
+        self.task = ServerTask.objects.create(
+            server=self.server, enabled=True,
+        )
+        self.now = timezone.now()
+
+        # Опросы каждые 30 секунд в течение последних 2 часов
+        for index in range(240):
+            started = self.now - datetime.timedelta(
+                seconds=30 * (239 - index),
+            )
+            cycle = PollCycle.objects.create(
+                started=started,
+                finished=started,
+            )
+            self.statistic = ServerStatistic.objects.create(
+                task=self.task,
+                cycle=cycle,
+                result=json.dumps({'ghs_av': index}),
+                executed=started,
+                status=True,
+            )
+            ServerMetric.objects.create(
+                task=self.task,
+                cycle=cycle,
+                metric='hashrate',
+                value=index,
+            )
+
+        # Суточные показатели за последний год
+        for index in range(365):
+            ServerRollup.objects.create(
+                task=self.task,
+                resolution=ServerRollup.RESOLUTION_1D,
+                start=self.now - datetime.timedelta(days=index + 1),
+                metric='hashrate',
+                count=2,
+                minimum=0,
+                maximum=index,
+                total=index,
+            )
+
+    def history(self, **params):
+        response = self.client.get(
+            reverse('statistic:api:history', args=[self.server.slug]),
+            params,
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_lttb(self):
+        """Прореживание сохраняет границы ряда и выбросы
+        """
+        data = [(x, 10 if x == 500 else 0) for x in range(1000)]
+        sampled = lttb(data, 100)
+        self.assertEqual(len(sampled), 100)
+        self.assertEqual(sampled[0], data[0])
+        self.assertEqual(sampled[-1], data[-1])
+        self.assertIn((500, 10), sampled)
+        self.assertListEqual(lttb(data[:10], 100), data[:10])
+
+    def test_history_raw(self):
+        """За период хранения используются результаты опроса
+        """
+        history = self.history(
+            start=(self.now - datetime.timedelta(hours=3)).isoformat(),
+            end=(self.now + datetime.timedelta(seconds=1)).isoformat(),
+            points=50,
+        )
+        self.assertIsNone(history['resolution'])
+        self.assertEqual(history['server'], 'test')
+        hashrate = history['series']['hashrate']
+        self.assertEqual(len(hashrate), 50)
+        # Значения упорядочены по времени
+        self.assertEqual(hashrate[0][1], 0)
+        self.assertEqual(hashrate[-1][1], 239)
+        self.assertListEqual(history['series']['fan'], [])
+
+    def test_history_rollup(self):
+        """За период дольше срока хранения результатов опроса
+        и часовых показателей используются суточные показатели
+        """
+        history = self.history(
+            start=(self.now - datetime.timedelta(days=400)).isoformat(),
+            end=self.now.isoformat(),
+            metric='hashrate',
+        )
+        self.assertEqual(history['resolution'], ServerRollup.RESOLUTION_1D)
+        self.assertListEqual(list(history['series']), ['hashrate'])
+        hashrate = history['series']['hashrate']
+        self.assertEqual(len(hashrate), 365)
+        self.assertEqual(hashrate[0][1], 182)
+        self.assertEqual(hashrate[-1][1], 0)
+
+    def test_history_several_tasks(self):
+        """Значения заданий сервера объединяются
+        в один ряд для каждого опроса и интервала
+        """
+        task = ServerTask.objects.create(server=self.server, enabled=True)
+        for cycle_id in PollCycle.objects.values_list('id', flat=True):
+            ServerMetric.objects.create(
+                task=task, cycle_id=cycle_id, metric='hashrate', value=1000,
+            )
+            for value, item in ((60, self.task), (80, task)):
+                ServerMetric.objects.create(
+                    task=item, cycle_id=cycle_id,
+                    metric='temperature', value=value,
+                )
+        for rollup in self.task.rollups.all():
+            ServerRollup.objects.create(
+                task=task,
+                resolution=rollup.resolution,
+                start=rollup.start,
+                metric='hashrate',
+                count=1,
+                minimum=1000,
+                maximum=1000,
+                total=1000,
+            )
+
+        history = self.history(
+            start=(self.now - datetime.timedelta(hours=3)).isoformat(),
+            end=(self.now + datetime.timedelta(seconds=1)).isoformat(),
+            metric=['hashrate', 'temperature'],
+            points=500,
+        )
+        hashrate = history['series']['hashrate']
+        self.assertEqual(len(hashrate), 240)
+        self.assertEqual(hashrate[0][1], 1000)
+        self.assertEqual(hashrate[-1][1], 1239)
+        # Температура - наибольшая из значений заданий
+        self.assertListEqual(
+            [value for _, value in history['series']['temperature']],
+            [80] * 240,
+        )
+
+        history = self.history(
+            start=(self.now - datetime.timedelta(days=400)).isoformat(),
+            end=self.now.isoformat(),
+            metric='hashrate',
+        )
+        hashrate = history['series']['hashrate']
+        self.assertEqual(len(hashrate), 365)
+        self.assertEqual(hashrate[0][1], 1182)
+        self.assertEqual(hashrate[-1][1], 1000)
+
+    def test_history_invalid(self):
+        """Неверные параметры запроса
+        """
+        url = reverse('statistic:api:history', args=[self.server.slug])
+        for params in ({'start': 'yesterday'},
+                       {'metric': 'unknown'},
+                       {'points': 'all'},
+                       {'start': self.now.isoformat(),
+                        'end': self.now.isoformat()}):
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 400)
+
+    def test_pages(self):
+        """Страницы результата опроса и истории сервера
+        """
+        response = self.client.get(self.statistic.get_absolute_url())
+        self.assertContains(response, 'ghs_av')
+        self.assertContains(
+            response,
+            reverse('statistic:server:history', args=[self.server.slug]),
+        )
+
+        response = self.client.get(
+            reverse('statistic:server:history', args=[self.server.slug]),
+        )
+        self.assertContains(
+            response,
+            reverse('statistic:api:history', args=[self.server.slug]),
+        )
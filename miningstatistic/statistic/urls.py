@@ -7,8 +7,19 @@ app_name = 'statistic'
 
 server = [
     path('', views.ServerStatisticList.as_view(), name='list'),
+    path('updates/', views.ServerStatisticUpdates.as_view(), name='updates'),
+    path('<int:pk>/', views.ServerStatisticDetail.as_view(), name='detail'),
+    path('<slug:slug>/history/',
+         views.ServerHistory.as_view(), name='history'),
+]
+
+api = [
+    path('server/latest/', views.ServerLatestApi.as_view(), name='latest'),
+    path('server/<slug:slug>/history/',
+         views.ServerHistoryApi.as_view(), name='history'),
 ]
 
 urlpatterns = [
-    path('server/', include((server, 'server')))
+    path('server/', include((server, 'server'))),
+    path('api/statistic/', include((api, 'api'))),
 ]
@@ -1,16 +1,36 @@
+import datetime
 import json
 
-from django.utils import timezone
-from django.views.generic.base import TemplateView
+from itertools import groupby
+
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import (
+    HttpResponse,
+    HttpResponseBadRequest,
+    JsonResponse,
+)
+from django.shortcuts import get_object_or_404
+from django.utils import timezone, translation
+from django.utils.dateparse import parse_datetime
+from django.utils.decorators import method_decorator
+from django.utils.html import conditional_escape
+from django.views.decorators.http import condition
+from django.views.generic import DetailView
+from django.views.generic.base import TemplateView, View
 
 from django.utils.translation import gettext_lazy as _
 
 from django_tables2 import MultiTableMixin, Column
 
+from miner.models import Server
 from task.models import Config
-from miner.models import Miner
+from task.plan import get_plan_changed, get_plan_version
 
-from .models import ServerStatistic
+from .history import MAX_POINTS, POINTS, SERIES, get_history
+from .ingest import LATEST_CYCLE_CACHE_KEY
+from .metrics import METRICS
+from .models import PollCycle, ServerLatest, ServerStatistic
 from .tables import (
     ServerStatisticErrorTable,
     ServerStatisticTable
@@ -18,67 +38,401 @@ from .tables import (
 
 # Create your views here.
 
+# Ключ кэша данных таблиц, данные изменяются
+# только при добавлении результатов нового опроса
+TABLES_CACHE_KEY = 'statistic:tables:{cycle}'
+# Ключ кэша изменений строк таблиц между опросами
+CHANGES_CACHE_KEY = 'statistic:changes:{previous}:{cycle}:{language}'
+CACHE_TIMEOUT = 600
+# Время хранения в кэше идентификатора опроса, определенного
+# по БД: при добавлении результатов опроса он заменяется новым
+LATEST_CYCLE_TIMEOUT = 5
+# Поля строк таблиц, не являющиеся столбцами результата
+ROW_KEYS = ('server', 'task')
+
+
+def read_tables_data():
+    """Возвращает данные для таблиц в формате
+    [(статус, майнер, [данные строки таблицы, ]), ]
+    """
+    def get_data_list(data):
+        """Возвращает список с данными
+        для наполнения таблицы
+        """
+        data_list = []
+        for item in data:
+            result = json.loads(item.result)
+            result['server'] = item.task.server.slug
+            # У сервера может быть несколько заданий,
+            # строки таблиц различаются по заданию
+            result['task'] = item.pk
+            data_list.append(result)
+        return data_list
+
+    tables_data = []
+
+    # Результаты последнего опроса всех серверов
+    # одним запросом, сгруппированные по майнерам
+    latest = ServerLatest.objects.enabled()
+
+    for miner, data in groupby(
+            latest, key=lambda item: item.task.server.miner):
+        data = list(data)
+        # Сначала ошибки, затем статистика
+        for status in (False, True):
+            rows = [item for item in data if item.status == status]
+            if rows:
+                tables_data.append(
+                    (status, miner, get_data_list(rows)),
+                )
+    return tables_data
+
+
+def get_tables_data(cycle_id):
+    """Данные таблиц для опроса cycle_id берутся из кэша
+    и формируются заново после добавления результатов
+    следующего опроса
+    """
+    key = TABLES_CACHE_KEY.format(cycle=cycle_id)
+    tables_data = cache.get(key)
+    if tables_data is None:
+        tables_data = read_tables_data()
+        cache.set(key, tables_data, CACHE_TIMEOUT)
+    return tables_data
+
+
+def build_table(status, miner, data):
+    """Создает таблицу для данных майнера"""
+    if not status:
+        # Сооздаем таблицу с ошибками
+        return ServerStatisticErrorTable(
+            data,
+            verbose_name_prefix=_('Errors for'),
+            miner=miner,
+        )
+    # Создаем таблицу со статистикой
+    return ServerStatisticTable(
+        data,
+        extra_columns=[(name, Column())
+                       for name in data[0].keys()
+                       if name not in ROW_KEYS],
+        verbose_name_prefix=_('Statistic for'),
+        miner=miner,
+    )
+
+
+def get_latest_cycle_id():
+    """Идентификатор последнего завершенного опроса. Сохраняется
+    в кэше при добавлении результатов опроса, при отсутствии
+    в кэше определяется по БД
+    """
+    cycle_id = cache.get(LATEST_CYCLE_CACHE_KEY)
+    if cycle_id is None:
+        cycle_id = PollCycle.objects.last_finished_id()
+        if cycle_id is not None:
+            cache.set(LATEST_CYCLE_CACHE_KEY, cycle_id, LATEST_CYCLE_TIMEOUT)
+    return cycle_id
+
+
+def read_changes(previous, cycle_id):
+    """Возвращает изменившиеся ячейки таблиц опроса cycle_id
+    по сравнению с опросом previous
+
+    return:
+    список [{'task': id задания, 'cells': {столбец: html, }}, ],
+    None - данные опроса previous отсутствуют в кэше или изменился
+    состав таблиц, строк или столбцов и страницу нужно обновить
+    """
+    def layout(tables_data):
+        """Состав таблиц, строк и столбцов"""
+        return [
+            (status, miner.pk, [(row['task'], tuple(row)) for row in data])
+            for status, miner, data in tables_data
+        ]
+
+    old_data = cache.get(TABLES_CACHE_KEY.format(cycle=previous))
+    if old_data is None:
+        return None
+    new_data = get_tables_data(cycle_id)
+    if layout(old_data) != layout(new_data):
+        return None
+
+    changes = []
+    for (_status, _miner, old), (status, miner, new) in zip(
+            old_data, new_data):
+        changed = {
+            new_row['task']: [
+                name for name, value in new_row.items()
+                if name not in ROW_KEYS and old_row[name] != value
+            ]
+            for old_row, new_row in zip(old, new)
+        }
+        if not any(changed.values()):
+            continue
+        # Ячейки отображаются так же, как при формировании страницы
+        for row in build_table(status, miner, new).rows:
+            names = changed[row.record['task']]
+            if names:
+                changes.append({
+                    'task': row.record['task'],
+                    'cells': {
+                        name: str(conditional_escape(row.get_cell(name)))
+                        for name in names
+                    },
+                })
+    return changes
+
+
+def get_changes(previous, cycle_id):
+    """Изменения таблиц между опросами (read_changes) вычисляются
+    один раз для всех открытых страниц и сохраняются в кэше
+    """
+    key = CHANGES_CACHE_KEY.format(
+        previous=previous,
+        cycle=cycle_id,
+        language=translation.get_language(),
+    )
+    changes = cache.get(key)
+    if changes is None:
+        # Сохраняем в словаре, чтобы отличать
+        # от отсутствия значения в кэше
+        changes = {'rows': read_changes(previous, cycle_id)}
+        cache.set(key, changes, CACHE_TIMEOUT)
+    return changes['rows']
+
+
 class ServerStatisticList(MultiTableMixin, TemplateView):
     template_name = 'statistic/serverstatistic_list.html'
     model = ServerStatistic
 
     def get_tables(self):
-        def get_data_list(data):
-            """Возвращает список с данными
-            для наполнения таблицы
-            """
-            data_list = []
-            for server, result in data.values_list(
-                    'task__server__slug',
-                    'result',
-            ):
-                result = json.loads(result)
-                result['server'] = server
-                data_list.append(result)
-            return data_list
-
-        # Список таблиц для представления
-        tables = []
-
-        # Результаты последнего опроса
-        last_data = self.model.objects.results_last()
-
-        for miner in Miner.objects.all():
-            # Сооздаем таблицу с ошибками
-            data = last_data.filter(
-                status=False,
-                task__server__miner=miner,
-            )
-            if data:
-                table = ServerStatisticErrorTable(
-                    get_data_list(data),
-                    verbose_name_prefix=_('Errors for'),
-                    miner=miner,
-                )
-                tables.append(table)
-
-            # Создаем таблицу со статистикой
-            data = last_data.filter(
-                status=True,
-                task__server__miner=miner,
-            )
-            if data:
-                data = get_data_list(data)
-                table = ServerStatisticTable(
-                    data,
-                    extra_columns=[(name, Column())
-                                   for name in data[0].keys()
-                                   if name != 'server'],
-                    verbose_name_prefix=_('Statistic for'),
-                    miner=miner,
-                )
-                tables.append(table)
-
-        return tables
+        self.cycle_id = PollCycle.objects.last_finished_id()
+        return [
+            build_table(status, miner, data)
+            for status, miner, data in get_tables_data(self.cycle_id)
+        ]
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['now'] = timezone.now()
         context['update_interval'] = Config.objects.get(enabled=True).refresh
         context['model'] = self.model
+        context['cycle'] = self.cycle_id
+        context['poll_interval'] = ServerStatisticUpdates.interval
+        return context
+
+
+class ServerStatisticUpdates(View):
+    """Изменения таблиц статистики для обновления страницы без
+    перезагрузки. Страница периодически запрашивает изменения
+    относительно отображаемого опроса (параметр cycle), ответ
+    формируется сразу и не удерживает процесс веб-сервера.
+    Новый опрос определяется по кэшу: пока результаты не
+    изменились, возвращается 204 без обращения к БД. Иначе
+    возвращаются изменившиеся ячейки таблиц или, если изменился
+    состав таблиц, признак перезагрузки страницы
+    """
+
+    # Интервал запросов страницы (секунд)
+    interval = 5
+
+    def get(self, request, *args, **kwargs):
+        try:
+            cycle_id = int(request.GET.get('cycle'))
+        except (TypeError, ValueError):
+            cycle_id = None
+
+        latest = get_latest_cycle_id()
+        if latest is None or latest == cycle_id:
+            response = HttpResponse(status=204)
+        else:
+            rows = None
+            if cycle_id is not None:
+                rows = get_changes(cycle_id, latest)
+            if rows is None:
+                data = {'cycle': latest, 'reload': True}
+            else:
+                data = {'cycle': latest, 'rows': rows}
+            response = JsonResponse(data)
+        response['Cache-Control'] = 'no-cache'
+        return response
+
+
+def get_latest_cycle(request):
+    """Возвращает (id, время завершения) последнего завершенного
+    опроса, результат сохраняется в запросе, чтобы ETag
+    и Last-Modified определялись одним запросом к БД
+    """
+    if not hasattr(request, 'statistic_latest_cycle'):
+        request.statistic_latest_cycle = PollCycle.objects.finished(
+        ).order_by('-id').values_list('id', 'finished').first()
+    return request.statistic_latest_cycle
+
+
+def latest_etag(request, *args, **kwargs):
+    """ETag ответа по идентификатору последнего опроса и версии
+    настроек опроса: состав и имена серверов в ответе изменяются
+    и без нового опроса
+    """
+    cycle = get_latest_cycle(request)
+    if not cycle:
+        return None
+    return 'cycle-{id}-{version}'.format(
+        id=cycle[0],
+        version=get_plan_version(),
+    )
+
+
+def latest_last_modified(request, *args, **kwargs):
+    """Last-Modified ответа по времени завершения последнего
+    опроса или последнего изменения настроек опроса
+    """
+    cycle = get_latest_cycle(request)
+    if not cycle:
+        return None
+    changed = get_plan_changed()
+    return max(cycle[1], changed) if changed else cycle[1]
+
+
+class ServerLatestApi(View):
+    """Результаты последнего опроса серверов в формате json.
+    Ответ изменяется только при завершении нового опроса или
+    изменении настроек опроса, поэтому ETag и Last-Modified
+    определяются по опросу и версии настроек: на условный запрос
+    с прежними значениями возвращается 304 без обращения к таблицам
+    результатов
+    """
+
+    # Ключ кэша ответа для опроса и версии настроек
+    cache_key = 'statistic:api:latest:{cycle}:{version}'
+    cache_timeout = 600
+
+    @method_decorator(condition(
+        etag_func=latest_etag,
+        last_modified_func=latest_last_modified,
+    ))
+    def get(self, request, *args, **kwargs):
+        cycle = get_latest_cycle(request)
+        key = self.cache_key.format(
+            cycle=cycle[0] if cycle else None,
+            version=get_plan_version(),
+        )
+        content = cache.get(key)
+        if content is None:
+            content = json.dumps(
+                self.get_data(cycle[0] if cycle else None),
+                separators=(',', ':'),
+                cls=DjangoJSONEncoder,
+            )
+            cache.set(key, content, self.cache_timeout)
+        return HttpResponse(content, content_type='application/json')
+
+    def get_data(self, cycle_id):
+        """Данные ответа: опрос и последние результаты серверов
+        """
+        cycle = PollCycle.objects.filter(id=cycle_id).values(
+            'id', 'started', 'finished', 'duration',
+            'servers', 'succeeded', 'failed',
+        ).first()
+        if cycle and cycle['duration'] is not None:
+            cycle['duration'] = cycle['duration'].total_seconds()
+
+        return {
+            'cycle': cycle,
+            'servers': [
+                {
+                    'server': item.task.server.slug,
+                    'miner': item.task.server.miner.slug,
+                    'cycle': item.cycle_id,
+                    'executed': item.executed,
+                    'status': item.status,
+                    'result': json.loads(item.result),
+                }
+                for item in ServerLatest.objects.enabled()
+            ],
+        }
+
+
+class ServerStatisticDetail(DetailView):
+    model = ServerStatistic
+
+    def get_queryset(self):
+        return super().get_queryset().select_related(
+            'task__server__miner', 'cycle',
+        )
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['result'] = json.dumps(
+            json.loads(self.object.result),
+            indent=4,
+            ensure_ascii=False,
+        )
         return context
+
+
+class ServerHistory(DetailView):
+    """Страница графиков истории показателей сервера"""
+    model = Server
+    template_name = 'statistic/server_history.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['metrics'] = SERIES
+        context['points'] = POINTS
+        return context
+
+
+class ServerHistoryApi(View):
+    """Прореженные ряды значений показателей сервера за период
+    в формате json
+
+    Параметры запроса:
+    start, end: период в формате ISO 8601, по умолчанию
+        последние сутки
+    metric: показатель, может передаваться несколько раз,
+        по умолчанию hashrate, temperature и fan
+    points: количество точек каждого ряда
+    """
+
+    def get(self, request, *args, **kwargs):
+        server = get_object_or_404(Server, slug=kwargs['slug'])
+
+        try:
+            end = self.get_time(request.GET.get('end')) or timezone.now()
+            start = self.get_time(request.GET.get('start')) or (
+                end - datetime.timedelta(days=1)
+            )
+            points = int(request.GET.get('points', POINTS))
+        except ValueError:
+            return HttpResponseBadRequest()
+
+        metrics = request.GET.getlist('metric') or SERIES
+        if start >= end or any(metric not in METRICS for metric in metrics):
+            return HttpResponseBadRequest()
+
+        history = get_history(
+            server, start, end,
+            metrics=metrics,
+            points=max(3, min(points, MAX_POINTS)),
+        )
+        return JsonResponse(dict(
+            history,
+            server=server.slug,
+            start=start,
+            end=end,
+        ))
+
+    @staticmethod
+    def get_time(value):
+        """Время из параметра запроса, время без
+        часового пояса считается локальным
+        """
+        if not value:
+            return None
+        time = parse_datetime(value)
+        if time is None:
+            raise ValueError(value)
+        if timezone.is_naive(time):
+            time = timezone.make_aware(time)
+        return time
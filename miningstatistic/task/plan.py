@@ -0,0 +1,225 @@
+"""План опроса майнеров.
+
+План содержит все данные, необходимые для цикла опроса: общие
+настройки, параметры опроса майнеров для pyminers.Sender, имена
+серверов и запросов. План формируется одним запросом к БД и хранится
+в общем кэше Django, поэтому доступен и процессу опроса (dj-miners),
+и веб-приложению.
+
+Ключ плана в кэше содержит версию настроек. При изменении настроек
+обработчики сигналов (task.signals) меняют версию, и следующий
+запрос формирует план заново, а план, сформированный по устаревшим
+данным, сохраняется под старым ключом и не используется. Изменения
+через QuerySet.update() и bulk_create() не вызывают сигналов, после
+них следует вызвать invalidate_plan(), иначе план обновится по
+истечении PLAN_CACHE_TIMEOUT.
+"""
+
+import json
+import uuid
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from task.models import Config, ServerTask
+
+# Ключ кэша с версией настроек опроса
+PLAN_VERSION_KEY = 'task:plan:version'
+# Ключ кэша со временем последнего изменения настроек опроса
+PLAN_CHANGED_KEY = 'task:plan:changed'
+# Ключ кэша с планом опроса конфигурации
+PLAN_CACHE_KEY = 'task:plan:{version}:{config}'
+# Время хранения плана в кэше (секунд)
+PLAN_CACHE_TIMEOUT = 600
+
+# Соответствие между майнерами из БД
+# django и классами майнеров pyminers
+MINER_CLASSES = {
+    "antminer-s9-cgminer-490": "CGMiner",
+    "claymores-cryptonote-gpu-97": "Monero",
+    "claymores-dual-ethereum-amd-gpu-98": "Etherium",
+    "ewbfs-cuda-zcash-034b": "ZCash",
+}
+
+# Команды CGMiner, поддерживаемые pyminers
+# в составном запросе
+CGMINER_COMMANDS = ('summary', 'stats')
+
+
+def request_key(request):
+    """Возвращает ключ запроса, не зависящий от порядка
+    полей и форматирования, для сопоставления запросов
+    из ответа майнера с запросами из БД
+
+    Аргументы:
+    request: запрос в виде строки json или разобранный запрос
+    """
+    if isinstance(request, str):
+        try:
+            request = json.loads(request)
+        except ValueError:
+            return request
+    return json.dumps(request, sort_keys=True)
+
+
+def cgminer_command(request):
+    """Возвращает команду запроса к CGMiner вида {"command": "name"},
+    если pyminers.CGMiner принимает ее в составном запросе
+    """
+    try:
+        request = json.loads(request)
+    except ValueError:
+        return None
+    if isinstance(request, dict) and list(request) == ['command'] \
+            and request['command'] in CGMINER_COMMANDS:
+        return request['command']
+    return None
+
+
+def join_cgminer_requests(requests):
+    """Объединяет запросы к CGMiner вида {"command": "name"}
+    в один составной запрос {"command": "name1+name2"}.
+    Объединяются только команды, которые pyminers.CGMiner
+    принимает в составном запросе, без повторов, остальные
+    запросы отправляются отдельно
+    """
+    commands = [cgminer_command(request) for request in requests]
+    joined = list(dict.fromkeys(
+        command for command in commands if command is not None))
+    if len(joined) < 2:
+        return requests
+
+    # Составной запрос занимает место первой объединяемой команды
+    result = []
+    composite = json.dumps({'command': '+'.join(joined)})
+    for request, command in zip(requests, commands):
+        if command is None:
+            result.append(request)
+        elif composite not in result:
+            result.append(composite)
+    return result
+
+
+def build_plan(config_name):
+    """Формирует план опроса для конфигурации config_name
+
+    return:
+    план опроса в формате dict:
+        {'version': str,
+         'config': {поле: значение, },
+         'tasks': {task.id: параметры опроса для Sender, },
+         'servers': {task.id: server.name, },
+         'miners': {task.id: miner.slug, },
+         'requests': {task.id: [(request.name, request.request), ], },
+         'names': {task.id: {request_key(request): request.name, }, }}
+    """
+    # Получаем общие настройки, как словарь
+    config = Config.objects.filter(
+        name=config_name,
+        enabled=True,
+    ).values().first()
+    if not config:
+        # Конфигурация должна существовать
+        # и быть включена
+        raise ValueError(
+            "Config \"{config}\" does not"
+            " exists or disabled".format(
+                config=config_name,
+            )
+        )
+
+    # Задания с серверами, майнерами и запросами
+    server_tasks = ServerTask.objects.filter(
+        enabled=True,
+    ).select_related(
+        'server__miner',
+    ).prefetch_related(
+        'requests',
+    )
+
+    plan = {
+        'version': uuid.uuid4().hex,
+        'config': config,
+        'tasks': {},
+        'servers': {},
+        'miners': {},
+        'requests': {},
+        'names': {},
+    }
+
+    # Формируем список заданий для Sender
+    for task in server_tasks:
+        task_miner = MINER_CLASSES.get(task.server.miner.slug, 'Miner')
+        requests = [
+            (request.name, request.request)
+            for request in task.requests.all()
+        ]
+        bodies = [body for _, body in requests]
+        if task_miner == 'CGMiner':
+            # Запросы к CGMiner отправляются одним
+            # составным запросом за одно подключение
+            bodies = join_cgminer_requests(bodies)
+        plan['tasks'][task.id] = {
+            'Host': task.server.host,
+            'Port': task.server.port,
+            'Miner': task_miner,
+            'Timeout': task.timeout,
+            'Request': bodies,
+        }
+        plan['servers'][task.id] = task.server.name
+        plan['miners'][task.id] = task.server.miner.slug
+        plan['requests'][task.id] = requests
+        plan['names'][task.id] = {
+            request_key(body): name for name, body in requests
+        }
+
+    if not plan['tasks']:
+        raise ValueError(
+            "Tasks do not exists, check"
+            " miners request settings"
+        )
+
+    return plan
+
+
+def get_plan_version():
+    """Возвращает текущую версию настроек опроса"""
+    version = cache.get(PLAN_VERSION_KEY)
+    if version is None:
+        # Версия могла быть добавлена другим процессом
+        cache.add(PLAN_VERSION_KEY, uuid.uuid4().hex, None)
+        version = cache.get(PLAN_VERSION_KEY)
+    return version
+
+
+def get_plan(config_name):
+    """Возвращает план опроса из кэша,
+    при отсутствии формирует и сохраняет его
+    """
+    # Версия читается до обращения к БД, поэтому план,
+    # сформированный во время изменения настроек,
+    # сохраняется под уже устаревшим ключом
+    key = PLAN_CACHE_KEY.format(
+        version=get_plan_version(),
+        config=config_name,
+    )
+    plan = cache.get(key)
+    if plan is None:
+        plan = build_plan(config_name)
+        cache.add(key, plan, PLAN_CACHE_TIMEOUT)
+    return plan
+
+
+def get_plan_changed():
+    """Возвращает время последнего изменения настроек опроса,
+    None - настройки не изменялись с момента очистки кэша
+    """
+    return cache.get(PLAN_CHANGED_KEY)
+
+
+def invalidate_plan():
+    """Меняет версию настроек опроса, планы
+    прежней версии больше не используются
+    """
+    cache.set(PLAN_CHANGED_KEY, timezone.now(), None)
+    cache.set(PLAN_VERSION_KEY, uuid.uuid4().hex, None)
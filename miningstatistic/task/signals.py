@@ -0,0 +1,28 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+
+from miner.models import Miner, Request, Server
+from task.models import Config, ServerTask
+from task.plan import invalidate_plan
+
+
+@receiver(post_save, sender=Config)
+@receiver(post_delete, sender=Config)
+@receiver(post_save, sender=ServerTask)
+@receiver(post_delete, sender=ServerTask)
+@receiver(post_save, sender=Server)
+@receiver(post_delete, sender=Server)
+@receiver(post_save, sender=Miner)
+@receiver(post_delete, sender=Miner)
+@receiver(post_save, sender=Request)
+@receiver(post_delete, sender=Request)
+@receiver(m2m_changed, sender=ServerTask.requests.through)
+def plan_invalidate(sender, **kwargs):
+    """Меняет версию плана опроса при изменении
+    настроек опроса майнеров
+    """
+    invalidate_plan()
+    # План, сформированный другим процессом до фиксации
+    # транзакции, содержит прежние настройки
+    transaction.on_commit(invalidate_plan)
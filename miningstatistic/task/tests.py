@@ -1,3 +1,150 @@
-from django.test import TestCase
+from unittest import mock
+
+from django.test import TestCase, override_settings
+
+from miner.models import Miner, Request, Server
+from task.models import Config, ServerTask
+from task import plan as poll_plan
+from task.plan import get_plan, invalidate_plan, request_key
 
 # Create your tests here.
+
+@override_settings(CACHES={
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+})
+class PollPlanTest(TestCase):
+    """Тестирование плана опроса майнеров
+    """
+
+    def setUp(self):
+        invalidate_plan()
+
+        # Данные, добавленные миграциями, не используются
+        ServerTask.objects.all().delete()
+        Config.objects.update(enabled=False)
+        Config.objects.create(name='Test', enabled=True)
+
+        miner = Miner.objects.get(slug='antminer-s9-cgminer-490')
+        requests = miner.requests.filter(name__in=['Stats', 'Summary'])
+        for index in range(3):
+            server = Server.objects.create(
+                name='test{}'.format(index),
+                host='192.168.0.{}'.format(index + 1),
+                port=4028,
+                miner=miner,
+            )
+            self.task = ServerTask.objects.create(server=server, enabled=True)
+            self.task.requests.set(requests)
+
+    def tearDown(self):
+        invalidate_plan()
+
+    def test_plan(self):
+        """План содержит параметры опроса и имена серверов
+        """
+        plan = get_plan('Test')
+
+        self.assertEqual(len(plan['tasks']), 3)
+        self.assertEqual(plan['servers'][self.task.id], 'test2')
+        self.assertDictEqual(
+            plan['tasks'][self.task.id],
+            {
+                'Host': '192.168.0.3',
+                'Port': 4028,
+                'Miner': 'CGMiner',
+                'Timeout': 5,
+                # Запросы к CGMiner объединяются в один
+                'Request': ['{"command": "stats+summary"}'],
+            },
+        )
+
+    def test_plan_cgminer_requests(self):
+        """В составной запрос объединяются только поддерживаемые
+        команды CGMiner без повторов, остальные запросы
+        отправляются отдельно
+        """
+        miner = Miner.objects.get(slug='antminer-s9-cgminer-490')
+        self.task.requests.add(
+            Request.objects.create(
+                name='Pools', request='{"command": "pools"}', miner=miner,
+            ),
+            Request.objects.create(
+                name='Summary 2', request='{"command": "summary"}',
+                miner=miner,
+            ),
+        )
+
+        plan = get_plan('Test')
+        self.assertListEqual(
+            plan['tasks'][self.task.id]['Request'],
+            ['{"command": "pools"}', '{"command": "stats+summary"}'],
+        )
+        # Имена запросов сохраняются для разбора ответов
+        self.assertEqual(
+            plan['names'][self.task.id][request_key('{"command": "pools"}')],
+            'Pools',
+        )
+
+    def test_plan_queries(self):
+        """План формируется без запросов к БД для каждого задания
+        и берется из кэша без обращения к БД
+        """
+        with self.assertNumQueries(3):
+            get_plan('Test')
+        with self.assertNumQueries(0):
+            get_plan('Test')
+
+    def test_plan_invalidate(self):
+        """План формируется заново при изменении настроек
+        """
+        version = get_plan('Test')['version']
+        self.assertEqual(get_plan('Test')['version'], version)
+
+        server = Server.objects.get(name='test0')
+        server.port = 4029
+        server.save()
+        self.assertNotEqual(get_plan('Test')['version'], version)
+
+        version = get_plan('Test')['version']
+        self.task.requests.clear()
+        plan = get_plan('Test')
+        self.assertNotEqual(plan['version'], version)
+        self.assertListEqual(plan['tasks'][self.task.id]['Request'], [])
+
+    def test_plan_invalidate_during_build(self):
+        """План, сформированный во время изменения
+        настроек, не используется после изменения
+        """
+        build_plan = poll_plan.build_plan
+
+        def build_and_change(config_name):
+            plan = build_plan(config_name)
+            # Настройки изменены другим процессом
+            # после чтения из БД
+            invalidate_plan()
+            return plan
+
+        with mock.patch.object(poll_plan, 'build_plan', build_and_change):
+            version = get_plan('Test')['version']
+        self.assertNotEqual(get_plan('Test')['version'], version)
+
+    def test_plan_bulk_update(self):
+        """Изменения без сигналов применяются после invalidate_plan
+        """
+        get_plan('Test')
+        ServerTask.objects.filter(pk=self.task.pk).update(timeout=7)
+        invalidate_plan()
+        plan = get_plan('Test')
+        self.assertEqual(plan['tasks'][self.task.id]['Timeout'], 7)
+
+    def test_plan_config_invalid(self):
+        """Конфигурация отсутствует или выключена
+        """
+        with self.assertRaises(ValueError):
+            get_plan('Unknown')
+
+        Config.objects.filter(name='Test').update(enabled=False)
+        with self.assertRaises(ValueError):
+            get_plan('Test')
@@ -0,0 +1,254 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Нагрузочный тест опроса майнеров.
+
+Опрашивает имитаторы майнеров (pyminers.simulator), запущенные
+в отдельном процессе, классом Sender или AsyncSender и измеряет:
+    - количество циклов опроса в секунду
+    - время выполнения запросов (p50, p95, p99)
+    - пиковый объем резидентной памяти процесса
+    - пиковое количество нитей
+
+Каждое количество майнеров измеряется в отдельном процессе, поэтому
+пиковый объем памяти не включает предыдущие измерения.
+
+Результаты выводятся в stdout и сохраняются в формате json,
+для сравнения с предыдущими результатами используется --baseline.
+
+Пример запуска из каталога pyminers:
+    python benchmarks/polling.py --sizes 100 1000 --output result.json
+"""
+
+import argparse
+import datetime
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import threading
+import time
+
+sys.path.insert(
+    0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+)
+
+import pyminers  # noqa: E402
+
+from pyminers import Sender, AsyncSender, WorkerPool  # noqa: E402
+
+
+def percentile(values, percent):
+    """Возвращает процентиль по методу ближайшего ранга"""
+    if not values:
+        return None
+    values = sorted(values)
+    rank = max(int(-(-percent * len(values) // 100)), 1)
+    return values[rank - 1]
+
+
+class Sampler():
+    """Периодически измеряет количество нитей процесса"""
+
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self.peak = threading.active_count()
+        self.__stop = threading.Event()
+        self.__thread = threading.Thread(target=self.__run)
+        self.__thread.daemon = True
+
+    def __enter__(self):
+        self.__thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self.__stop.set()
+        self.__thread.join()
+
+    def __run(self):
+        while not self.__stop.wait(self.interval):
+            # Нить измерения не учитывается
+            self.peak = max(self.peak, threading.active_count() - 1)
+
+
+def peakRss():
+    """Пиковый объем резидентной памяти процесса (КиБ)"""
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS возвращает значение в байтах
+    return usage // 1024 if sys.platform == 'darwin' else usage
+
+
+def startFarm(args, size):
+    """Запускает имитаторы в отдельном процессе
+
+    return:
+    (процесс, параметры опроса для Sender)
+    """
+    command = [
+        sys.executable, '-m', 'pyminers.simulator',
+        '--' + args.miner.lower(), str(size),
+        '--latency', str(args.latency),
+        '--jitter', str(args.jitter),
+        '--drop', str(args.drop),
+        '--timeout', str(args.timeout),
+        '--seed', '1',
+    ]
+    process = subprocess.Popen(
+        command,
+        stdout=subprocess.PIPE,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    )
+    line = process.stdout.readline()
+    if not line:
+        process.wait()
+        raise RuntimeError(
+            "simulator exited with code {code}".format(
+                code=process.returncode,
+            ),
+        )
+    return process, json.loads(line.decode('utf-8'))
+
+
+def run(args, size, workers):
+    """Выполняет заданное количество циклов опроса size майнеров"""
+    process, miners = startFarm(args, size)
+    cycles = []
+    latencies = []
+    errors = 0
+    try:
+        with Sampler() as sampler:
+            for _ in range(args.cycles):
+                if args.sender == 'async':
+                    sender = AsyncSender(miners, limit=args.limit)
+                else:
+                    sender = Sender(miners, workers=workers)
+                start = time.perf_counter()
+                sender.sendRequests()
+                cycles.append(time.perf_counter() - start)
+
+                for result in sender.results.values():
+                    for exchange in result['Exchange']:
+                        errors += exchange['Error']
+                        if exchange['Elapsed'] is not None:
+                            latencies.append(exchange['Elapsed'])
+    finally:
+        process.terminate()
+        process.wait()
+
+    return {
+        'miners': size,
+        'cycles': len(cycles),
+        'cycle_seconds': [round(item, 6) for item in cycles],
+        'cycles_per_sec': round(len(cycles) / sum(cycles), 4),
+        'requests': len(latencies),
+        'errors': errors,
+        'latency': {
+            key: round(percentile(latencies, percent), 6)
+            if latencies else None
+            for key, percent in (('p50', 50), ('p95', 95), ('p99', 99))
+        },
+        'peak_rss_kb': peakRss(),
+        'peak_threads': sampler.peak,
+    }
+
+
+def measure(args, size):
+    """Выполняет тест для size майнеров, вызывается в отдельном
+    процессе. Общий пул нитей используется во всех циклах,
+    как в dj-miners
+    """
+    workers = WorkerPool(args.workers)
+    try:
+        return run(args, size, workers)
+    finally:
+        workers.shutdown()
+
+
+def compare(result, baseline):
+    """Сравнивает результаты с предыдущими для того же числа майнеров"""
+    previous = {item['miners']: item for item in baseline['results']}
+    item = previous.get(result['miners'])
+    if item is None:
+        return ''
+    return ' (baseline {previous:.3f} cycles/s, {change:+.1f}%)'.format(
+        previous=item['cycles_per_sec'],
+        change=(result['cycles_per_sec'] / item['cycles_per_sec'] - 1) * 100,
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Нагрузочный тест опроса майнеров',
+    )
+    parser.add_argument('--sizes', type=int, nargs='+',
+                        default=[100, 1000, 5000, 10000],
+                        help='количество майнеров')
+    parser.add_argument('--cycles', type=int, default=3,
+                        help='количество циклов опроса')
+    parser.add_argument('--sender', choices=['thread', 'async'],
+                        default='thread', help='реализация опроса')
+    parser.add_argument('--workers', type=int, default=128,
+                        help='размер пула нитей Sender')
+    parser.add_argument('--limit', type=int, default=1000,
+                        help='ограничение запросов AsyncSender')
+    parser.add_argument('--miner', default='CGMiner',
+                        choices=['CGMiner', 'Etherium', 'Monero', 'ZCash'],
+                        help='тип имитируемых майнеров')
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='задержка ответа имитаторов (секунд)')
+    parser.add_argument('--jitter', type=float, default=0.0,
+                        help='отклонение задержки ответа (секунд)')
+    parser.add_argument('--drop', type=float, default=0.0,
+                        help='доля запросов без ответа')
+    parser.add_argument('--timeout', type=int, default=5,
+                        help='время ожидания ответа майнера')
+    parser.add_argument('--output', help='файл для сохранения результатов')
+    parser.add_argument('--baseline',
+                        help='файл с результатами для сравнения')
+    args = parser.parse_args(argv)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as baselineFile:
+            baseline = json.load(baselineFile)
+
+    report = {
+        'pyminers': pyminers.__version__,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'date': datetime.datetime.now().isoformat(),
+        'parameters': {
+            key: value for key, value in vars(args).items()
+            if key not in ('output', 'baseline')
+        },
+        'results': [],
+    }
+
+    # ru_maxrss не уменьшается за время жизни процесса, поэтому
+    # каждое измерение выполняется в новом процессе (spawn,
+    # а не fork, чтобы не наследовать память текущего)
+    context = multiprocessing.get_context('spawn')
+    for size in args.sizes:
+        with context.Pool(1) as pool:
+            result = pool.apply(measure, (args, size))
+        report['results'].append(result)
+        print(
+            "{miners:>6} miners: {cycles_per_sec:.3f} cycles/s, "
+            "p50 {p50} p95 {p95} p99 {p99}, errors {errors}, "
+            "rss {peak_rss_kb} KiB, threads {peak_threads}{change}".format(
+                change=compare(result, baseline) if baseline else '',
+                **dict(result, **result['latency'])
+            ),
+        )
+
+    if args.output:
+        with open(args.output, 'w') as outputFile:
+            json.dump(report, outputFile, indent=4)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
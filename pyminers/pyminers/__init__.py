@@ -15,8 +15,16 @@ from .etherium import Etherium
 from .monero import Monero
 from .cgminer import CGMiner
 from .sender import Sender
+from .asyncsender import AsyncSender
+from .workerpool import WorkerPool
+from .health import HealthTracker
+from .zabbix import ZabbixDelivery
+from .spool import ZabbixSpool
+from .exporter import MetricsExporter
 
-__all__ = ['Miner', 'ZCash', 'Etherium', 'Monero', 'CGMiner', 'Sender']
+__all__ = ['Miner', 'ZCash', 'Etherium', 'Monero', 'CGMiner', 'Sender',
+           'AsyncSender', 'WorkerPool', 'HealthTracker', 'ZabbixDelivery',
+           'ZabbixSpool', 'MetricsExporter']
 
-__version__ = "1.2.2"
+__version__ = "1.3.0"
 __author__ = "varga"
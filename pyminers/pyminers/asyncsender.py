@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+
+"""Модуль содержит реализацию класса AsyncSender"""
+
+import asyncio
+import threading
+
+import queue as Queue
+
+from .sender import Sender
+
+
+class AsyncSender(Sender):
+    """Опрашивает майнеры из переданного списка,
+    используя asyncio вместо отдельной нити на каждый запрос
+    """
+
+    def __init__(self, miners, limit=1000, health=None):
+        """Аргументы:
+           miners: список для опроса майнеров в формате dict,
+               аналогичен списку для Sender
+           limit: максимальное количество одновременно
+               выполняемых запросов
+           health: история опроса HealthTracker, аналогична Sender
+        """
+        self.limit = limit
+        super().__init__(miners, health=health)
+
+    @property
+    def limit(self):
+        """Максимальное количество одновременных запросов"""
+        try:
+            return self.__limit
+        except AttributeError:
+            return None
+
+    @limit.setter
+    def limit(self, value):
+        """Максимальное количество одновременных запросов,
+        должно быть целым числом больше 0
+        """
+        if isinstance(value, int) and not isinstance(value, bool) \
+                and value > 0:
+            self.__limit = value
+        else:
+            raise ValueError(
+                "concurrency limit '{limit}' must be "
+                "positive integer".format(limit=value),
+            )
+
+    def _iterCompleted(self, miners):
+        """Выполняет запросы к майнерам, не более limit одновременно
+
+        Цикл событий работает в отдельной нити и передает выполненные
+        запросы через очередь, ответы разбираются и проверяются в
+        нити получателя, не задерживая обмен данными с майнерами
+
+        Аргументы:
+        miners: список кортежей (имя сервера, экземпляр майнера)
+
+        return:
+        генератор кортежей (имя сервера, экземпляр майнера)
+        в порядке выполнения запросов
+        """
+        miners = list(miners)
+        # Очередь выполненных запросов
+        done = Queue.Queue()
+        loop = asyncio.new_event_loop()
+        task = loop.create_task(self.__sendAll(miners, done))
+
+        def run():
+            """Выполняет запросы в цикле событий"""
+            asyncio.set_event_loop(loop)
+            try:
+                loop.run_until_complete(task)
+            except asyncio.CancelledError:
+                pass
+
+        thread = threading.Thread(target=run, name='AsyncSender')
+        thread.daemon = True
+        thread.start()
+        try:
+            # Возвращаем запросы по мере выполнения
+            for _ in range(len(miners)):
+                name, miner, received = done.get()
+                if received is not None:
+                    miner.response = received
+                yield name, miner
+        finally:
+            # Отменяем запросы, если результаты больше не нужны
+            loop.call_soon_threadsafe(task.cancel)
+            thread.join()
+            loop.close()
+
+    async def __sendAll(self, miners, done):
+        """Выполняет запросы к майнерам и помещает
+        кортежи (имя сервера, экземпляр майнера, ответ)
+        в очередь done по мере выполнения
+        """
+
+        async def sendOne(name, miner):
+            """Выполняет запрос к майнеру"""
+            received = None
+            try:
+                async with semaphore:
+                    # Делаем запрос
+                    received = await miner.exchangeAsync()
+            except Exception as e:
+                miner.errorResponse(e, None)
+            finally:
+                # Сообщаем о выполнении задания
+                done.put((name, miner, received))
+
+        # Ограничение количества одновременных запросов
+        semaphore = asyncio.Semaphore(self.limit)
+        await asyncio.gather(
+            *(sendOne(name, miner) for name, miner in miners),
+            return_exceptions=True
+        )
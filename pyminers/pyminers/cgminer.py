@@ -4,177 +4,190 @@
 
 import json
 
-from validictory import validate
-
 from .miner import Miner
+from .schema import compileSchema
 
 
 class CGMiner(Miner):
     """Отправляет запросы к майнеру CGMiner"""
 
-    def __init__(self, host='127.0.0.1', port=4028,
-                 request='Summary', timeout=5):
-        """Аргументы:
-        host: адрес сервера
-        port: порт майнера
-        request: тип запроса
-            Поддерживаемы запросы (Summary, Stats)
-        timeout: время ожидани ответа сервера
-        """
-
-        # Поддерживаемые запросы
-        self.__requests = {
-            'Summary':
-            {
-                "command": "summary",
-            },
-            'Stats':
-            {
-                "command": "stats",
-            },
-        }
+    # Ответ CGMiner заканчивается нулевым байтом
+    terminator = b'\x00'
 
-        # Поля ответа и их тип и размер
-        self.__templates = {
-            item: {
-                "type": "object",
-                "properties": {
-                    "STATUS": {
-                        "type": "array",
-                        "items": [
-                            {
-                                "type": "object",
-                                "properties": {
-                                    "STATUS": {
-                                        "enum": ["W", "I", "S", "E", "F"]
-                                    },
-                                    "When": {"format": "utc-millisec"},
-                                    "Code": {"type": "integer"},
-                                    "Msg": {"type": "string"},
-                                    "Description": {"type": "string"},
-                                },
-                            },
-                        ],
-                        "minItems": 1,
-                        "maxItems": 1,
-                    },
-                    "id": {"type": "integer"},
-                },
-            }
-            for item in self.__requests}
+    # Поддерживаемые запросы
+    __requests = {
+        'Summary':
+        {
+            "command": "summary",
+        },
+        'Stats':
+        {
+            "command": "stats",
+        },
+    }
 
-        self.__templates['Summary']['properties'].update(
-            {
-                "SUMMARY": {
+    # Поля ответа и их тип и размер
+    __templates = {
+        item: {
+            "type": "object",
+            "properties": {
+                "STATUS": {
                     "type": "array",
                     "items": [
                         {
                             "type": "object",
                             "properties": {
-                                "Elapsed": {"type": "integer"},
-                                "GHS 5s": {"type": "string"},
-                                "GHS av": {"type": "number"},
-                                "Found Blocks": {"type": "integer"},
-                                "Getworks": {"type": "integer"},
-                                "Accepted": {"type": "integer"},
-                                "Rejected": {"type": "integer"},
-                                "Hardware Errors": {"type": "integer"},
-                                "Utility": {"type": "number"},
-                                "Discarded": {"type": "integer"},
-                                "Stale": {"type": "integer"},
-                                "Get Failures": {"type": "integer"},
-                                "Local Work": {"type": "integer"},
-                                "Remote Failures": {"type": "integer"},
-                                "Network Blocks": {"type": "integer"},
-                                "Total MH": {"type": "number"},
-                                "Work Utility": {"type": "number"},
-                                "Difficulty Accepted": {"type": "number"},
-                                "Difficulty Rejected": {"type": "number"},
-                                "Difficulty Stale": {"type": "number"},
-                                "Best Share": {"type": "integer"},
-                                "Device Hardware%": {"type": "number"},
-                                "Device Rejected%": {"type": "number"},
-                                "Pool Rejected%": {"type": "number"},
-                                "Pool Stale%": {"type": "number"},
-                                "Last getwork": {"format": "utc-millisec"},
+                                "STATUS": {
+                                    "enum": ["W", "I", "S", "E", "F"]
+                                },
+                                "When": {"format": "utc-millisec"},
+                                "Code": {"type": "integer"},
+                                "Msg": {"type": "string"},
+                                "Description": {"type": "string"},
                             },
                         },
                     ],
                     "minItems": 1,
-                    "maxItems": 1},
+                    "maxItems": 1,
+                },
+                "id": {"type": "integer"},
             },
-        )
+        }
+        for item in __requests}
 
-        self.__templates['Stats']['properties'].update(
-            {
-                "STATS": {
-                    "type": "array",
-                    "items": [
-                        {
-                            "type": "object",
-                            "properties": {
-                                "BMMiner": {"type": "string"},
-                                "Miner": {"type": "string"},
-                                "CompileTime": {"type": "string"},
-                                "Type": {"type": "string"},
-                                "STATS": {"type": "integer"},
-                                "ID": {"type": "string"},
-                                "Elapsed": {"type": "integer"},
-                                "Calls": {"type": "integer"},
-                                "Wait": {"type": "number"},
-                                "Max": {"type": "number"},
-                                "Min": {"type": "number"},
-                                "GHS 5s": {"type": "string"},
-                                "GHS av": {"type": "number"},
-                                "miner_count": {"type": "integer"},
-                                "frequency": {"type": "string"},
-                                "fan_num": {"type": "integer"},
-                                "temp_num": {"type": "integer"},
-                                "total_rateideal": {"type": "number"},
-                                "total_freqavg": {"type": "number"},
-                                "total_acn": {"type": "integer"},
-                                "total_rate": {"type": "number"},
-                                "temp_max": {"type": "integer"},
-                                "Device Hardware%": {"type": "number"},
-                                "no_matching_work": {"type": "integer"},
-                                "miner_version": {"type": "string"},
-                                "miner_id": {"type": "string"},
+    __templates['Summary']['properties'].update(
+        {
+            "SUMMARY": {
+                "type": "array",
+                "items": [
+                    {
+                        "type": "object",
+                        "properties": {
+                            "Elapsed": {"type": "integer"},
+                            "GHS 5s": {"type": "string"},
+                            "GHS av": {"type": "number"},
+                            "Found Blocks": {"type": "integer"},
+                            "Getworks": {"type": "integer"},
+                            "Accepted": {"type": "integer"},
+                            "Rejected": {"type": "integer"},
+                            "Hardware Errors": {"type": "integer"},
+                            "Utility": {"type": "number"},
+                            "Discarded": {"type": "integer"},
+                            "Stale": {"type": "integer"},
+                            "Get Failures": {"type": "integer"},
+                            "Local Work": {"type": "integer"},
+                            "Remote Failures": {"type": "integer"},
+                            "Network Blocks": {"type": "integer"},
+                            "Total MH": {"type": "number"},
+                            "Work Utility": {"type": "number"},
+                            "Difficulty Accepted": {"type": "number"},
+                            "Difficulty Rejected": {"type": "number"},
+                            "Difficulty Stale": {"type": "number"},
+                            "Best Share": {"type": "integer"},
+                            "Device Hardware%": {"type": "number"},
+                            "Device Rejected%": {"type": "number"},
+                            "Pool Rejected%": {"type": "number"},
+                            "Pool Stale%": {"type": "number"},
+                            "Last getwork": {"format": "utc-millisec"},
+                        },
+                    },
+                ],
+                "minItems": 1,
+                "maxItems": 1},
+        },
+    )
+
+    __templates['Stats']['properties'].update(
+        {
+            "STATS": {
+                "type": "array",
+                "items": [
+                    {
+                        "type": "object",
+                        "properties": {
+                            "BMMiner": {"type": "string"},
+                            "Miner": {"type": "string"},
+                            "CompileTime": {"type": "string"},
+                            "Type": {"type": "string"},
+                            "STATS": {"type": "integer"},
+                            "ID": {"type": "string"},
+                            "Elapsed": {"type": "integer"},
+                            "Calls": {"type": "integer"},
+                            "Wait": {"type": "number"},
+                            "Max": {"type": "number"},
+                            "Min": {"type": "number"},
+                            "GHS 5s": {"type": "string"},
+                            "GHS av": {"type": "number"},
+                            "miner_count": {"type": "integer"},
+                            "frequency": {"type": "string"},
+                            "fan_num": {"type": "integer"},
+                            "temp_num": {"type": "integer"},
+                            "total_rateideal": {"type": "number"},
+                            "total_freqavg": {"type": "number"},
+                            "total_acn": {"type": "integer"},
+                            "total_rate": {"type": "number"},
+                            "temp_max": {"type": "integer"},
+                            "Device Hardware%": {"type": "number"},
+                            "no_matching_work": {"type": "integer"},
+                            "miner_version": {"type": "string"},
+                            "miner_id": {"type": "string"},
+                        },
+                        "patternProperties": {
+                            "^temp[0-9]+": {"type": "integer"},
+                            "^temp[0-9]+_[0-9]+": {"type": "integer"},
+                            "^freq_avg[0-9]+": {"type": "number"},
+                            "^chain_rateideal[0-9]+": {"type": "number"},
+                            "^chain_acn[0-9]+": {"type": "integer"},
+                            "^chain_acs[0-9]+": {
+                                "type": "string",
+                                "blank": True,
                             },
-                            "patternProperties": {
-                                "^temp[0-9]+": {"type": "integer"},
-                                "^temp[0-9]+_[0-9]+": {"type": "integer"},
-                                "^freq_avg[0-9]+": {"type": "number"},
-                                "^chain_rateideal[0-9]+": {"type": "number"},
-                                "^chain_acn[0-9]+": {"type": "integer"},
-                                "^chain_acs[0-9]+": {
-                                    "type": "string",
-                                    "blank": True,
-                                },
-                                "^chain_hw[0-9]+": {"type": "integer"},
-                                "^chain_rate[0-9]+": {
-                                    "type": "string",
-                                    "blank": True,
-                                },
-                                "^chain_xtime[0-9]+": {
-                                    "type": "string",
-                                    "blank": True,
-                                },
-                                "^chain_offside_[0-9]+": {
-                                    "type": "string",
-                                    "blank": True,
-                                },
-                                "^chain_opencore_[0-9]+": {
-                                    "type": "string",
-                                    "blank": True,
-                                },
+                            "^chain_hw[0-9]+": {"type": "integer"},
+                            "^chain_rate[0-9]+": {
+                                "type": "string",
+                                "blank": True,
+                            },
+                            "^chain_xtime[0-9]+": {
+                                "type": "string",
+                                "blank": True,
+                            },
+                            "^chain_offside_[0-9]+": {
+                                "type": "string",
+                                "blank": True,
+                            },
+                            "^chain_opencore_[0-9]+": {
+                                "type": "string",
+                                "blank": True,
                             },
                         },
-                    ],
-                    "minItems": 1,
-                    "maxItems": 1,
-                },
+                    },
+                ],
+                "minItems": 1,
+                "maxItems": 1,
             },
-        )
+        },
+    )
+
+    # Функции проверки ответов, шаблоны
+    # компилируются один раз для всего класса
+    __validators = {
+        name: compileSchema(template)
+        for name, template in __templates.items()
+    }
+
+    # Функции проверки ответов на составные запросы
+    __compositeValidators = {}
+
+    def __init__(self, host='127.0.0.1', port=4028,
+                 request='Summary', timeout=5):
+        """Аргументы:
+        host: адрес сервера
+        port: порт майнера
+        request: тип запроса
+            Поддерживаемы запросы (Summary, Stats),
+            запросы можно объединять: 'Summary+Stats'
+        timeout: время ожидани ответа сервера
+        """
 
         self.host = host
         self.port = port
@@ -194,7 +207,9 @@ class CGMiner(Miner):
 
     @request.setter
     def request(self, value):
-        """Запрос к серверу, должен соответсвовать API
+        """Запрос к серверу, должен соответсвовать API.
+        Несколько запросов можно объединить в один,
+        например 'Summary+Stats' или {"command": "summary+stats"}
         """
         if isinstance(value, (str, bytes, bytearray)):
             if value in self.__requests:
@@ -202,8 +217,18 @@ class CGMiner(Miner):
                 super(self.__class__, self.__class__).request.fset(
                     self, self.__requests[value])
                 # Определяем шаблон для проверки ответа
-                self.__template = self.__templates[value]
+                self.__validator = self.__validators[value]
+                self.__commands = None
                 return None
+            elif isinstance(value, str) and '+' in value and all(
+                    name in self.__requests for name in value.split('+')):
+                # Передано допустимое имя составного запроса
+                value = {
+                    "command": '+'.join(
+                        self.__requests[name]['command']
+                        for name in value.split('+')
+                    ),
+                }
             else:
                 # Прередан запрос в виде строки
                 # или недопустимое имя запроса
@@ -225,41 +250,97 @@ class CGMiner(Miner):
                  if request == value),
             )
             # Определяем шаблон для проверки ответа
-            self.__template = self.__templates[value]
+            self.__validator = self.__validators[value]
+            self.__commands = None
+        elif self.__isComposite(value):
+            # Передан допустимый составной запрос
+            super(self.__class__, self.__class__).request.fset(self, value)
+            self.__commands = value['command'].split('+')
+            # Шаблон составного запроса компилируется
+            # один раз для каждого сочетания команд
+            command = value['command']
+            if command not in self.__compositeValidators:
+                self.__compositeValidators[command] = compileSchema(
+                    self.__compositeTemplate(self.__commands),
+                )
+            self.__validator = self.__compositeValidators[command]
         else:
             raise ValueError(
                 "request = '{request}' request not supported"
                 " by this miner".format(request=value))
 
+    @property
+    def __names(self):
+        """Соответствие команд API именам запросов"""
+        return {request['command']: name
+                for name, request in self.__requests.items()}
+
+    def __compositeTemplate(self, commands):
+        """Шаблон ответа на составной запрос: ответ на каждую
+        команду приходит в виде списка из одного элемента
+        с ключом - именем команды
+        """
+        return {
+            "type": "object",
+            "properties": {
+                command: {
+                    "type": "array",
+                    "items": [self.__templates[self.__names[command]]],
+                    "minItems": 1,
+                    "maxItems": 1,
+                }
+                for command in commands
+            },
+        }
+
+    def __isComposite(self, value):
+        """Проверяет, является ли запрос допустимым
+        объединением нескольких поддерживаемых запросов
+        """
+        if not isinstance(value, dict) or list(value) != ['command'] \
+                or not isinstance(value['command'], str):
+            return False
+        commands = value['command'].split('+')
+        return len(commands) > 1 \
+            and len(set(commands)) == len(commands) \
+            and all(command in self.__names for command in commands)
+
+    def split(self):
+        """Разделяет составной запрос и ответ на нем на
+        отдельные пары (запрос, ответ) для каждой команды
+        """
+        if self.error or not self.__commands:
+            return super().split()
+
+        response = self.response
+        return [
+            ({"command": command}, response[command][0])
+            for command in self.__commands
+        ]
+
     @property
     def response(self):
         """Ответ от сервера в формате dict,
         только статистика работы майнера
         """
-        value = super().response
-        return value
+        return super().response
 
     @response.setter
     def response(self, value):
         """Ответ от сервера должен соответсвовать API"""
-        # Если ответа не ожидается
-        if not self.__template:
-            super(self.__class__, self.__class__).response.fset(self, None)
-            return None
-
         # Ошибка в ответе (Antminer's bug)
-        value = value.replace(b'}{', b',')
-
-        try:
-            # В ответе присутствую все поля и их тип соответствует
-            validate(
-                json.loads(value),
-                self.__template,
-                disallow_unknown_properties=False,
-            )
-        except ValueError as e:
-            self.errorResponse(e, value)
-            return None
+        if isinstance(value, (bytes, bytearray)):
+            value = value.replace(b'}{', b',')
 
         super(self.__class__, self.__class__).response.fset(self, value)
-        return None
+
+    @property
+    def responseExpected(self):
+        """Ожидается ли ответ сервера на текущий запрос"""
+        return self.__validator is not None
+
+    def checkResponse(self, value):
+        """Проверяет ответ от сервера на соответствие API"""
+        # В ответе присутствуют все поля и их тип соответствует
+        self.__validator(value)
+        return value
@@ -5,14 +5,65 @@
 import json
 from re import split
 
-from validictory import validate
-
 from .miner import Miner
+from .schema import compileSchema
 
 
 class Etherium(Miner):
     """Отправляет запросы к майнеру Etherium"""
 
+    # Поддерживаемые запросы
+    __requests = {
+        'Statistic': {
+            "id": 0,
+            "jsonrpc": "2.0",
+            "method": "miner_getstat1",
+        },
+        'Restart': {
+            "id": 0,
+            "jsonrpc": "2.0",
+            "method": "miner_restart",
+        },
+        'Reboot': {
+            "id": 0,
+            "jsonrpc": "2.0",
+            "method": "miner_reboot",
+        },
+        'GPU': {
+            "id": 0,
+            "jsonrpc": "2.0",
+            "method": "control_gpu",
+            "params": None,
+        },
+    }
+
+    # Шаблон для проверки ответов
+    __templates = {
+        'Statistic': {
+            "type": "object",
+            "properties": {
+                "id": {"type": "integer"},
+                "error": {"type": "null"},
+                "result": {
+                    "items": {"type": "string"},
+                    "minItems": 9,
+                    "maxItems": 9,
+                },
+            },
+        },
+        'Restart': None,
+        'Reboot': None,
+        'GPU': None,
+    }
+
+    # Функции проверки ответов, шаблоны
+    # компилируются один раз для всего класса
+    __validators = {
+        name: (compileSchema(template, disallowUnknown=True)
+               if template else None)
+        for name, template in __templates.items()
+    }
+
     def __init__(self, host='127.0.0.1', port=3333,
                  request='Statistic', timeout=5, gpu=None):
         """Аргументы:
@@ -21,51 +72,15 @@ class Etherium(Miner):
         request: тип запроса
             Поддерживаемые запросы (Statistic, Restart, Reboot, GPU)
         timeout: время ожидани ответа сервера
+        gpu: параметры запроса GPU
         """
 
-        # Поддерживаемые запросы
-        self.__requests = {
-            'Statistic': {
-                "id": 0,
-                "jsonrpc": "2.0",
-                "method": "miner_getstat1",
-            },
-            'Restart': {
-                "id": 0,
-                "jsonrpc": "2.0",
-                "method": "miner_restart",
-            },
-            'Reboot': {
-                "id": 0,
-                "jsonrpc": "2.0",
-                "method": "miner_reboot",
-            },
-            'GPU': {
-                "id": 0,
-                "jsonrpc": "2.0",
-                "method": "control_gpu",
-                "params": gpu,
-            },
-        }
-
-        # Шаблон для проверки ответов
-        self.__templates = {
-            'Statistic': {
-                "type": "object",
-                "properties": {
-                    "id": {"type": "integer"},
-                    "error": {"type": "null"},
-                    "result": {
-                        "items": {"type": "string"},
-                        "minItems": 9,
-                        "maxItems": 9,
-                    },
-                },
-            },
-            'Restart': None,
-            'Reboot': None,
-            'GPU': None,
-        }
+        if gpu is not None:
+            # Параметры запроса GPU задаются для каждого экземпляра
+            self.__requests = dict(
+                self.__requests,
+                GPU=dict(self.__requests['GPU'], params=gpu),
+            )
 
         self.host = host
         self.port = port
@@ -93,7 +108,7 @@ class Etherium(Miner):
                 super(self.__class__, self.__class__).request.fset(
                     self, self.__requests[value])
                 # Определяем шаблон для проверки ответа
-                self.__template = self.__templates[value]
+                self.__validator = self.__validators[value]
                 return None
             else:
                 # Прередан запрос в виде строки
@@ -116,16 +131,22 @@ class Etherium(Miner):
                  if request == value),
             )
             # Определяем шаблон для проверки ответа
-            self.__template = self.__templates[value]
+            self.__validator = self.__validators[value]
         else:
             raise ValueError(
                 "request = '{request}' request not supported"
                 " by this miner".format(request=value))
 
     @property
-    def response(self):
-        """Ответ от сервера в формате dict,
-        только статистика работы майнера
+    def responseExpected(self):
+        """Ожидается ли ответ сервера на текущий запрос"""
+        return self.__validator is not None
+
+    def checkResponse(self, value):
+        """Проверяет ответ от сервера на соответствие API
+
+        return:
+        только статистика работы майнера в формате dict
         """
         def listToDict(keys, values):
             """Создает словарь на основе списков
@@ -141,9 +162,8 @@ class Etherium(Miner):
                 return [strToInt(value) for value in values]
             return int(values) if values.isdigit() else values
 
-        value = super().response
-        if self.error or value is None:
-            return value
+        # В ответе присутствуют все поля и их тип соответствует
+        self.__validator(value)
 
         # Ответ от сервера, только статистика работы майнера
         value = value['result']
@@ -198,25 +218,3 @@ class Etherium(Miner):
             for item in zip(*[iter(value['Pools'])] * 2)
         ]
         return value
-
-    @response.setter
-    def response(self, value):
-        """Ответ от сервера должен соответсвовать API"""
-        # Если ответа не ожидается
-        if not self.__template:
-            super(self.__class__, self.__class__).response.fset(self, None)
-            return None
-
-        try:
-            # В ответе присутствуют все поля и их тип соответствует
-            validate(
-                json.loads(value),
-                self.__template,
-                disallow_unknown_properties=True,
-            )
-        except ValueError as e:
-            self.errorResponse(e, value)
-            return None
-
-        super(self.__class__, self.__class__).response.fset(self, value)
-        return None
@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+
+"""Модуль содержит реализацию класса MetricsExporter"""
+
+import math
+import re
+import socketserver
+import threading
+import time
+
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+# Ключ метрики Zabbix: 'miner.gpu.temperature[0]'
+ZABBIX_KEY = re.compile(r'^([a-z0-9_.]+?)(?:\[([^\]]*)\])?$', re.IGNORECASE)
+
+# Типы содержимого ответа
+OPENMETRICS = 'application/openmetrics-text; version=1.0.0; charset=utf-8'
+PROMETHEUS = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def escapeLabel(value):
+    """Экранирует значение метки"""
+    return str(value).replace('\\', '\\\\').replace(
+        '"', '\\"').replace('\n', '\\n')
+
+
+def formatValue(value):
+    """Форматирует значение серии, NaN и бесконечности
+    записываются в виде, принятом в OpenMetrics и Prometheus
+    """
+    value = float(value)
+    if math.isnan(value):
+        return 'NaN'
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(value)
+
+
+def fromZabbix(host, key, value):
+    """Преобразует метрику Zabbix в серию Prometheus
+
+    Аргументы:
+    host: имя хоста
+    key: ключ метрики Zabbix, индекс в квадратных скобках
+        передается меткой gpu или fan для метрик GPU
+        и вентиляторов, иначе меткой index
+    value: значение
+
+    return:
+    (имя, {метка: значение, }, число) или None, если
+    метрика не числовая. Версия майнера передается
+    меткой серии miner_version_info
+    """
+    match = ZABBIX_KEY.match(key)
+    if match is None:
+        return None
+    name, index = match.groups()
+    labels = {'host': host}
+
+    if name == 'miner.version':
+        labels['version'] = value
+        return 'miner_version_info', labels, 1
+
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        # Строковые значения и json для обнаружения
+        # элементов Zabbix не экспортируются
+        return None
+
+    if index is not None:
+        parts = name.split('.')
+        label = parts[1] if len(parts) > 2 and \
+            parts[1] in ('gpu', 'fan') else 'index'
+        labels[label] = index
+    return name.replace('.', '_'), labels, value
+
+
+class MetricsExporter():
+    """Отдает метрики майнеров в формате OpenMetrics по HTTP.
+    Ответ формируется один раз при обновлении метрик
+    (update), поэтому запросы Prometheus не обращаются
+    к БД и майнерам и не зависят от количества серий
+    """
+
+    def __init__(self, host='127.0.0.1', port=9350, path='/metrics'):
+        """Аргументы:
+        host: адрес для входящих соединений
+        port: порт
+        path: путь к метрикам
+        """
+        self.host = host
+        self.port = port
+        self.path = path
+
+        # Сформированные ответы: (OpenMetrics, Prometheus)
+        self.__content = self.__render({}, None)
+        self.__server = None
+        self.__thread = None
+
+    def update(self, metrics, timestamp=None):
+        """Заменяет метрики
+
+        Аргументы:
+        metrics: список экземпляров ZabbixMetric
+        timestamp: время обновления, по умолчанию текущее
+        """
+        series = {}
+        for metric in metrics:
+            sample = fromZabbix(metric.host, metric.key, metric.value)
+            if sample is not None:
+                name, labels, value = sample
+                series.setdefault(name, []).append((labels, value))
+        self.__content = self.__render(
+            series, timestamp or time.time(),
+        )
+
+    def render(self, openMetrics=True):
+        """Текущий ответ в формате OpenMetrics
+        или текстовом формате Prometheus
+        """
+        return self.__content[0 if openMetrics else 1]
+
+    def start(self):
+        """Запускает HTTP сервер в отдельной нити"""
+        if self.__server is not None:
+            return None
+
+        exporter = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != exporter.path:
+                    self.send_error(404)
+                    return
+                openMetrics = 'application/openmetrics-text' in \
+                    self.headers.get('Accept', '')
+                content = exporter.render(openMetrics)
+                self.send_response(200)
+                self.send_header(
+                    'Content-Type',
+                    OPENMETRICS if openMetrics else PROMETHEUS,
+                )
+                self.send_header('Content-Length', str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            def log_message(self, format, *args):
+                # Запросы не записываются в лог
+                pass
+
+        class Server(socketserver.ThreadingMixIn, HTTPServer):
+            daemon_threads = True
+            allow_reuse_address = True
+
+        self.__server = Server((self.host, self.port), Handler)
+        # Порт назначается системой, если передан 0
+        self.port = self.__server.server_address[1]
+        self.__thread = threading.Thread(target=self.__server.serve_forever)
+        self.__thread.daemon = True
+        self.__thread.start()
+
+    def shutdown(self):
+        """Останавливает HTTP сервер"""
+        if self.__server is None:
+            return None
+        self.__server.shutdown()
+        self.__server.server_close()
+        self.__thread.join()
+        self.__server = None
+        self.__thread = None
+
+    @staticmethod
+    def __render(series, timestamp):
+        """Формирует ответы в формате OpenMetrics
+        и текстовом формате Prometheus
+        """
+        if timestamp is not None:
+            series = dict(series, miners_updated_timestamp_seconds=[
+                ({}, timestamp),
+            ])
+
+        openMetrics, prometheus = [], []
+        for name in sorted(series):
+            # Серии *_info в OpenMetrics имеют тип info,
+            # в формате Prometheus такого типа нет
+            if name.endswith('_info'):
+                openMetrics.append(
+                    '# TYPE {name} info'.format(name=name[:-len('_info')]),
+                )
+            else:
+                openMetrics.append('# TYPE {name} gauge'.format(name=name))
+            prometheus.append('# TYPE {name} gauge'.format(name=name))
+
+            for labels, value in series[name]:
+                line = '{name}{labels} {value}'.format(
+                    name=name,
+                    labels='{{{labels}}}'.format(labels=','.join(
+                        '{key}="{value}"'.format(
+                            key=key, value=escapeLabel(item),
+                        )
+                        for key, item in labels.items()
+                    )) if labels else '',
+                    value=formatValue(value),
+                )
+                openMetrics.append(line)
+                prometheus.append(line)
+
+        return (
+            '\n'.join(openMetrics + ['# EOF', '']).encode('utf-8'),
+            '\n'.join(prometheus + ['']).encode('utf-8'),
+        )
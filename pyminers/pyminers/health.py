@@ -0,0 +1,257 @@
+# -*- coding: utf-8 -*-
+
+"""Модуль содержит реализацию класса HealthTracker"""
+
+import math
+import threading
+import time
+
+
+class HealthTracker():
+    """Хранит историю опроса майнеров между циклами опроса.
+
+    По времени ответа майнера (экспоненциальное скользящее среднее
+    и отклонение) вычисляется сокращенное время ожидания ответа.
+    После нескольких ошибок подряд майнер переводится в состояние
+    ожидания, в котором он опрашивается только изредка, время
+    ожидания удваивается после каждой неудачной проверки
+    """
+
+    def __init__(self, failures=3, backoff=60, maxBackoff=960,
+                 alpha=0.2, samples=5):
+        """Аргументы:
+        failures: количество ошибок подряд, после которого
+            майнер переводится в состояние ожидания
+        backoff: начальное время ожидания (секунд)
+        maxBackoff: максимальное время ожидания (секунд)
+        alpha: коэффициент сглаживания времени ответа (0..1]
+        samples: количество успешных ответов, после которого
+            время ожидания ответа вычисляется по истории
+        """
+        self.failures = failures
+        self.backoff = backoff
+        self.maxBackoff = maxBackoff
+        self.alpha = alpha
+        self.samples = samples
+
+        # Состояние майнеров
+        self.__hosts = {}
+        self.__lock = threading.Lock()
+
+    @property
+    def failures(self):
+        """Количество ошибок подряд до перевода в состояние ожидания"""
+        try:
+            return self.__failures
+        except AttributeError:
+            return None
+
+    @failures.setter
+    def failures(self, value):
+        """Количество ошибок подряд до перевода в состояние
+        ожидания, должно быть целым числом больше 0
+        """
+        if isinstance(value, int) and not isinstance(value, bool) \
+                and value > 0:
+            self.__failures = value
+        else:
+            raise ValueError(
+                "failures count '{failures}' must be "
+                "positive integer".format(failures=value),
+            )
+
+    @property
+    def backoff(self):
+        """Начальное время ожидания (секунд)"""
+        try:
+            return self.__backoff
+        except AttributeError:
+            return None
+
+    @backoff.setter
+    def backoff(self, value):
+        """Начальное время ожидания, должно
+        быть положительным числом
+        """
+        if isinstance(value, (int, float)) and not isinstance(value, bool) \
+                and value > 0:
+            self.__backoff = value
+        else:
+            raise ValueError(
+                "backoff '{backoff}' must be "
+                "positive number".format(backoff=value),
+            )
+
+    @property
+    def maxBackoff(self):
+        """Максимальное время ожидания (секунд)"""
+        try:
+            return self.__maxBackoff
+        except AttributeError:
+            return None
+
+    @maxBackoff.setter
+    def maxBackoff(self, value):
+        """Максимальное время ожидания, должно быть
+        числом не меньше начального времени ожидания
+        """
+        if isinstance(value, (int, float)) and not isinstance(value, bool) \
+                and value >= self.backoff:
+            self.__maxBackoff = value
+        else:
+            raise ValueError(
+                "max backoff '{backoff}' must be number not less "
+                "than backoff {minimum}".format(
+                    backoff=value,
+                    minimum=self.backoff,
+                ),
+            )
+
+    @property
+    def alpha(self):
+        """Коэффициент сглаживания времени ответа"""
+        try:
+            return self.__alpha
+        except AttributeError:
+            return None
+
+    @alpha.setter
+    def alpha(self, value):
+        """Коэффициент сглаживания времени ответа,
+        должен быть в пределах (0..1]
+        """
+        if isinstance(value, (int, float)) and not isinstance(value, bool) \
+                and 0 < value <= 1:
+            self.__alpha = value
+        else:
+            raise ValueError(
+                "smoothing factor '{alpha}' must be "
+                "in range (0..1]".format(alpha=value),
+            )
+
+    @property
+    def samples(self):
+        """Количество ответов до вычисления времени ожидания"""
+        try:
+            return self.__samples
+        except AttributeError:
+            return None
+
+    @samples.setter
+    def samples(self, value):
+        """Количество ответов до вычисления времени
+        ожидания, должно быть целым числом больше 0
+        """
+        if isinstance(value, int) and not isinstance(value, bool) \
+                and value > 0:
+            self.__samples = value
+        else:
+            raise ValueError(
+                "samples count '{samples}' must be "
+                "positive integer".format(samples=value),
+            )
+
+    def state(self, name):
+        """Состояние майнера в формате dict:
+
+        {'Latency': float, 'Deviation': float, 'Samples': int,
+         'Failures': int, 'Backoff': float, 'Retry': float}
+        где:
+            Latency - сглаженное время ответа (секунд)
+            Deviation - сглаженное отклонение времени ответа
+            Samples - количество успешных ответов
+            Failures - количество ошибок подряд
+            Backoff - текущее время ожидания, None - майнер доступен
+            Retry - время следующей проверки по time.monotonic()
+        Для неизвестного майнера возвращается None
+        """
+        with self.__lock:
+            state = self.__hosts.get(name)
+            return dict(state) if state else None
+
+    def timeout(self, name, timeout):
+        """Время ожидания ответа майнера
+
+        Аргументы:
+        name: имя майнера
+        timeout: заданное время ожидания ответа (секунд)
+
+        return:
+        время ожидания, вычисленное по истории ответов
+        (целое число от 1 до timeout) или timeout,
+        если история недостаточна
+        """
+        with self.__lock:
+            state = self.__hosts.get(name)
+            if not state or state['Samples'] < self.samples:
+                return timeout
+            # Ожидаем вдвое дольше верхней оценки времени ответа
+            limit = 2 * (state['Latency'] + 4 * state['Deviation'])
+        return max(1, min(timeout, math.ceil(limit)))
+
+    def available(self, name):
+        """Проверяет, следует ли опрашивать майнер в текущем цикле.
+        Майнер в состоянии ожидания опрашивается один раз по
+        истечении времени ожидания, до получения результата
+        проверки майнер остается недоступным
+        """
+        with self.__lock:
+            state = self.__hosts.get(name)
+            if not state or state['Backoff'] is None:
+                return True
+            now = time.monotonic()
+            if now < state['Retry']:
+                return False
+            # Пробный запрос, повторная проверка
+            # не раньше чем через время ожидания
+            state['Retry'] = now + state['Backoff']
+            return True
+
+    def update(self, name, elapsed, error):
+        """Обновляет историю опроса майнера
+
+        Вызывается один раз за цикл опроса для каждого майнера,
+        независимо от количества запросов к нему
+
+        Аргументы:
+        name: имя майнера
+        elapsed: время выполнения запросов (наибольшее за цикл, секунд)
+        error: флаг ошибки соединения или таймаута хотя бы
+            в одном из запросов (Miner.unreachable).
+            Ошибки формата ответа не учитываются: майнер ответил,
+            поэтому запрос считается успешным
+        """
+        with self.__lock:
+            state = self.__hosts.setdefault(name, {
+                'Latency': 0.0,
+                'Deviation': 0.0,
+                'Samples': 0,
+                'Failures': 0,
+                'Backoff': None,
+                'Retry': 0.0,
+            })
+
+            if error:
+                state['Failures'] += 1
+                if state['Failures'] >= self.failures:
+                    # Неудачная проверка удваивает время ожидания
+                    state['Backoff'] = self.backoff \
+                        if state['Backoff'] is None \
+                        else min(state['Backoff'] * 2, self.maxBackoff)
+                    state['Retry'] = time.monotonic() + state['Backoff']
+                return None
+
+            # Успешный ответ возвращает майнер в рабочее состояние
+            state['Failures'] = 0
+            state['Backoff'] = None
+
+            if elapsed is None:
+                return None
+            if not state['Samples']:
+                state['Latency'] = elapsed
+            else:
+                difference = elapsed - state['Latency']
+                state['Latency'] += self.alpha * difference
+                state['Deviation'] += self.alpha * (
+                    abs(difference) - state['Deviation'])
+            state['Samples'] += 1
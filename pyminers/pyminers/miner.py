@@ -2,14 +2,28 @@
 
 """Модуль содержит реализацию класса Miner"""
 
+import asyncio
 import json
 import socket
+import threading
+import time
 from ipaddress import ip_address
 
+# Буферы приема данных, по одному на каждую нить
+_buffers = threading.local()
+
 
 class Miner():
     """Отправляет запросы к майнеру в формате json"""
 
+    # Признак окончания ответа майнера,
+    # None - ответ считается полученным при закрытии соединения
+    terminator = None
+    # Максимальный размер ответа майнера (байт)
+    maxResponseSize = 4 * 1024 * 1024
+    # Размер буфера приема данных (байт)
+    bufferSize = 16 * 1024
+
     def __init__(self, host, port, request, timeout):
         """Аргументы:
         host: адрес майнера
@@ -118,9 +132,12 @@ class Miner():
 
     @property
     def request(self):
-        """Запрос к майнеру в формате dict"""
+        """Запрос к майнеру в формате dict.
+        Запрос разбирается один раз при установке,
+        возвращаемый объект изменять не следует
+        """
         try:
-            return json.loads(self.__request)
+            return self.__requestData
         except AttributeError:
             return None
 
@@ -130,24 +147,11 @@ class Miner():
         строкой bytes в формате json
         """
         try:
-            if isinstance(value, bytes):
-                json.loads(value)
-                self.__request = value
-            elif isinstance(value, bytearray):
-                json.loads(value)
-                self.__request = bytes(value)
-            elif isinstance(value, str):
-                json.loads(value)
-                self.__request = bytes(
-                    value,
-                    encoding='utf-8',
-                )
-            else:
-                value_dump = json.dumps(value)
-                self.__request = bytes(
-                    value_dump,
-                    encoding='utf-8',
-                )
+            self.__request, data = self.__decode(value)
+            # Сохраняем собственную копию запроса,
+            # переданный объект может измениться
+            self.__requestData = json.loads(self.__request) \
+                if data is value else data
             self.__error = False
         except ValueError as e:
             raise ValueError(
@@ -158,9 +162,12 @@ class Miner():
 
     @property
     def response(self):
-        """Ответ от майнера в формате dict"""
+        """Ответ от майнера в формате dict.
+        Ответ разбирается, проверяется и преобразуется один раз
+        при получении, возвращаемый объект изменять не следует
+        """
         try:
-            return json.loads(self.__response)
+            return self.__responseData
         except AttributeError:
             return None
 
@@ -169,28 +176,82 @@ class Miner():
         """Ответ от майнера, должен быть
         строкой bytes в формате json
         """
-        try:
-            if isinstance(value, bytes):
-                json.loads(value)
-                self.__response = value
-            elif isinstance(value, bytearray):
-                json.loads(value)
-                self.__response = bytes(value)
-            elif isinstance(value, str):
-                json.loads(value)
-                self.__response = bytes(
-                    value,
-                    encoding='utf-8',
-                )
-            else:
-                value_dump = json.dumps(value)
-                self.__response = bytes(
-                    value_dump,
-                    encoding='utf-8',
-                )
+        # Если ответа не ожидается
+        if not self.responseExpected:
+            self.__response = None
+            self.__responseData = None
             self.__error = False
-        except ValueError as e:
+            return None
+
+        try:
+            response, data = self.__decode(value)
+            data = self.checkResponse(data)
+        except (ValueError, LookupError, TypeError) as e:
+            # Ответ не в формате json или не соответствует API
             self.errorResponse(e, value)
+            return None
+
+        self.__response = response
+        self.__responseData = data
+        self.__error = False
+
+    @staticmethod
+    def __decode(value):
+        """Приводит значение к строке bytes в формате json
+        и возвращает ее вместе с разобранным объектом,
+        json разбирается не более одного раза
+        """
+        if isinstance(value, bytes):
+            return value, json.loads(value)
+        elif isinstance(value, bytearray):
+            value = bytes(value)
+            return value, json.loads(value)
+        elif isinstance(value, str):
+            return bytes(value, encoding='utf-8'), json.loads(value)
+        return bytes(json.dumps(value), encoding='utf-8'), value
+
+    @property
+    def responseExpected(self):
+        """Ожидается ли ответ майнера на текущий запрос"""
+        return True
+
+    def checkResponse(self, value):
+        """Проверяет и преобразует разобранный ответ майнера.
+        Вызывается один раз при получении ответа, при
+        несоответствии ответа API должен вызывать ValueError
+
+        return:
+        ответ майнера в требуемом формате
+        """
+        return value
+
+    def split(self):
+        """Возвращает список пар (запрос, ответ) в формате dict.
+        Для составных запросов каждая команда возвращается
+        отдельной парой
+        """
+        return [(self.request, self.response), ]
+
+    @property
+    def elapsed(self):
+        """Время выполнения последнего запроса (секунд),
+        None - запрос не выполнялся
+        """
+        try:
+            return self.__elapsed
+        except AttributeError:
+            return None
+
+    @property
+    def unreachable(self):
+        """Последний запрос завершился ошибкой соединения или
+        таймаутом. В отличие от ошибок формата ответа это
+        означает, что майнер недоступен
+        """
+        try:
+            return self.error and self.__unreachable
+        except AttributeError:
+            return False
 
     def errorResponse(self, error, value):
         """Если не получен ответ от майнера или неверный
@@ -198,12 +259,17 @@ class Miner():
         и устанавливает соответвующий флаг
         """
         self.__error = True
-        self.__response = json.dumps(
-            {
-                "error_type": type(error).__name__,
-                "error_data": str(value),
-                "error_message": str(error),
-            },
+        self.__unreachable = isinstance(
+            error, (socket.error, asyncio.TimeoutError),
+        )
+        self.__responseData = {
+            "error_type": type(error).__name__,
+            "error_data": str(value),
+            "error_message": str(error),
+        }
+        self.__response = bytes(
+            json.dumps(self.__responseData),
+            encoding='utf-8',
         )
 
     def sendRequest(self):
@@ -216,28 +282,151 @@ class Miner():
         if self.__error:
             return False
 
-        received = b''
-        bufferSize = 1024
-
         # Параметры подключения
         sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         sock.settimeout(self.__timeout)
+        start = time.monotonic()
         try:
             # Подключаемся, отправляем запрос
             sock.connect((self.__host, self.__port))
             sock.sendall(self.__request)
             # Получаем ответ
-            buffer = sock.recv(bufferSize)
-            while buffer:
-                received += buffer
-                buffer = sock.recv(bufferSize)
-        except socket.error as e:
+            received = self.__receive(sock)
+        except (socket.error, ValueError) as e:
             # Ели ошибка, запускаем обработчик
             # и возвращаем соответсвующий статус
             self.errorResponse(e, None)
             return False
         finally:
             sock.close()
+            self.__elapsed = time.monotonic() - start
         # Сохранаяем запрос и возвращаем соответсвующий статус
         self.response = received.rstrip(b'\x00')
         return True
+
+    def __receive(self, sock):
+        """Получает ответ майнера до признака окончания
+        ответа или до закрытия соединения
+        """
+        # Буфер приема используется нитью повторно
+        buffer = getattr(_buffers, 'buffer', None)
+        if buffer is None or len(buffer) != self.bufferSize:
+            buffer = _buffers.buffer = bytearray(self.bufferSize)
+
+        received = bytearray()
+        with memoryview(buffer) as view:
+            size = sock.recv_into(view)
+            while size:
+                start = len(received)
+                received += view[:size]
+                if self.terminator:
+                    # Ищем признак окончания только в новых данных
+                    end = received.find(
+                        self.terminator,
+                        max(start - len(self.terminator) + 1, 0),
+                    )
+                    if end != -1:
+                        del received[end:]
+                        break
+                self.__checkSize(len(received))
+                size = sock.recv_into(view)
+        self.__checkSize(len(received))
+        return bytes(received)
+
+    def __checkSize(self, size):
+        """Проверяет, не превышен ли размер ответа майнера"""
+        if size > self.maxResponseSize:
+            raise ValueError(
+                "miner response exceeds {size} bytes".format(
+                    size=self.maxResponseSize,
+                ),
+            )
+
+    async def sendRequestAsync(self):
+        """Отправляет запрос к майнеру в формате json,
+        не блокируя цикл событий asyncio
+
+        return:
+        True - получен ответ от майнера
+        False - ошибка выполнения запроса, ответ не получен
+        """
+        received = await self.exchangeAsync()
+        if received is None:
+            return False
+        # Сохранаяем запрос и возвращаем соответсвующий статус
+        self.response = received
+        return True
+
+    async def exchangeAsync(self):
+        """Отправляет запрос к майнеру и получает ответ, не блокируя
+        цикл событий asyncio. Ответ не разбирается, его следует
+        присвоить response, например, вне цикла событий
+
+        return:
+        ответ майнера в виде строки bytes или None,
+        если при выполнении запроса произошла ошибка
+        """
+        if self.__error:
+            return None
+
+        start = time.monotonic()
+        try:
+            # Подключаемся, отправляем запрос
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(
+                    self.__host,
+                    self.__port,
+                    limit=self.maxResponseSize,
+                ),
+                self.__timeout,
+            )
+            try:
+                writer.write(self.__request)
+                # Получаем ответ
+                received = await asyncio.wait_for(
+                    self.__receiveAsync(reader),
+                    self.__timeout,
+                )
+            finally:
+                writer.close()
+                # Ожидаем закрытия соединения (Python 3.7+)
+                if hasattr(writer, 'wait_closed'):
+                    try:
+                        await writer.wait_closed()
+                    except socket.error:
+                        pass
+        except (socket.error, asyncio.TimeoutError, ValueError) as e:
+            # Ели ошибка, запускаем обработчик
+            # и возвращаем соответсвующий статус
+            self.errorResponse(e, None)
+            return None
+        finally:
+            self.__elapsed = time.monotonic() - start
+        return received.rstrip(b'\x00')
+
+    async def __receiveAsync(self, reader):
+        """Получает ответ майнера до признака окончания
+        ответа или до закрытия соединения
+        """
+        if self.terminator:
+            try:
+                received = await reader.readuntil(self.terminator)
+            except asyncio.IncompleteReadError as e:
+                # Соединение закрыто без признака окончания ответа
+                received = e.partial
+            except asyncio.LimitOverrunError:
+                # Признак окончания не найден
+                # в пределах допустимого размера ответа
+                self.__checkSize(self.maxResponseSize + 1)
+            else:
+                received = received[:-len(self.terminator)]
+            self.__checkSize(len(received))
+            return received
+
+        received = bytearray()
+        buffer = await reader.read(self.bufferSize)
+        while buffer:
+            received += buffer
+            self.__checkSize(len(received))
+            buffer = await reader.read(self.bufferSize)
+        return bytes(received)
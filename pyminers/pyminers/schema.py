@@ -0,0 +1,286 @@
+# -*- coding: utf-8 -*-
+
+"""Модуль содержит компилятор шаблонов для проверки ответов майнеров.
+
+Шаблоны записываются в формате validictory и поддерживают
+используемое майнерами подмножество: type, properties,
+patternProperties, items, minItems, maxItems, enum, format
+('utc-millisec'), required и blank. Как и в validictory, поля
+по умолчанию обязательны, а пустые строки недопустимы.
+
+Шаблон компилируется один раз в набор вложенных функций
+с заранее скомпилированными регулярными выражениями, поэтому
+проверка ответа не требует повторного разбора шаблона.
+"""
+
+import functools
+import re
+
+from decimal import Decimal
+
+
+class ValidationError(ValueError):
+    """Ответ майнера не соответствует шаблону"""
+
+    def __init__(self, message, path, value):
+        super().__init__(
+            "Value {value!r} for field '{path}' {message}".format(
+                value=value, path=path, message=message,
+            ),
+        )
+
+
+# Проверки типов, совпадают с проверками validictory
+_TYPES = {
+    'string': lambda value: isinstance(value, str),
+    'integer': lambda value: type(value) is int,
+    'number': lambda value: type(value) in (int, float, Decimal),
+    'boolean': lambda value: type(value) is bool,
+    'object': lambda value: isinstance(value, dict),
+    'array': lambda value: isinstance(value, (list, tuple)),
+    'null': lambda value: value is None,
+    'any': lambda value: True,
+}
+
+
+def compileSchema(schema, disallowUnknown=False):
+    """Компилирует шаблон в функцию проверки
+
+    Аргументы:
+    schema: шаблон в формате validictory
+    disallowUnknown: запретить поля, не описанные в properties
+
+    return:
+    функция, принимающая разобранный ответ и вызывающая
+    ValidationError при несоответствии шаблону
+    """
+    check = _compile(schema, disallowUnknown, 'data')
+
+    def validate(value):
+        """Проверяет ответ на соответствие шаблону"""
+        check(value)
+
+    return validate
+
+
+def _compile(schema, strict, path):
+    """Компилирует шаблон поля в функцию check(value),
+    путь к полю в сообщениях об ошибках известен заранее
+    """
+    if not isinstance(schema, dict):
+        raise ValueError(
+            "schema must be dict, got '{type}'".format(
+                type=type(schema).__name__,
+            ),
+        )
+
+    checks = []
+
+    if 'type' in schema:
+        checks.append(_compileType(schema['type'], strict, path))
+
+    if 'enum' in schema:
+        options = schema['enum']
+        blank = schema.get('blank', False)
+
+        def checkEnum(value):
+            if value is not None and value not in options \
+                    and not (value == '' and blank):
+                raise ValidationError(
+                    "is not in the enumeration: {!r}".format(options),
+                    path, value,
+                )
+        checks.append(checkEnum)
+
+    if schema.get('format') == 'utc-millisec':
+        def checkFormat(value):
+            if value is not None and (
+                    not isinstance(value, (int, float, Decimal))
+                    or value <= 0):
+                raise ValidationError("is not a positive number", path, value)
+        checks.append(checkFormat)
+
+    if not schema.get('blank', False):
+        def checkBlank(value):
+            if value == '':
+                raise ValidationError("cannot be blank", path, value)
+        checks.append(checkBlank)
+
+    if 'minItems' in schema:
+        minimum = schema['minItems']
+
+        def checkMinItems(value):
+            if isinstance(value, (str, list, tuple)) and len(value) < minimum:
+                raise ValidationError(
+                    "must have length greater than or equal"
+                    " to {}".format(minimum),
+                    path, value,
+                )
+        checks.append(checkMinItems)
+
+    if 'maxItems' in schema:
+        maximum = schema['maxItems']
+
+        def checkMaxItems(value):
+            if isinstance(value, (str, list, tuple)) and len(value) > maximum:
+                raise ValidationError(
+                    "must have length less than or equal"
+                    " to {}".format(maximum),
+                    path, value,
+                )
+        checks.append(checkMaxItems)
+
+    if 'items' in schema:
+        checks.append(_compileItems(schema['items'], strict, path))
+
+    if 'properties' in schema:
+        checks.append(_compileProperties(schema['properties'], strict, path))
+
+    if 'patternProperties' in schema:
+        checks.append(
+            _compilePatterns(schema['patternProperties'], strict, path),
+        )
+
+    if len(checks) == 1:
+        return checks[0]
+
+    def check(value):
+        for item in checks:
+            item(value)
+
+    return check
+
+
+def _compileType(fieldtype, strict, path):
+    """Компилирует проверку типа поля"""
+    if isinstance(fieldtype, (list, tuple)):
+        # Значение должно соответствовать хотя бы одному из типов
+        subtypes = [_compileType(item, strict, path) for item in fieldtype]
+
+        def checkTypes(value):
+            for subtype in subtypes:
+                try:
+                    subtype(value)
+                    return None
+                except ValidationError:
+                    pass
+            raise ValidationError(
+                "doesn't match any of subtypes in {}".format(fieldtype),
+                path, value,
+            )
+        return checkTypes
+
+    if isinstance(fieldtype, dict):
+        # Тип задан вложенным шаблоном
+        return _compile(fieldtype, strict, path)
+
+    try:
+        isType = _TYPES[fieldtype]
+    except KeyError:
+        raise ValueError(
+            "field type '{type}' is not supported".format(type=fieldtype),
+        ) from None
+
+    def checkType(value):
+        if not isType(value):
+            raise ValidationError(
+                "is not of type {}".format(fieldtype), path, value,
+            )
+    return checkType
+
+
+def _compileItems(items, strict, path):
+    """Компилирует проверку элементов списка"""
+    if isinstance(items, (list, tuple)):
+        # Каждый элемент проверяется своим шаблоном
+        checks = [
+            _compile(item, strict, '{path}[{index}]'.format(
+                path=path, index=index))
+            for index, item in enumerate(items)
+        ]
+
+        def checkItemsList(value):
+            if not isinstance(value, (list, tuple)):
+                return None
+            if len(value) != len(checks):
+                raise ValidationError(
+                    "is not of same length as schema list", path, value,
+                )
+            for check, item in zip(checks, value):
+                check(item)
+        return checkItemsList
+
+    # Все элементы проверяются одним шаблоном
+    check = _compile(items, strict, path + '[]')
+
+    def checkItems(value):
+        if not isinstance(value, (list, tuple)):
+            return None
+        for item in value:
+            check(item)
+    return checkItems
+
+
+def _compileProperties(properties, strict, path):
+    """Компилирует проверку полей объекта"""
+    fields = [
+        (name,
+         _compile(schema, strict, '{path}.{name}'.format(
+             path=path, name=name)),
+         schema.get('required', True))
+        for name, schema in properties.items()
+    ]
+    known = frozenset(properties)
+
+    def checkProperties(value):
+        if not isinstance(value, dict):
+            return None
+        if strict:
+            unknown = value.keys() - known
+            if unknown:
+                raise ValidationError(
+                    "has unknown properties: {}".format(
+                        ', '.join(sorted(unknown)),
+                    ),
+                    path, value,
+                )
+        for name, check, required in fields:
+            try:
+                item = value[name]
+            except KeyError:
+                if required:
+                    raise ValidationError(
+                        "is missing required field '{}'".format(name),
+                        path, value,
+                    ) from None
+                continue
+            check(item)
+    return checkProperties
+
+
+def _compilePatterns(patterns, strict, path):
+    """Компилирует проверку полей объекта, имена
+    которых соответствуют регулярным выражениям
+    """
+    fields = [
+        (re.compile(pattern),
+         _compile(schema, strict, '{path}.{pattern}'.format(
+             path=path, pattern=pattern)))
+        for pattern, schema in patterns.items()
+    ]
+
+    # Имена полей в ответах майнеров повторяются от ответа к ответу,
+    # поэтому проверки, подходящие имени, вычисляются один раз
+    @functools.lru_cache(maxsize=1024)
+    def matching(name):
+        return tuple(
+            check for pattern, check in fields if pattern.match(name)
+        )
+
+    def checkPatterns(value):
+        if not isinstance(value, dict):
+            return None
+        for name, item in value.items():
+            for check in matching(name):
+                check(item)
+    return checkPatterns
@@ -4,9 +4,7 @@
 
 import datetime
 
-from copy import deepcopy
 import queue as Queue
-import threading
 
 from validictory import validate
 
@@ -15,12 +13,14 @@ from .etherium import Etherium
 from .monero import Monero
 from .cgminer import CGMiner
 from .miner import Miner
+from .health import HealthTracker
+from .workerpool import WorkerPool
 
 
 class Sender():
     """Опрашивает майнеры из переданного списка"""
 
-    def __init__(self, miners):
+    def __init__(self, miners, workers=None, health=None):
         """Аргументы:
            miners: список для опроса майнеров в формате dict:
                {'id': {'Host': str, 'Port': int,
@@ -34,6 +34,13 @@ class Sender():
                Request - тип запроса
                Timeout - таймаут ожидания ответа от майнера
                Description - описание хоста (необязательное поле)
+           workers: пул нитей WorkerPool для выполнения запросов,
+               может использоваться несколькими экземплярами Sender.
+               Если не задан, на время опроса создается собственный пул
+               с отдельной нитью для каждого запроса
+           health: история опроса HealthTracker, используется для
+               вычисления времени ожидания ответа и пропуска
+               недоступных майнеров, сохраняется между циклами опроса
         """
 
         self.__supportedMiners = {
@@ -70,12 +77,54 @@ class Sender():
 
         self.__results = {}
         self.miners = miners
+        self.workers = workers
+        self.health = health
 
     @property
     def supportedMiners(self):
         """Поддерживаемые майнеры"""
         return self.__supportedMiners.keys()
 
+    @property
+    def workers(self):
+        """Пул нитей для выполнения запросов"""
+        try:
+            return self.__workers
+        except AttributeError:
+            return None
+
+    @workers.setter
+    def workers(self, value):
+        """Пул нитей для выполнения запросов,
+        должен быть экземпляром WorkerPool или None
+        """
+        if value is None or isinstance(value, WorkerPool):
+            self.__workers = value
+        else:
+            raise ValueError(
+                "workers must be WorkerPool instance or None",
+            )
+
+    @property
+    def health(self):
+        """История опроса майнеров"""
+        try:
+            return self.__health
+        except AttributeError:
+            return None
+
+    @health.setter
+    def health(self, value):
+        """История опроса майнеров,
+        должна быть экземпляром HealthTracker или None
+        """
+        if value is None or isinstance(value, HealthTracker):
+            self.__health = value
+        else:
+            raise ValueError(
+                "health must be HealthTracker instance or None",
+            )
+
     @property
     def miners(self):
         """Список параметров опроса майненров в формате dict:
@@ -84,9 +133,15 @@ class Sender():
                  'Miner': str, 'Request': (str | list),
                  'Timeout': int, 'Description': str, }, }, ]
         Поле 'Description' не обязательно
+
+        Возвращается копия настроек, ее изменение не влияет
+        на опрос, поле 'Request' всегда является кортежем
         """
         try:
-            return deepcopy(self.__miners)
+            return {
+                name: dict(settings)
+                for name, settings in self.__miners.items()
+            }
         except AttributeError:
             return None
 
@@ -129,87 +184,197 @@ class Sender():
                     )
                 ) from None
 
-        self.__miners = deepcopy(value)
-
-        # Создаем список запросов к майнеру
-        for item in value:
-            if isinstance(value[item]['Request'], str):
-                self.__miners[item]['Request'] = [
-                    self.__miners[item]['Request'],
-                ]
+        # Сохраняем копию настроек,
+        # каждому майнеру соответсвует кортеж запросов
+        self.__miners = {
+            item: dict(
+                value[item],
+                Request=(
+                    (value[item]['Request'], )
+                    if isinstance(value[item]['Request'], str)
+                    else tuple(value[item]['Request'])
+                ),
+            )
+            for item in value
+        }
 
     @property
     def results(self):
-        """Результаты опроса майнеров в формате dict"""
-        try:
-            return deepcopy(self.__results)
-        except AttributeError:
-            return None
+        """Результаты опроса майнеров в формате dict:
+
+        {'id': {'Exchange': [{'Request': dict, 'Response': dict,
+                              'When': datetime, 'Error': bool}, ], }, }
+
+        Возвращается поверхностная копия: словари и списки
+        создаются заново, разобранные ответы майнеров не копируются
+        """
+        return {
+            name: {'Exchange': self.__exchanges(name)}
+            for name in self.__results
+        }
 
     @property
     def union(self):
         """Результаты опроса майнеров, в формате dict
-        с параметрами запросов и полученными ответами
+        с параметрами запросов и полученными ответами.
+        Формируется за один проход без копирования ответов
         """
-        union = self.results
-        # Порядок ключей в возвращаемом словаре
-        keys = ['Host', 'Port', 'Miner', 'Exchange', 'Description']
-        # Объединяем словари с настройками запросов к майнерам и ответами
-        for name in union:
-            union[name].update(self.miners[name])
-            union[name] = {
-                key: union[name][key]
-                for key in (
-                    keys if 'Description' in self.miners[name] else keys[:-1]
-                )
-            }
-        return union
+        return {name: self.__unite(name) for name in self.__results}
+
+    def __unite(self, name):
+        """Объединяет параметры запросов к майнеру
+        и полученные ответы в одну запись
+        """
+        settings = self.__miners[name]
+        # Порядок ключей в возвращаемой записи
+        keys = ('Host', 'Port', 'Miner', 'Exchange', 'Description')
+        return {
+            key: (
+                self.__exchanges(name) if key == 'Exchange'
+                else settings[key]
+            )
+            for key in keys
+            if key in settings or key == 'Exchange'
+        }
+
+    def __exchanges(self, name):
+        """Копия записей 'Exchange' майнера без копирования ответов"""
+        return [dict(exchange) for exchange in self.__results[name]]
 
     def sendRequests(self):
         """Опрашивает майнеры"""
+        for _ in self.iterResults():
+            pass
+
+    def iterResults(self):
+        """Опрашивает майнеры и возвращает результаты опроса
+        каждого майнера сразу после выполнения всех запросов к нему,
+        не дожидаясь ответа от остальных майнеров
+
+        return:
+        генератор кортежей (имя сервера, запись в формате union)
+        """
+        # Количество невыполненных запросов к каждому майнеру
+        pending = {
+            name: len(settings['Request'])
+            for name, settings in self.__miners.items()
+        }
+
+        # Майнеры в состоянии ожидания не опрашиваются
+        available = {
+            name: self.health is None or self.health.available(name)
+            for name in pending
+        }
+        miners, skipped = [], []
+        for name, miner in self._createMiners():
+            if available[name]:
+                miners.append((name, miner))
+            else:
+                miner.errorResponse(
+                    ConnectionError(
+                        "miner skipped after repeated failures",
+                    ),
+                    None,
+                )
+                skipped.append((name, miner))
+
+        # Пропущенные майнеры возвращаются до начала опроса,
+        # их результаты известны сразу
+        for name, miner in skipped:
+            self._saveExchange(name, miner)
+            pending[name] -= 1
+            if not pending[name]:
+                yield name, self.__unite(name)
 
-        def sendOne():
-            """Выполняет запросы к майнерам из очереди"""
-            # Берем из очереди экземпляр майнера и имя сервера
-            name, miner = queue.get()
-            # Делаем запрос
-            miner.sendRequest()
-            # Сохраняем результаты
-            with lock:
-                exchange = {
-                    'Request': miner.request,
-                    'Response': miner.response,
-                    'When': datetime.datetime.now(),
-                    'Error': miner.error,
-                }
-                if name not in self.__results:
-                    self.__results[name] = {}
-                    self.__results[name]['Exchange'] = [exchange, ]
-                else:
-                    self.__results[name]['Exchange'].append(exchange)
-
-            # Сообщаем о выполнении задания
-            queue.task_done()
-
-        # Очеред задания опроса майнеров
-        queue = Queue.Queue()
-        # Замок на добавление данных
-        lock = threading.Lock()
+        # Итог опроса каждого майнера за цикл: ошибка соединения
+        # хотя бы в одном запросе и наибольшее время выполнения.
+        # История обновляется один раз за цикл для каждого майнера
+        failed, elapsed = {}, {}
+        for name, miner in self._iterCompleted(miners):
+            failed[name] = failed.get(name, False) or miner.unreachable
+            if miner.elapsed is not None:
+                elapsed[name] = max(elapsed.get(name, 0.0), miner.elapsed)
+            self._saveExchange(name, miner)
+            pending[name] -= 1
+            if not pending[name]:
+                if self.health is not None:
+                    self.health.update(
+                        name, elapsed.get(name), failed[name],
+                    )
+                yield name, self.__unite(name)
+
+    def _iterCompleted(self, miners):
+        """Выполняет запросы к майнерам
+
+        Аргументы:
+        miners: список кортежей (имя сервера, экземпляр майнера)
+
+        return:
+        генератор кортежей (имя сервера, экземпляр майнера)
+        в порядке выполнения запросов
+        """
+
+        def sendOne(name, miner):
+            """Выполняет запрос к майнеру"""
+            try:
+                # Делаем запрос
+                miner.sendRequest()
+            finally:
+                # Сообщаем о выполнении задания
+                done.put((name, miner))
+
+        # Очередь выполненных запросов
+        done = Queue.Queue()
+        miners = list(miners)
+        # Собственный пул создается, только если не передан общий.
+        # Его размер не ограничен: каждому запросу отдельная нить
+        workers = self.workers or WorkerPool(size=max(len(miners), 1))
+        try:
+            # Добавляем задания в очередь пула
+            count = 0
+            for name, miner in miners:
+                workers.submit(sendOne, name, miner)
+                count += 1
+            # Возвращаем запросы по мере выполнения
+            for _ in range(count):
+                yield done.get()
+        finally:
+            if workers is not self.workers:
+                workers.shutdown(wait=False)
+
+    def _createMiners(self):
+        """Создает экземпляры майнеров для каждого запроса
+
+        return:
+        генератор кортежей (имя сервера, экземпляр майнера)
+        """
         # Для к каждого майнера из списка
-        for name, settings in self.miners.items():
+        for name, settings in self.__miners.items():
+            # Время ожидания ответа по истории опроса майнера
+            timeout = settings['Timeout'] if self.health is None \
+                else self.health.timeout(name, settings['Timeout'])
             # Для каждого запроса
             for request in settings['Request']:
                 miner = self.__supportedMiners[settings['Miner']](
                     settings['Host'],
                     settings['Port'],
                     request,
-                    settings['Timeout']
+                    timeout,
                 )
-                # Добавляем задание в очередь
-                queue.put((name, miner))
-                # Создаем отдельную нить
-                thread = threading.Thread(target=sendOne)
-                thread.daemon = True
-                thread.start()
-        # Ожидаем выполнения всех заданий
-        queue.join()
+                yield name, miner
+
+    def _saveExchange(self, name, miner):
+        """Сохраняет результат выполненного запроса к майнеру.
+        Ответ на составной запрос сохраняется отдельно для каждой команды
+        """
+        when = datetime.datetime.now()
+        self.__results.setdefault(name, []).extend(
+            {
+                'Request': request,
+                'Response': response,
+                'When': when,
+                'Elapsed': miner.elapsed,
+                'Error': miner.error,
+            }
+            for request, response in miner.split()
+        )
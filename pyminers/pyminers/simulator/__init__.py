@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+
+"""
+Имитаторы майнеров для нагрузочного тестирования.
+    Позволяет запустить на адресах localhost тысячи имитаторов,
+    отвечающих в формате API майнеров, поддерживаемых pyminers,
+    с настраиваемой задержкой, потерей запросов, медленным
+    закрытием соединения и ответами с нарушенным форматом.
+
+    Запуск из командной строки:
+        python -m pyminers.simulator --cgminer 1000 --latency 0.05"""
+
+from .endpoint import (
+    Endpoint, CGMinerEndpoint, EtheriumEndpoint, MoneroEndpoint, ZCashEndpoint,
+)
+from .farm import Farm
+
+__all__ = ['Endpoint', 'CGMinerEndpoint', 'EtheriumEndpoint',
+           'MoneroEndpoint', 'ZCashEndpoint', 'Farm']
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+
+"""Запускает имитаторы майнеров до получения сигнала остановки.
+Параметры опроса имитаторов для Sender выводятся в stdout в формате json
+"""
+
+import argparse
+import json
+import signal
+import sys
+import threading
+
+from .farm import Farm
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m pyminers.simulator',
+        description='Запускает имитаторы майнеров на адресах localhost',
+    )
+    for name in ('CGMiner', 'Etherium', 'Monero', 'ZCash'):
+        parser.add_argument(
+            '--' + name.lower(), type=int, default=0, metavar='N',
+            help='количество имитаторов {miner}'.format(miner=name),
+        )
+    parser.add_argument('--network', default='127.0.0.0/8',
+                        help='сеть для адресов имитаторов')
+    parser.add_argument('--port', type=int, default=0,
+                        help='порт имитаторов, 0 - выбирается системой')
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='задержка ответа (секунд)')
+    parser.add_argument('--jitter', type=float, default=0.0,
+                        help='отклонение задержки ответа (секунд)')
+    parser.add_argument('--drop', type=float, default=0.0,
+                        help='доля запросов без ответа')
+    parser.add_argument('--slow-close', type=float, default=0.0,
+                        help='задержка закрытия соединения (секунд)')
+    parser.add_argument('--malformed', type=float, default=0.0,
+                        help='доля ответов с нарушенным форматом')
+    parser.add_argument('--no-antminer-bug', action='store_true',
+                        help='не воспроизводить ошибку Antminer')
+    parser.add_argument('--timeout', type=int, default=5,
+                        help='время ожидания ответа в параметрах опроса')
+    parser.add_argument('--seed', type=int, default=None,
+                        help='начальное значение генератора случайных чисел')
+    args = parser.parse_args(argv)
+
+    farm = Farm(
+        {
+            'CGMiner': args.cgminer,
+            'Etherium': args.etherium,
+            'Monero': args.monero,
+            'ZCash': args.zcash,
+        },
+        network=args.network,
+        port=args.port,
+        latency=args.latency,
+        jitter=args.jitter,
+        drop=args.drop,
+        slowClose=args.slow_close,
+        malformed=args.malformed,
+        antminerBug=not args.no_antminer_bug,
+        seed=args.seed,
+    )
+
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *args: stop.set())
+    signal.signal(signal.SIGINT, lambda *args: stop.set())
+
+    with farm:
+        json.dump(farm.settings(args.timeout), sys.stdout)
+        sys.stdout.write('\n')
+        sys.stdout.flush()
+        while not stop.wait(1):
+            pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,320 @@
+# -*- coding: utf-8 -*-
+
+"""Модуль содержит реализацию имитаторов API майнеров"""
+
+import json
+import random
+import time
+
+
+class Endpoint():
+    """Имитатор API майнера, формирует ответы на запросы.
+    Базовый класс отвечает на любой запрос пустым объектом
+    """
+
+    # Тип майнера в pyminers
+    miner = 'Miner'
+    # Запрос по умолчанию для Sender
+    request = '{}'
+    # Признак окончания ответа
+    terminator = b''
+
+    def __init__(self, name, seed=None):
+        """Аргументы:
+        name: имя майнера
+        seed: начальное значение генератора случайных чисел,
+            определяет параметры работы майнера
+        """
+        self.name = name
+        self.random = random.Random(seed)
+        # Время запуска майнера
+        self.started = int(time.time()) - self.random.randint(60, 86400)
+
+    @property
+    def elapsed(self):
+        """Время работы майнера (секунд)"""
+        return int(time.time()) - self.started
+
+    def reply(self, request):
+        """Формирует ответ на запрос
+
+        Аргументы:
+        request: разобранный запрос в формате dict
+
+        return:
+        ответ в виде bytes или None, если ответ не предусмотрен API
+        """
+        return self.encode({})
+
+    def encode(self, value):
+        """Кодирует ответ и добавляет признак окончания"""
+        return json.dumps(value).encode('utf-8') + self.terminator
+
+
+class CGMinerEndpoint(Endpoint):
+    """Имитатор API CGMiner 4.9.0 на Antminer S9"""
+
+    miner = 'CGMiner'
+    request = 'Summary+Stats'
+    terminator = b'\x00'
+
+    def __init__(self, name, seed=None, antminerBug=True):
+        """Аргументы:
+        name: имя майнера
+        seed: начальное значение генератора случайных чисел
+        antminerBug: воспроизводить ошибку Antminer - объекты
+            в списке STATS не разделяются запятой
+        """
+        super().__init__(name, seed)
+        self.antminerBug = antminerBug
+        self.hashrate = round(self.random.uniform(13000, 14000), 2)
+
+    def reply(self, request):
+        """Формирует ответ на запрос CGMiner API"""
+        command = request.get('command') \
+            if isinstance(request, dict) else None
+        commands = command.split('+') if isinstance(command, str) else []
+        handlers = {'summary': self.summary, 'stats': self.stats}
+
+        if not commands or not all(item in handlers for item in commands):
+            return self.encode({
+                "STATUS": [self.status('E', 14, "Invalid command")],
+                "id": 1,
+            })
+
+        if len(commands) == 1:
+            return self.encode(handlers[commands[0]]())
+
+        # Составной запрос: ответ на каждую команду
+        # в виде списка из одного элемента
+        return self.encode(dict(
+            {item: [handlers[item]()] for item in commands},
+            id=1,
+        ))
+
+    def encode(self, value):
+        """Кодирует ответ, при необходимости воспроизводя
+        ошибку Antminer в списке STATS
+        """
+        data = super().encode(value)
+        return data.replace(
+            b', "__split__": 0, ',
+            b'}{' if self.antminerBug else b', ',
+        )
+
+    def status(self, status, code, message):
+        """Поле STATUS ответа"""
+        return {
+            "STATUS": status,
+            "When": int(time.time()),
+            "Code": code,
+            "Msg": message,
+            "Description": "cgminer 4.9.0",
+        }
+
+    def summary(self):
+        """Ответ на команду summary"""
+        elapsed = self.elapsed
+        accepted = elapsed // 4
+        return {
+            "STATUS": [self.status('S', 11, "Summary")],
+            "SUMMARY": [{
+                "Elapsed": elapsed,
+                "GHS 5s": "{:.2f}".format(
+                    self.hashrate * self.random.uniform(0.97, 1.03)),
+                "GHS av": self.hashrate,
+                "Found Blocks": 0,
+                "Getworks": elapsed // 30,
+                "Accepted": accepted,
+                "Rejected": accepted // 500,
+                "Hardware Errors": elapsed // 360,
+                "Utility": 15.0,
+                "Discarded": elapsed // 12,
+                "Stale": 0,
+                "Get Failures": 0,
+                "Local Work": elapsed,
+                "Remote Failures": 0,
+                "Network Blocks": elapsed // 600,
+                "Total MH": self.hashrate * 1000.0 * elapsed,
+                "Work Utility": 190000.0,
+                "Difficulty Accepted": accepted * 16384.0,
+                "Difficulty Rejected": accepted // 500 * 16384.0,
+                "Difficulty Stale": 0.0,
+                "Best Share": 1000000,
+                "Device Hardware%": 0.0001,
+                "Device Rejected%": 0.2,
+                "Pool Rejected%": 0.2,
+                "Pool Stale%": 0.0,
+                "Last getwork": int(time.time()),
+            }],
+            "id": 1,
+        }
+
+    def stats(self):
+        """Ответ на команду stats. Первый элемент списка STATS
+        содержит описание майнера, остальные поля Antminer передает
+        отдельным объектом без разделяющей запятой
+        """
+        stats = {
+            "BMMiner": "2.0.0",
+            "Miner": "16.8.1.3",
+            "CompileTime": "Fri Nov 17 17:37:49 CST 2017",
+            "Type": "Antminer S9",
+            # Место ошибки Antminer
+            "__split__": 0,
+            "STATS": 0,
+            "ID": "BC50",
+            "Elapsed": self.elapsed,
+            "Calls": 0,
+            "Wait": 0.0,
+            "Max": 0.0,
+            "Min": 99999999.0,
+            "GHS 5s": "{:.2f}".format(self.hashrate),
+            "GHS av": self.hashrate,
+            "miner_count": 3,
+            "frequency": "650",
+            "fan_num": 2,
+            "temp_num": 3,
+            "total_rateideal": 13500.0,
+            "total_freqavg": 650.0,
+            "total_acn": 189,
+            "total_rate": self.hashrate,
+            "temp_max": 0,
+            "Device Hardware%": 0.0001,
+            "no_matching_work": 0,
+            "miner_version": "16.8.1.3",
+            "miner_id": "801c4c9e4d5c8118",
+        }
+        for fan in (3, 6):
+            stats['fan{}'.format(fan)] = self.random.randint(5000, 6000)
+        for chain in (6, 7, 8):
+            temp = self.random.randint(55, 70)
+            stats['temp{}'.format(chain)] = temp
+            stats['temp2_{}'.format(chain)] = temp + 15
+            stats['temp_max'] = max(stats['temp_max'], temp + 15)
+            stats['freq_avg{}'.format(chain)] = 650.0
+            stats['chain_rateideal{}'.format(chain)] = 4500.0
+            stats['chain_acn{}'.format(chain)] = 63
+            stats['chain_acs{}'.format(chain)] = " oooooooo oooooooo"
+            stats['chain_hw{}'.format(chain)] = 0
+            stats['chain_rate{}'.format(chain)] = "{:.2f}".format(
+                self.hashrate / 3)
+        return {
+            "STATUS": [self.status('S', 70, "CGMiner stats")],
+            "STATS": [stats],
+            "id": 1,
+        }
+
+
+class EtheriumEndpoint(Endpoint):
+    """Имитатор API Claymore's Dual Ethereum AMD GPU Miner v 9.8.
+    Ответ считается полученным при закрытии соединения
+    """
+
+    miner = 'Etherium'
+    request = 'Statistic'
+    version = '9.8 - ETH'
+
+    def __init__(self, name, seed=None, gpus=6):
+        """Аргументы:
+        name: имя майнера
+        seed: начальное значение генератора случайных чисел
+        gpus: количество GPU
+        """
+        super().__init__(name, seed)
+        self.gpus = gpus
+
+    def reply(self, request):
+        """Формирует ответ на запрос Claymore API,
+        на команды управления майнер не отвечает
+        """
+        method = request.get('method') if isinstance(request, dict) else None
+        if method != 'miner_getstat1':
+            return None
+
+        rates = [self.random.randint(29000, 31000) for _ in range(self.gpus)]
+        minutes = self.elapsed // 60
+        shares = minutes * len(rates) // 3
+        gpu = []
+        for _ in rates:
+            gpu.extend([self.random.randint(55, 75),
+                        self.random.randint(40, 80)])
+
+        return self.encode({
+            "id": 0,
+            "error": None,
+            "result": [
+                self.version,
+                str(minutes),
+                "{};{};{}".format(sum(rates), shares, shares // 200),
+                ';'.join(str(rate) for rate in rates),
+                "0;0;0",
+                ';'.join('off' for _ in rates),
+                ';'.join(str(item) for item in gpu),
+                "eth-eu1.nanopool.org:9999",
+                "0;0;0;0",
+            ],
+        })
+
+
+class MoneroEndpoint(EtheriumEndpoint):
+    """Имитатор API Claymore's CryptoNote GPU Miner v9.7"""
+
+    miner = 'Monero'
+    version = '9.7 - XMR'
+
+
+class ZCashEndpoint(Endpoint):
+    """Имитатор API EWBF's CUDA ZCash miner v 0.3.4b"""
+
+    miner = 'ZCash'
+    request = 'Statistic'
+    terminator = b'\n'
+
+    def __init__(self, name, seed=None, gpus=6):
+        """Аргументы:
+        name: имя майнера
+        seed: начальное значение генератора случайных чисел
+        gpus: количество GPU
+        """
+        super().__init__(name, seed)
+        self.gpus = gpus
+
+    def reply(self, request):
+        """Формирует ответ на запрос EWBF API"""
+        method = request.get('method') if isinstance(request, dict) else None
+        if method != 'getstat':
+            return self.encode({
+                "id": request.get('id', 0)
+                if isinstance(request, dict) else 0,
+                "method": method,
+                "error": "unknown method",
+            })
+
+        shares = self.elapsed // 60
+        return self.encode({
+            "id": request.get('id', 0),
+            "method": "getstat",
+            "error": None,
+            "start_time": self.started,
+            "current_server": "zec-eu1.nanopool.org:6666",
+            "available_servers": 1,
+            "server_status": 2,
+            "result": [
+                {
+                    "gpuid": gpu,
+                    "cudaid": gpu,
+                    "busid": "0000:0{}:00.0".format(gpu + 1),
+                    "name": "GeForce GTX 1080 Ti",
+                    "gpu_status": 2,
+                    "solver": 0,
+                    "temperature": self.random.randint(55, 75),
+                    "gpu_power_usage": self.random.randint(180, 250),
+                    "speed_sps": self.random.randint(700, 760),
+                    "accepted_shares": shares,
+                    "rejected_shares": shares // 300,
+                    "start_time": self.started,
+                }
+                for gpu in range(self.gpus)
+            ],
+        })
@@ -0,0 +1,265 @@
+# -*- coding: utf-8 -*-
+
+"""Модуль содержит реализацию класса Farm"""
+
+import asyncio
+import ipaddress
+import json
+import random
+import threading
+
+from .endpoint import (
+    Endpoint, CGMinerEndpoint, EtheriumEndpoint, MoneroEndpoint, ZCashEndpoint,
+)
+
+
+class Farm():
+    """Запускает множество имитаторов майнеров на адресах localhost.
+    Все имитаторы обслуживаются одним циклом событий asyncio
+    в отдельной нити
+    """
+
+    # Имитаторы майнеров
+    __types = {
+        'CGMiner': CGMinerEndpoint,
+        'Etherium': EtheriumEndpoint,
+        'Monero': MoneroEndpoint,
+        'ZCash': ZCashEndpoint,
+        'Miner': Endpoint,
+    }
+
+    def __init__(self, miners, network='127.0.0.0/8', port=0,
+                 latency=0.0, jitter=0.0, drop=0.0, slowClose=0.0,
+                 malformed=0.0, antminerBug=True, seed=None):
+        """Аргументы:
+        miners: количество имитаторов каждого типа в формате dict:
+            {'CGMiner': int, 'Etherium': int, 'Monero': int, 'ZCash': int}
+        network: сеть, адреса которой назначаются имитаторам
+            (начиная со второго адреса), должна быть локальной
+        port: порт имитаторов, 0 - выбирается системой
+        latency: задержка ответа (секунд)
+        jitter: случайное отклонение задержки ответа (секунд)
+        drop: доля запросов, оставленных без ответа (0..1)
+        slowClose: задержка закрытия соединения после ответа (секунд)
+        malformed: доля ответов с нарушенным форматом (0..1)
+        antminerBug: воспроизводить ошибку Antminer в ответе CGMiner
+        seed: начальное значение генератора случайных чисел
+        """
+        for name, count in miners.items():
+            if name not in self.supportedMiners:
+                raise ValueError(
+                    "miner = '{miner}' not supported".format(miner=name),
+                )
+            if not isinstance(count, int) or count < 0:
+                raise ValueError(
+                    "miners count '{count}' must be "
+                    "non-negative integer".format(count=count),
+                )
+
+        network = ipaddress.ip_network(network)
+        if not network.is_loopback:
+            raise ValueError(
+                "network '{network}' must be loopback".format(
+                    network=network,
+                ),
+            )
+        if sum(miners.values()) > network.num_addresses - 2:
+            raise ValueError(
+                "network '{network}' is too small".format(network=network),
+            )
+
+        for name, value in (('drop', drop), ('malformed', malformed)):
+            if not 0 <= value <= 1:
+                raise ValueError(
+                    "{name} rate '{value}' must be "
+                    "in range 0..1".format(name=name, value=value),
+                )
+
+        self.port = port
+        self.latency = latency
+        self.jitter = jitter
+        self.drop = drop
+        self.slowClose = slowClose
+        self.malformed = malformed
+        self.random = random.Random(seed)
+
+        # Имитаторы с назначенными адресами
+        self.__endpoints = []
+        addresses = network.hosts()
+        # Первый адрес сети оставляем для других служб
+        next(addresses)
+        for name, count in miners.items():
+            for _ in range(count):
+                kwargs = {'antminerBug': antminerBug} \
+                    if name == 'CGMiner' else {}
+                endpoint = self.__types[name](
+                    '{miner}-{index:05d}'.format(
+                        miner=name.lower(),
+                        index=len(self.__endpoints) + 1,
+                    ),
+                    seed=self.random.random(),
+                    **kwargs
+                )
+                self.__endpoints.append(
+                    [endpoint, str(next(addresses)), port],
+                )
+
+        self.__loop = None
+        self.__thread = None
+        self.__servers = []
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    @property
+    def supportedMiners(self):
+        """Поддерживаемые майнеры"""
+        return self.__types.keys()
+
+    @property
+    def running(self):
+        """Имитаторы запущены"""
+        return self.__thread is not None
+
+    def settings(self, timeout=5):
+        """Параметры опроса имитаторов для Sender
+
+        Аргументы:
+        timeout: время ожидания ответа майнера
+
+        return:
+        список для опроса майнеров в формате dict
+        """
+        return {
+            endpoint.name: {
+                'Host': host,
+                'Port': port,
+                'Miner': endpoint.miner,
+                'Request': endpoint.request,
+                'Timeout': timeout,
+            }
+            for endpoint, host, port in self.__endpoints
+        }
+
+    def start(self):
+        """Запускает имитаторы, возвращает управление после того,
+        как все имитаторы готовы принимать подключения
+        """
+        if self.running:
+            return self
+
+        self.__loop = asyncio.new_event_loop()
+        ready = threading.Event()
+        errors = []
+
+        def run():
+            asyncio.set_event_loop(self.__loop)
+            try:
+                self.__loop.run_until_complete(self.__startServers())
+            except Exception as e:
+                errors.append(e)
+            ready.set()
+            if not errors:
+                self.__loop.run_forever()
+            self.__loop.run_until_complete(self.__stopServers())
+            self.__loop.close()
+
+        self.__thread = threading.Thread(target=run)
+        self.__thread.daemon = True
+        self.__thread.start()
+        ready.wait()
+
+        if errors:
+            self.__thread.join()
+            self.__thread = None
+            raise errors[0]
+        return self
+
+    def stop(self):
+        """Останавливает имитаторы"""
+        if not self.running:
+            return None
+        self.__loop.call_soon_threadsafe(self.__loop.stop)
+        self.__thread.join()
+        self.__thread = None
+
+    async def __startServers(self):
+        """Открывает порты всех имитаторов"""
+        for item in self.__endpoints:
+            endpoint, host, port = item
+
+            async def handle(reader, writer, endpoint=endpoint):
+                await self.__handle(endpoint, reader, writer)
+
+            server = await asyncio.start_server(handle, host, port)
+            self.__servers.append(server)
+            # Фактический порт, если выбран системой
+            item[2] = server.sockets[0].getsockname()[1]
+
+    async def __stopServers(self):
+        """Закрывает порты всех имитаторов"""
+        for server in self.__servers:
+            server.close()
+        for server in self.__servers:
+            await server.wait_closed()
+        self.__servers = []
+
+    async def __handle(self, endpoint, reader, writer):
+        """Обрабатывает подключение к имитатору"""
+        try:
+            request = await self.__readRequest(reader)
+
+            # Запрос остается без ответа, соединение закрывает клиент
+            if self.random.random() < self.drop:
+                while await reader.read(1024):
+                    pass
+                return None
+
+            delay = self.latency + self.random.uniform(
+                -self.jitter, self.jitter)
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            response = endpoint.reply(request)
+            if response is not None:
+                if self.random.random() < self.malformed:
+                    response = self.__corrupt(response, endpoint.terminator)
+                writer.write(response)
+                await writer.drain()
+
+            if self.slowClose > 0:
+                await asyncio.sleep(self.slowClose)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def __readRequest(reader):
+        """Читает запрос до получения корректного json"""
+        data = b''
+        while True:
+            chunk = await reader.read(4096)
+            if not chunk:
+                raise asyncio.IncompleteReadError(data, None)
+            data += chunk
+            try:
+                return json.loads(data.strip(b'\x00\r\n ').decode('utf-8'))
+            except ValueError:
+                continue
+
+    def __corrupt(self, response, terminator):
+        """Нарушает формат ответа: обрезает его
+        или заменяет часть данных мусором
+        """
+        body = response[:len(response) - len(terminator)] \
+            if terminator else response
+        if self.random.random() < 0.5:
+            body = body[:self.random.randint(1, max(len(body) - 1, 1))]
+        else:
+            position = self.random.randint(0, max(len(body) - 8, 0))
+            body = body[:position] + b'\xff{]"\x01' + body[position + 5:]
+        return body + terminator
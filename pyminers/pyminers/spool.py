@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+
+"""Модуль содержит реализацию класса ZabbixSpool"""
+
+import logging
+import sqlite3
+import threading
+import time
+
+from pyzabbix import ZabbixMetric
+
+
+class ZabbixSpool():
+    """Очередь метрик Zabbix в файле SQLite.
+    Метрики добавляются в очередь без соединения с сервером,
+    нить отправки передает их серверу пакетами по batchSize с исходным
+    временем (clock) и удаляет из очереди доставленные. Если сервер
+    недоступен, метрики хранятся в очереди до восстановления связи,
+    в том числе между перезапусками службы
+    """
+
+    def __init__(self, path, delivery, batchSize=1000, interval=30,
+                 maxSize=1000000, log=None):
+        """Аргументы:
+        path: путь к файлу очереди
+        delivery: экземпляр ZabbixDelivery
+        batchSize: количество метрик, отправляемых за один раз
+        interval: пауза перед повторной отправкой после ошибки (секунд)
+        maxSize: максимальное количество метрик в очереди,
+            при переполнении удаляются самые старые
+        log: экземпляр logging.Logger
+        """
+        self.delivery = delivery
+        self.batchSize = batchSize
+        self.interval = interval
+        self.maxSize = maxSize
+        self.log = log or logging.getLogger(__name__)
+
+        # Соединение используется нитью опроса и нитью
+        # отправки, обращения к нему защищены замком
+        self.__lock = threading.Lock()
+        self.__connection = sqlite3.connect(path, check_same_thread=False)
+        self.__connection.execute('PRAGMA journal_mode=WAL')
+        self.__connection.execute('PRAGMA synchronous=NORMAL')
+        # AUTOINCREMENT: идентификаторы не используются повторно
+        # после удаления, поэтому порядок записей сохраняется
+        self.__connection.execute(
+            'CREATE TABLE IF NOT EXISTS metrics ('
+            'id INTEGER PRIMARY KEY AUTOINCREMENT, '
+            'host TEXT NOT NULL, '
+            'key TEXT NOT NULL, '
+            'value TEXT NOT NULL, '
+            'clock INTEGER NOT NULL)'
+        )
+
+        self.__wakeup = threading.Event()
+        self.__stop = threading.Event()
+        self.__thread = None
+
+    @property
+    def batchSize(self):
+        """Количество метрик, отправляемых за один раз"""
+        try:
+            return self.__batchSize
+        except AttributeError:
+            return None
+
+    @batchSize.setter
+    def batchSize(self, value):
+        """Количество метрик, отправляемых за один раз,
+        должно быть целым числом больше 0
+        """
+        if isinstance(value, int) and not isinstance(value, bool) \
+                and value > 0:
+            self.__batchSize = value
+        else:
+            raise ValueError(
+                "batch size '{size}' must be "
+                "positive integer".format(size=value),
+            )
+
+    @property
+    def pending(self):
+        """Количество метрик в очереди"""
+        with self.__lock:
+            return self.__connection.execute(
+                'SELECT count(*) FROM metrics',
+            ).fetchone()[0]
+
+    def put(self, metrics):
+        """Добавляет метрики в очередь, метрикам без
+        времени назначается текущее время
+
+        Аргументы:
+        metrics: список экземпляров ZabbixMetric
+
+        return:
+        количество добавленных метрик
+        """
+        now = int(time.time())
+        rows = [
+            (metric.host, metric.key, metric.value,
+             getattr(metric, 'clock', None) or now)
+            for metric in metrics
+        ]
+        if not rows:
+            return 0
+
+        with self.__lock, self.__connection:
+            self.__connection.executemany(
+                'INSERT INTO metrics (host, key, value, clock) '
+                'VALUES (?, ?, ?, ?)',
+                rows,
+            )
+            # Удаляем самые старые метрики при переполнении
+            dropped = self.__connection.execute(
+                'DELETE FROM metrics WHERE id <= '
+                '(SELECT max(id) FROM metrics) - ?',
+                (self.maxSize,),
+            ).rowcount
+
+        if dropped > 0:
+            self.log.warning(
+                "zabbix spool is full, {count} oldest "
+                "metrics dropped".format(count=dropped),
+            )
+        self.__wakeup.set()
+        return len(rows)
+
+    def drain(self):
+        """Отправляет метрики из очереди, пока она не
+        опустеет или отправка не завершится ошибкой
+
+        return:
+        количество доставленных метрик
+        """
+        delivered = 0
+        while True:
+            with self.__lock:
+                rows = self.__connection.execute(
+                    'SELECT id, host, key, value, clock FROM metrics '
+                    'ORDER BY id LIMIT ?',
+                    (self.batchSize,),
+                ).fetchall()
+            if not rows:
+                break
+
+            metrics = {
+                rowId: ZabbixMetric(host, key, value, clock)
+                for rowId, host, key, value, clock in rows
+            }
+            result = self.delivery.send(list(metrics.values()))
+
+            # Удаляем доставленные метрики, метрики,
+            # отклоненные сервером, повторно не отправляются
+            undelivered = {id(metric) for metric in result.undelivered}
+            done = [
+                (rowId,) for rowId, metric in metrics.items()
+                if id(metric) not in undelivered
+            ]
+            with self.__lock, self.__connection:
+                self.__connection.executemany(
+                    'DELETE FROM metrics WHERE id = ?', done,
+                )
+            delivered += len(done)
+
+            if undelivered:
+                break
+        return delivered
+
+    def start(self):
+        """Запускает нить отправки метрик"""
+        if self.__thread is not None:
+            return None
+        self.__stop.clear()
+        self.__thread = threading.Thread(target=self.__work)
+        self.__thread.daemon = True
+        self.__thread.start()
+
+    def stop(self, wait=True):
+        """Останавливает нить отправки, неотправленные
+        метрики остаются в очереди
+        """
+        self.__stop.set()
+        self.__wakeup.set()
+        if self.__thread is not None and wait:
+            self.__thread.join()
+        self.__thread = None
+
+    def close(self):
+        """Останавливает нить отправки и закрывает файл очереди"""
+        self.stop()
+        with self.__lock:
+            self.__connection.close()
+
+    def __work(self):
+        """Отправляет метрики при добавлении в очередь,
+        после ошибки повторяет отправку через interval
+        """
+        while not self.__stop.is_set():
+            self.__wakeup.clear()
+            try:
+                self.drain()
+            except Exception:
+                # Ошибка отправки не должна останавливать нить
+                self.log.exception("error on draining zabbix spool")
+
+            pending = self.pending
+            if pending:
+                self.log.warning(
+                    "{count} metrics pending in zabbix spool, "
+                    "retry in {interval} sec.".format(
+                        count=pending,
+                        interval=self.interval,
+                    ),
+                )
+                self.__stop.wait(self.interval)
+            else:
+                self.__wakeup.wait()
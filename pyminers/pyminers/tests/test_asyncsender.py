@@ -0,0 +1,143 @@
+import unittest
+import json
+import socket
+import socketserver
+import threading
+
+from pyminers.asyncsender import AsyncSender
+from pyminers.sender import Sender
+
+
+class EchoHandler(socketserver.BaseRequestHandler):
+    """Отвечает на запрос json объектом с текстом запроса"""
+
+    def handle(self):
+        request = self.request.recv(1024)
+        self.request.sendall(
+            json.dumps({"echo": request.decode()}).encode(),
+        )
+
+
+class AsyncSenderTest(unittest.TestCase):
+    """Тестирование опроса майнеров классом AsyncSender
+    """
+
+    def setUp(self):
+        self.server = socketserver.ThreadingTCPServer(
+            ('127.0.0.1', 0),
+            EchoHandler,
+        )
+        self.server.daemon_threads = True
+        thread = threading.Thread(target=self.server.serve_forever)
+        thread.daemon = True
+        thread.start()
+
+        # Свободный порт, на котором никто не слушает
+        sock = socket.socket()
+        sock.bind(('127.0.0.1', 0))
+        self.closed_port = sock.getsockname()[1]
+        sock.close()
+
+        self.miners = {
+            'rig1': {
+                'Host': '127.0.0.1',
+                'Port': self.server.server_address[1],
+                'Miner': 'Miner',
+                'Request': ['{"command": "a"}', '{"command": "b"}'],
+                'Timeout': 5,
+                'Description': 'Some rig',
+            },
+            'rig2': {
+                'Host': '127.0.0.1',
+                'Port': self.closed_port,
+                'Miner': 'Miner',
+                'Request': '{"command": "a"}',
+                'Timeout': 5,
+            },
+        }
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_limit_invalid(self):
+        """Недопустимое ограничение количества запросов
+        """
+        with self.assertRaises(ValueError):
+            AsyncSender(self.miners, limit=0)
+
+    def test_send_requests(self):
+        """Результаты опроса доступного и недоступного майнера
+        """
+        sender = AsyncSender(self.miners, limit=1)
+        sender.sendRequests()
+        results = sender.results
+
+        self.assertEqual(len(results['rig1']['Exchange']), 2)
+        for exchange in results['rig1']['Exchange']:
+            self.assertFalse(exchange['Error'])
+            self.assertDictEqual(
+                exchange['Response'],
+                {"echo": json.dumps(exchange['Request'])},
+            )
+
+        self.assertEqual(len(results['rig2']['Exchange']), 1)
+        self.assertTrue(results['rig2']['Exchange'][0]['Error'])
+
+    def test_union(self):
+        """Объединение параметров запросов и ответов
+        """
+        sender = AsyncSender(self.miners)
+        sender.sendRequests()
+        union = sender.union
+
+        self.assertEqual(union['rig1']['Description'], 'Some rig')
+        self.assertNotIn('Description', union['rig2'])
+        self.assertEqual(union['rig2']['Port'], self.closed_port)
+
+    def test_results_copy(self):
+        """Настройки и результаты опроса возвращаются в виде
+        копий, их изменение не влияет на состояние опроса
+        """
+        sender = AsyncSender(self.miners)
+        sender.sendRequests()
+
+        self.assertTupleEqual(
+            sender.miners['rig2']['Request'], ('{"command": "a"}', ),
+        )
+        sender.miners['rig1']['Port'] = 1
+        sender.results['rig1']['Exchange'][0]['Error'] = True
+        sender.union['rig1']['Exchange'].clear()
+        self.assertNotEqual(sender.miners['rig1']['Port'], 1)
+        self.assertFalse(sender.results['rig1']['Exchange'][0]['Error'])
+        self.assertEqual(len(sender.union['rig1']['Exchange']), 2)
+
+        # Результаты сериализуются в JSON без преобразования
+        json.dumps(sender.union, default=str)
+
+    def test_iter_results(self):
+        """Результаты опроса возвращаются по одному разу
+        для каждого майнера после выполнения всех запросов к нему
+        """
+        for sender in (Sender(self.miners), AsyncSender(self.miners)):
+            with self.subTest(sender=type(sender).__name__):
+                results = dict(sender.iterResults())
+
+                self.assertSetEqual(set(results), {'rig1', 'rig2'})
+                self.assertEqual(len(results['rig1']['Exchange']), 2)
+                self.assertEqual(results['rig1']['Description'], 'Some rig')
+                self.assertTrue(results['rig2']['Exchange'][0]['Error'])
+
+    def test_iter_results_close(self):
+        """Прерывание получения результатов отменяет
+        оставшиеся запросы и останавливает цикл событий
+        """
+        sender = AsyncSender(self.miners, limit=1)
+        results = sender.iterResults()
+        next(results)
+        results.close()
+
+        self.assertNotIn(
+            'AsyncSender',
+            [thread.name for thread in threading.enumerate()],
+        )
@@ -139,3 +139,130 @@ class CGMinerSetUpTest(unittest.TestCase):
             self.miner.request = {
                 "method": "summary",
             }
+
+
+STATUS = {
+    "STATUS": "S",
+    "When": 1545394385,
+    "Code": 11,
+    "Msg": "Summary",
+    "Description": "cgminer 4.9.0",
+}
+
+SUMMARY = {
+    "STATUS": [STATUS],
+    "SUMMARY": [
+        {
+            "Elapsed": 3600, "GHS 5s": "13500.12", "GHS av": 13510.5,
+            "Found Blocks": 0, "Getworks": 120, "Accepted": 1000,
+            "Rejected": 2, "Hardware Errors": 10, "Utility": 16.6,
+            "Discarded": 300, "Stale": 0, "Get Failures": 0,
+            "Local Work": 5000, "Remote Failures": 0,
+            "Network Blocks": 6, "Total MH": 4.8e10, "Work Utility": 1.9e5,
+            "Difficulty Accepted": 1.6e7, "Difficulty Rejected": 3.2e4,
+            "Difficulty Stale": 0.0, "Best Share": 1000000,
+            "Device Hardware%": 0.0001, "Device Rejected%": 0.2,
+            "Pool Rejected%": 0.2, "Pool Stale%": 0.0,
+            "Last getwork": 1545394385,
+        },
+    ],
+    "id": 1,
+}
+
+STATS = {
+    "STATUS": [STATUS],
+    "STATS": [
+        {
+            "BMMiner": "2.0.0", "Miner": "16.8.1.3",
+            "CompileTime": "Fri Nov 17 17:37:49 CST 2017",
+            "Type": "Antminer S9", "STATS": 0, "ID": "BC50",
+            "Elapsed": 3600, "Calls": 0, "Wait": 0.0, "Max": 0.0,
+            "Min": 99999999.0, "GHS 5s": "13500.12", "GHS av": 13510.5,
+            "miner_count": 3, "frequency": "650", "fan_num": 2,
+            "temp_num": 3, "total_rateideal": 13500.0,
+            "total_freqavg": 650.0, "total_acn": 189, "total_rate": 13500.1,
+            "temp_max": 75, "Device Hardware%": 0.0001,
+            "no_matching_work": 10, "miner_version": "16.8.1.3",
+            "miner_id": "801c4c9e4d5c8118", "temp6": 60, "temp2_6": 75,
+            "chain_acs6": " oooooooo", "chain_rate6": "4500.01",
+        },
+    ],
+    "id": 1,
+}
+
+
+class CGMinerCompositeRequestTest(unittest.TestCase):
+    """Тестирование составных запросов класса CGMiner
+    """
+
+    def setUp(self):
+        kwargs = {
+            'host': '127.0.0.1',
+            'port': 6666,
+            'timeout': 10,
+            'request': 'Summary+Stats',
+        }
+        self.miner = CGMiner(**kwargs)
+
+    def test_request_valid_name(self):
+        """Допустимый составной запрос в виде имени
+        """
+        self.assertDictEqual(
+            self.miner.request,
+            {
+                "command": "summary+stats",
+            },
+        )
+
+    def test_request_valid_dict(self):
+        """Допустимый составной запрос в виде словаря
+        """
+        self.miner.request = {
+            "command": "stats+summary",
+        }
+        self.assertDictEqual(
+            self.miner.request,
+            {
+                "command": "stats+summary",
+            },
+        )
+
+    def test_request_invalid_name(self):
+        """Недопустимое имя в составном запросе
+        """
+        with self.assertRaises(ValueError):
+            self.miner.request = 'Summary+SomeName'
+
+    def test_request_invalid_dict(self):
+        """Повторяющаяся команда в составном запросе
+        """
+        with self.assertRaises(ValueError):
+            self.miner.request = {
+                "command": "summary+summary",
+            }
+
+    def test_response_split(self):
+        """Ответ на составной запрос разделяется по командам
+        """
+        self.miner.response = bytes(
+            json.dumps({"summary": [SUMMARY], "stats": [STATS], "id": 1}),
+            encoding='utf-8',
+        )
+        self.assertEqual(self.miner.error, False)
+        self.assertListEqual(
+            self.miner.split(),
+            [
+                ({"command": "summary"}, SUMMARY),
+                ({"command": "stats"}, STATS),
+            ],
+        )
+
+    def test_response_invalid(self):
+        """Ответ не содержит результата одной из команд
+        """
+        self.miner.response = bytes(
+            json.dumps({"summary": [SUMMARY], "id": 1}),
+            encoding='utf-8',
+        )
+        self.assertEqual(self.miner.error, True)
+        self.assertEqual(len(self.miner.split()), 1)
@@ -149,3 +149,68 @@ class EtheriumSetUpTest(unittest.TestCase):
             self.miner.request = {
                 "method": "miner_getstat1",
             }
+
+
+class EtheriumResponseTest(unittest.TestCase):
+    """Тестирование обработки ответа класса Etherium
+    """
+
+    def setUp(self):
+        kwargs = {
+            'host': '127.0.0.1',
+            'port': 6666,
+            'timeout': 10,
+            'request': 'Statistic',
+        }
+        self.miner = Etherium(**kwargs)
+
+    def test_response_valid(self):
+        """Ответ преобразуется в словарь со статистикой
+        """
+        self.miner.response = json.dumps(
+            {
+                "id": 0,
+                "error": None,
+                "result": [
+                    "9.3 - ETH", "21", "182724;51;0", "30502;30457",
+                    "0;0;0", "off;off", "53;71;57;67",
+                    "eth-eu1.nanopool.org:9999", "0;0;0;0",
+                ],
+            },
+        )
+        self.assertEqual(self.miner.error, False)
+        self.assertDictEqual(
+            self.miner.response,
+            {
+                'Version': {'Number': '9.3', 'Type': 'ETH'},
+                'Uptime': 21,
+                'ETH': {'Hashrate': 182724, 'Shares': 51, 'Rejected': 0},
+                'ETH Detailed': [30502, 30457],
+                'DCR': {'Hashrate': 0, 'Shares': 0, 'Rejected': 0},
+                'DCR Detailed': ['off', 'off'],
+                'GPU': {'Temperatures': [53, 57], 'Fan Speeds': [71, 67]},
+                'Pools': [{'Host': 'eth-eu1.nanopool.org', 'Port': 9999}],
+                'Details': {
+                    'ETH Invalid Shares': 0,
+                    'ETH Pool Switches': 0,
+                    'DCR Invalid Shares': 0,
+                    'DCR Pool Switches': 0,
+                },
+            },
+        )
+
+    def test_response_invalid(self):
+        """Ответ не соответствует API
+        """
+        self.miner.response = json.dumps(
+            {"id": 0, "error": None, "result": []},
+        )
+        self.assertEqual(self.miner.error, True)
+
+    def test_response_not_expected(self):
+        """Ответ на запрос перезапуска не ожидается
+        """
+        self.miner.request = 'Restart'
+        self.miner.response = b''
+        self.assertEqual(self.miner.error, False)
+        self.assertIsNone(self.miner.response)
@@ -0,0 +1,131 @@
+import unittest
+import urllib.error
+import urllib.request
+
+from pyzabbix import ZabbixMetric
+
+from pyminers.exporter import MetricsExporter, formatValue, fromZabbix
+
+
+class MetricsExporterTest(unittest.TestCase):
+    """Тестирование экспорта метрик MetricsExporter
+    """
+
+    def setUp(self):
+        self.exporter = MetricsExporter(port=0)
+        self.metrics = [
+            ZabbixMetric('rig1', 'miner.status', 1),
+            ZabbixMetric('rig1', 'miner.version', 'ETH-9.8'),
+            ZabbixMetric('rig1', 'miner.eth.hashrate', 30000000),
+            ZabbixMetric('rig1', 'miner.gpu.temperature[0]', 65),
+            ZabbixMetric('rig1', 'miner.gpu.temperature[1]', 70),
+            ZabbixMetric('rig1', 'miner.gpu.discovery', '{"data": []}'),
+            ZabbixMetric('rig2', 'miner.status', 0),
+        ]
+
+    def tearDown(self):
+        self.exporter.shutdown()
+
+    def test_from_zabbix(self):
+        """Преобразование ключей Zabbix в серии с метками
+        """
+        self.assertTupleEqual(
+            fromZabbix('rig', 'miner.gpu.temperature[3]', '65'),
+            ('miner_gpu_temperature', {'host': 'rig', 'gpu': '3'}, 65.0),
+        )
+        self.assertTupleEqual(
+            fromZabbix('rig', 'miner.fan.speed[0]', '3000'),
+            ('miner_fan_speed', {'host': 'rig', 'fan': '0'}, 3000.0),
+        )
+        self.assertTupleEqual(
+            fromZabbix('rig', 'miner.shares', '10'),
+            ('miner_shares', {'host': 'rig'}, 10.0),
+        )
+        self.assertTupleEqual(
+            fromZabbix('rig', 'miner.version', '4.9.0'),
+            ('miner_version_info', {'host': 'rig', 'version': '4.9.0'}, 1),
+        )
+        self.assertIsNone(fromZabbix('rig', 'miner.lastgetwork', 'never'))
+
+    def test_render(self):
+        """Ответ формируется при обновлении метрик
+        """
+        self.exporter.update(self.metrics, timestamp=1500000000)
+        content = self.exporter.render().decode()
+        lines = content.splitlines()
+
+        self.assertIn('# TYPE miner_gpu_temperature gauge', lines)
+        self.assertIn(
+            'miner_gpu_temperature{host="rig1",gpu="1"} 70.0', lines,
+        )
+        self.assertIn('miner_status{host="rig2"} 0.0', lines)
+        self.assertIn('# TYPE miner_version info', lines)
+        self.assertIn(
+            'miner_version_info{host="rig1",version="ETH-9.8"} 1.0', lines,
+        )
+        self.assertIn('miners_updated_timestamp_seconds 1500000000.0', lines)
+        self.assertNotIn('discovery', content)
+        self.assertEqual(lines[-1], '# EOF')
+
+        prometheus = self.exporter.render(openMetrics=False).decode()
+        self.assertIn('# TYPE miner_version_info gauge', prometheus)
+        self.assertNotIn('# EOF', prometheus)
+
+    def test_special_values(self):
+        """NaN и бесконечности записываются в формате OpenMetrics
+        """
+        self.assertEqual(formatValue(float('nan')), 'NaN')
+        self.assertEqual(formatValue(float('inf')), '+Inf')
+        self.assertEqual(formatValue(float('-inf')), '-Inf')
+        self.assertEqual(formatValue(65), '65.0')
+
+        self.exporter.update([
+            ZabbixMetric('rig1', 'miner.hashrate', 'nan'),
+            ZabbixMetric('rig1', 'miner.gpu.temperature[0]', 'inf'),
+            ZabbixMetric('rig1', 'miner.gpu.temperature[1]', '-inf'),
+        ])
+        lines = self.exporter.render().decode().splitlines()
+        self.assertIn('miner_hashrate{host="rig1"} NaN', lines)
+        self.assertIn(
+            'miner_gpu_temperature{host="rig1",gpu="0"} +Inf', lines,
+        )
+        self.assertIn(
+            'miner_gpu_temperature{host="rig1",gpu="1"} -Inf', lines,
+        )
+
+    def test_escape(self):
+        """Экранирование значений меток
+        """
+        self.exporter.update([
+            ZabbixMetric('rig"1\\', 'miner.status', 1),
+        ])
+        self.assertIn(
+            'miner_status{host="rig\\"1\\\\"} 1.0',
+            self.exporter.render().decode(),
+        )
+
+    def test_http(self):
+        """Метрики отдаются по HTTP
+        """
+        self.exporter.update(self.metrics)
+        self.exporter.start()
+        url = 'http://127.0.0.1:{port}'.format(port=self.exporter.port)
+
+        request = urllib.request.Request(
+            url + '/metrics',
+            headers={'Accept': 'application/openmetrics-text'},
+        )
+        with urllib.request.urlopen(request, timeout=5) as response:
+            self.assertTrue(response.headers['Content-Type'].startswith(
+                'application/openmetrics-text',
+            ))
+            self.assertEqual(response.read(), self.exporter.render())
+
+        with urllib.request.urlopen(url + '/metrics', timeout=5) as response:
+            self.assertTrue(
+                response.headers['Content-Type'].startswith('text/plain'),
+            )
+
+        with self.assertRaises(urllib.error.HTTPError) as error:
+            urllib.request.urlopen(url + '/', timeout=5)
+        self.assertEqual(error.exception.code, 404)
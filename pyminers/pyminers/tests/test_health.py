@@ -0,0 +1,206 @@
+import unittest
+import socket
+import threading
+
+from unittest import mock
+
+from pyminers.health import HealthTracker
+from pyminers.sender import Sender
+
+
+class HealthTrackerTest(unittest.TestCase):
+    """Тестирование истории опроса майнеров HealthTracker
+    """
+
+    def setUp(self):
+        self.health = HealthTracker(failures=2, backoff=10, maxBackoff=30)
+
+    def test_init_invalid(self):
+        """Недопустимые параметры
+        """
+        for kwargs in ({'failures': 0}, {'backoff': -1},
+                       {'backoff': 10, 'maxBackoff': 5}, {'alpha': 0},
+                       {'samples': True}):
+            with self.subTest(**kwargs):
+                with self.assertRaises(ValueError):
+                    HealthTracker(**kwargs)
+
+    def test_timeout(self):
+        """Время ожидания вычисляется только по достаточной истории
+        """
+        self.assertEqual(self.health.timeout('rig', 5), 5)
+        for _ in range(4):
+            self.health.update('rig', 0.1, False)
+        self.assertEqual(self.health.timeout('rig', 5), 5)
+        self.health.update('rig', 0.1, False)
+        self.assertEqual(self.health.timeout('rig', 5), 1)
+
+        for _ in range(20):
+            self.health.update('rig', 10.0, False)
+        self.assertEqual(self.health.timeout('rig', 5), 5)
+
+    def test_backoff(self):
+        """Перевод в состояние ожидания и пробные запросы
+        """
+        with mock.patch('pyminers.health.time.monotonic') as monotonic:
+            monotonic.return_value = 100.0
+            self.health.update('rig', None, True)
+            self.assertTrue(self.health.available('rig'))
+            self.health.update('rig', None, True)
+            self.assertFalse(self.health.available('rig'))
+
+            # Пробный запрос после окончания ожидания
+            monotonic.return_value = 110.0
+            self.assertTrue(self.health.available('rig'))
+            self.assertFalse(self.health.available('rig'))
+
+            # Неудачная проверка удваивает время ожидания
+            self.health.update('rig', None, True)
+            self.assertEqual(self.health.state('rig')['Backoff'], 20)
+            self.health.update('rig', None, True)
+            self.health.update('rig', None, True)
+            self.assertEqual(self.health.state('rig')['Backoff'], 30)
+
+            # Успешный ответ возвращает майнер в рабочее состояние
+            self.health.update('rig', 0.1, False)
+            self.assertTrue(self.health.available('rig'))
+            self.assertIsNone(self.health.state('rig')['Backoff'])
+
+    def test_sender_skips_unavailable(self):
+        """Майнер в состоянии ожидания не опрашивается
+        """
+        # Свободный порт, на котором никто не слушает
+        sock = socket.socket()
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+        sock.close()
+
+        miners = {
+            'rig': {
+                'Host': '127.0.0.1',
+                'Port': port,
+                'Miner': 'Miner',
+                'Request': '{"command": "a"}',
+                'Timeout': 5,
+            },
+        }
+
+        for _ in range(2):
+            sender = Sender(miners, health=self.health)
+            sender.sendRequests()
+            exchange = sender.results['rig']['Exchange'][0]
+            self.assertTrue(exchange['Error'])
+            self.assertIsNotNone(exchange['Elapsed'])
+
+        sender = Sender(miners, health=self.health)
+        with mock.patch('pyminers.miner.socket.socket') as connect:
+            sender.sendRequests()
+            connect.assert_not_called()
+        exchange = sender.results['rig']['Exchange'][0]
+        self.assertTrue(exchange['Error'])
+        self.assertIsNone(exchange['Elapsed'])
+        self.assertEqual(exchange['Response']['error_type'], 'ConnectionError')
+
+    def test_sender_several_requests(self):
+        """История обновляется один раз за цикл опроса
+        майнера, независимо от количества запросов
+        """
+        sock = socket.socket()
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+        sock.close()
+
+        miners = {
+            'rig': {
+                'Host': '127.0.0.1',
+                'Port': port,
+                'Miner': 'Miner',
+                'Request': [
+                    '{"command": "a"}',
+                    '{"command": "b"}',
+                    '{"command": "c"}',
+                ],
+                'Timeout': 5,
+            },
+        }
+
+        Sender(miners, health=self.health).sendRequests()
+        self.assertEqual(self.health.state('rig')['Failures'], 1)
+        self.assertIsNone(self.health.state('rig')['Backoff'])
+        self.assertTrue(self.health.available('rig'))
+
+        Sender(miners, health=self.health).sendRequests()
+        self.assertEqual(self.health.state('rig')['Failures'], 2)
+        self.assertEqual(self.health.state('rig')['Backoff'], 10)
+        self.assertFalse(self.health.available('rig'))
+
+    def test_sender_skipped_first(self):
+        """Пропущенные майнеры возвращаются до начала опроса
+        """
+        sock = socket.socket()
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+        sock.close()
+
+        miners = {
+            name: {
+                'Host': '127.0.0.1',
+                'Port': port,
+                'Miner': 'Miner',
+                'Request': '{"command": "a"}',
+                'Timeout': 5,
+            }
+            for name in ('rig1', 'rig2', 'rig3')
+        }
+        for _ in range(2):
+            self.health.update('rig3', None, True)
+
+        sender = Sender(miners, health=self.health)
+        with mock.patch.object(sender, '_iterCompleted') as iterCompleted:
+            iterCompleted.return_value = iter([])
+            results = sender.iterResults()
+            self.assertEqual(next(results)[0], 'rig3')
+            iterCompleted.assert_not_called()
+
+    def test_sender_invalid_response(self):
+        """Ошибка формата ответа не переводит
+        майнер в состояние ожидания
+        """
+        server = socket.socket()
+        server.bind(('127.0.0.1', 0))
+        server.listen(5)
+        self.addCleanup(server.close)
+
+        def reply():
+            # Отвечает строкой не в формате json
+            for _ in range(3):
+                connection, _ = server.accept()
+                with connection:
+                    connection.recv(1024)
+                    connection.sendall(b'not json')
+
+        thread = threading.Thread(target=reply)
+        thread.daemon = True
+        thread.start()
+
+        miners = {
+            'rig': {
+                'Host': '127.0.0.1',
+                'Port': server.getsockname()[1],
+                'Miner': 'Miner',
+                'Request': '{"command": "a"}',
+                'Timeout': 5,
+            },
+        }
+        for _ in range(3):
+            sender = Sender(miners, health=self.health)
+            sender.sendRequests()
+            exchange = sender.results['rig']['Exchange'][0]
+            self.assertTrue(exchange['Error'])
+            self.assertEqual(
+                exchange['Response']['error_type'], 'JSONDecodeError',
+            )
+        thread.join(5)
+
+        self.assertTrue(self.health.available('rig'))
+        self.assertEqual(self.health.state('rig')['Failures'], 0)
@@ -1,5 +1,8 @@
 import unittest
+import asyncio
 import json
+import socket
+import threading
 
 from pyminers.miner import Miner
 
@@ -225,6 +228,12 @@ class MinerSetUpTest(unittest.TestCase):
         # Флаг ошибки должен быть сброшен
         self.assertEqual(self.miner.error, False)
 
+    def test_response_parsed_once(self):
+        """Ответ разбирается один раз при установке
+        """
+        self.miner.response = b'{"key": "value"}'
+        self.assertIs(self.miner.response, self.miner.response)
+
     def test_responce_invalid(self):
         """Неверный формат ответа
         """
@@ -239,7 +248,6 @@ class MinerSetUpTest(unittest.TestCase):
         self.assertEqual(self.miner.error, True)
 
 
-# TODO Протестироваеть метод sendRequest
 class MinerSendRequestTest(unittest.TestCase):
     """Тестирование работы с socket
     """
@@ -253,8 +261,79 @@ class MinerSendRequestTest(unittest.TestCase):
         }
         self.miner = Miner(**kwargs)
 
+        # Сервер отвечает заданными данными и
+        # закрывает соединение только по сигналу
+        self.reply = b''
+        self.closed = threading.Event()
+        self.server = socket.socket()
+        self.server.bind(('127.0.0.1', 0))
+        self.server.listen(1)
+        self.miner.port = self.server.getsockname()[1]
+
+        def serve():
+            connection, _ = self.server.accept()
+            connection.recv(1024)
+            connection.sendall(self.reply)
+            self.closed.wait(10)
+            connection.close()
+
+        self.thread = threading.Thread(target=serve)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def tearDown(self):
+        self.closed.set()
+        self.thread.join()
+        self.server.close()
+
     def test_respomse_valid(self):
-        pass
+        """Ответ получен после закрытия соединения
+        """
+        self.reply = b'{"key": "value"}\x00'
+        self.closed.set()
+        self.assertTrue(self.miner.sendRequest())
+        self.assertDictEqual(self.miner.response, {"key": "value"})
 
     def test_respomse_invalid(self):
-        pass
+        """Ответ не в формате json
+        """
+        self.reply = b'some invalid response'
+        self.closed.set()
+        self.assertTrue(self.miner.sendRequest())
+        self.assertEqual(self.miner.error, True)
+
+    def test_response_terminator(self):
+        """Ответ получен по признаку окончания,
+        не дожидаясь закрытия соединения
+        """
+        self.miner.terminator = b'\n'
+        self.reply = b'{"key": "value"}\n'
+        self.assertTrue(self.miner.sendRequest())
+        self.assertFalse(self.closed.is_set())
+        self.assertDictEqual(self.miner.response, {"key": "value"})
+
+    def test_response_terminator_async(self):
+        """Асинхронный запрос завершается
+        по признаку окончания ответа
+        """
+        self.miner.terminator = b'\x00'
+        self.reply = b'{"key": "value"}\x00'
+        loop = asyncio.new_event_loop()
+        try:
+            self.assertTrue(
+                loop.run_until_complete(self.miner.sendRequestAsync()),
+            )
+        finally:
+            loop.close()
+        self.assertFalse(self.closed.is_set())
+        self.assertDictEqual(self.miner.response, {"key": "value"})
+
+    def test_response_too_large(self):
+        """Размер ответа превышает допустимый
+        """
+        self.miner.maxResponseSize = 8
+        self.reply = b'{"key": "value"}'
+        self.closed.set()
+        self.assertFalse(self.miner.sendRequest())
+        self.assertEqual(self.miner.error, True)
+        self.assertEqual(self.miner.response['error_type'], 'ValueError')
@@ -0,0 +1,113 @@
+import unittest
+
+import validictory
+
+from pyminers.schema import compileSchema, ValidationError
+
+
+TEMPLATE = {
+    "type": "object",
+    "properties": {
+        "id": {"type": "integer"},
+        "name": {"type": "string"},
+        "note": {"type": "string", "blank": True, "required": False},
+        "start": {"format": "utc-millisec"},
+        "status": {"type": "string", "enum": ["S", "W", "E"]},
+        "result": {
+            "type": "array",
+            "items": {"type": "string"},
+            "minItems": 2,
+            "maxItems": 3,
+        },
+        "pair": {
+            "type": "array",
+            "items": [{"type": "integer"}, {"type": "number"}],
+        },
+        "data": {
+            "type": "object",
+            "patternProperties": {
+                r"^temp\d+$": {"type": "integer"},
+            },
+        },
+    },
+}
+
+VALID = {
+    "id": 1,
+    "name": "rig",
+    "start": 1520000000,
+    "status": "S",
+    "result": ["a", "b"],
+    "pair": [1, 2.5],
+    "data": {"temp1": 60, "temp2": 61, "fan": "fast"},
+}
+
+
+class CompileSchemaTest(unittest.TestCase):
+    """Тестирование проверки ответов скомпилированным шаблоном,
+    результат должен совпадать с validictory
+    """
+
+    def assertSameResult(self, data, disallowUnknown=False):
+        """Скомпилированный шаблон и validictory одинаково
+        принимают или отклоняют данные
+        """
+        validate = compileSchema(TEMPLATE, disallowUnknown=disallowUnknown)
+        try:
+            validictory.validate(
+                data, TEMPLATE,
+                disallow_unknown_properties=disallowUnknown,
+            )
+        except ValueError:
+            with self.assertRaises(ValidationError):
+                validate(data)
+        else:
+            validate(data)
+
+    def test_valid(self):
+        """Допустимые данные
+        """
+        self.assertSameResult(VALID)
+        self.assertSameResult(dict(VALID, note=''))
+
+    def test_invalid(self):
+        """Недопустимые данные
+        """
+        cases = [
+            dict(VALID, id='1'),
+            dict(VALID, id=True),
+            dict(VALID, name=''),
+            dict(VALID, start=-1),
+            dict(VALID, status='X'),
+            dict(VALID, result=['a']),
+            dict(VALID, result=['a', 'b', 'c', 'd']),
+            dict(VALID, result=['a', 1]),
+            dict(VALID, pair=[1]),
+            dict(VALID, pair=[1.5, 2]),
+            dict(VALID, data={"temp1": "60"}),
+            {key: value for key, value in VALID.items() if key != 'id'},
+        ]
+        for data in cases:
+            with self.subTest(data=data):
+                self.assertSameResult(data)
+
+    def test_unknown_properties(self):
+        """Поля, не описанные в шаблоне
+        """
+        data = dict(VALID, extra=1)
+        self.assertSameResult(data)
+        self.assertSameResult(data, disallowUnknown=True)
+        with self.assertRaises(ValidationError):
+            compileSchema(TEMPLATE, disallowUnknown=True)(data)
+
+    def test_error_is_value_error(self):
+        """Ошибка проверки является ValueError
+        """
+        with self.assertRaises(ValueError):
+            compileSchema(TEMPLATE)(dict(VALID, id='1'))
+
+    def test_schema_invalid(self):
+        """Недопустимый шаблон
+        """
+        with self.assertRaises(ValueError):
+            compileSchema({"type": "unknown"})
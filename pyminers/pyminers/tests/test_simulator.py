@@ -0,0 +1,73 @@
+import unittest
+
+from pyminers.sender import Sender
+from pyminers.simulator import Farm, CGMinerEndpoint
+
+
+class FarmTest(unittest.TestCase):
+    """Тестирование опроса имитаторов майнеров
+    """
+
+    def setUp(self):
+        self.miners = {'CGMiner': 2, 'Etherium': 2, 'Monero': 1, 'ZCash': 2}
+
+    def poll(self, farm, timeout=5):
+        """Опрашивает имитаторы, возвращает результаты"""
+        sender = Sender(farm.settings(timeout))
+        sender.sendRequests()
+        return sender.results
+
+    def test_init_invalid(self):
+        """Недопустимые параметры
+        """
+        for kwargs in ({'miners': {'Unknown': 1}},
+                       {'miners': {'ZCash': -1}},
+                       {'miners': {'ZCash': 1}, 'network': '10.0.0.0/8'},
+                       {'miners': {'ZCash': 3}, 'network': '127.0.0.0/30'},
+                       {'miners': {'ZCash': 1}, 'drop': 2}):
+            with self.subTest(**kwargs):
+                with self.assertRaises(ValueError):
+                    Farm(**kwargs)
+
+    def test_valid_responses(self):
+        """Ответы имитаторов соответствуют API майнеров
+        """
+        with Farm(self.miners, seed=1) as farm:
+            results = self.poll(farm)
+
+        self.assertEqual(len(results), 7)
+        for name, result in results.items():
+            for exchange in result['Exchange']:
+                with self.subTest(miner=name):
+                    self.assertFalse(exchange['Error'])
+
+        # Составной запрос к CGMiner разделяется на два ответа
+        self.assertEqual(len(results['cgminer-00001']['Exchange']), 2)
+
+    def test_antminer_bug(self):
+        """Ошибка Antminer в ответе на команду stats
+        """
+        endpoint = CGMinerEndpoint('rig', seed=1)
+        self.assertIn(b'}{', endpoint.reply({"command": "stats"}))
+
+        endpoint = CGMinerEndpoint('rig', seed=1, antminerBug=False)
+        self.assertNotIn(b'}{', endpoint.reply({"command": "stats"}))
+
+    def test_malformed(self):
+        """Ответы с нарушенным форматом
+        """
+        with Farm(self.miners, malformed=1, seed=1) as farm:
+            results = self.poll(farm)
+
+        for result in results.values():
+            for exchange in result['Exchange']:
+                self.assertTrue(exchange['Error'])
+
+    def test_drop(self):
+        """Запросы без ответа
+        """
+        with Farm({'ZCash': 2}, drop=1, seed=1) as farm:
+            results = self.poll(farm, timeout=1)
+
+        for result in results.values():
+            self.assertTrue(result['Exchange'][0]['Error'])
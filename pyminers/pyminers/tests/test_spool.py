@@ -0,0 +1,120 @@
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+from pyzabbix import ZabbixMetric
+
+from pyminers.spool import ZabbixSpool
+from pyminers.zabbix import DeliveryResult
+
+
+class FakeDelivery():
+    """Отправка метрик без соединения с сервером,
+    при available = False метрики не доставляются
+    """
+
+    def __init__(self):
+        self.available = True
+        self.batches = []
+        self.sent = threading.Event()
+
+    def send(self, metrics):
+        if not self.available:
+            return DeliveryResult(0, 0, 1, list(metrics))
+        self.batches.append(list(metrics))
+        self.sent.set()
+        return DeliveryResult(len(metrics), 0, 1, [])
+
+
+class ZabbixSpoolTest(unittest.TestCase):
+    """Тестирование очереди метрик ZabbixSpool
+    """
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.path = os.path.join(directory, 'spool.sqlite3')
+        self.delivery = FakeDelivery()
+        self.spool = self.open()
+
+    def open(self, **kwargs):
+        spool = ZabbixSpool(
+            self.path, self.delivery, batchSize=4, interval=0, **kwargs
+        )
+        self.addCleanup(spool.close)
+        return spool
+
+    def metrics(self, count, clock=1500000000):
+        return [
+            ZabbixMetric('rig', 'miner.shares', index, clock + index)
+            for index in range(count)
+        ]
+
+    def test_init_invalid(self):
+        """Недопустимые параметры
+        """
+        with self.assertRaises(ValueError):
+            ZabbixSpool(self.path, self.delivery, batchSize=0)
+
+    def test_drain(self):
+        """Метрики отправляются пакетами с исходным временем
+        """
+        self.assertEqual(self.spool.put(self.metrics(10)), 10)
+        self.assertEqual(self.spool.pending, 10)
+
+        self.assertEqual(self.spool.drain(), 10)
+        self.assertEqual(self.spool.pending, 0)
+        self.assertListEqual(
+            [len(batch) for batch in self.delivery.batches], [4, 4, 2],
+        )
+        self.assertListEqual(
+            [(metric.value, metric.clock)
+             for batch in self.delivery.batches for metric in batch],
+            [(str(index), 1500000000 + index) for index in range(10)],
+        )
+
+    def test_drain_unavailable(self):
+        """Недоставленные метрики сохраняются
+        в очереди, в том числе после перезапуска
+        """
+        self.spool.put(self.metrics(10))
+        self.delivery.available = False
+        self.assertEqual(self.spool.drain(), 0)
+        self.spool.close()
+
+        spool = self.open()
+        self.assertEqual(spool.pending, 10)
+        self.delivery.available = True
+        self.assertEqual(spool.drain(), 10)
+        self.assertEqual(spool.pending, 0)
+
+    def test_max_size(self):
+        """При переполнении удаляются самые старые метрики
+        """
+        spool = self.open(maxSize=5)
+        spool.put(self.metrics(8))
+        self.assertEqual(spool.pending, 5)
+        spool.drain()
+        self.assertListEqual(
+            [metric.value
+             for batch in self.delivery.batches for metric in batch],
+            ['3', '4', '5', '6', '7'],
+        )
+
+    def test_clock(self):
+        """Метрикам без времени назначается время добавления
+        """
+        self.spool.put([ZabbixMetric('rig', 'miner.status', 1)])
+        self.spool.drain()
+        self.assertGreater(self.delivery.batches[0][0].clock, 1500000000)
+
+    def test_thread(self):
+        """Нить отправляет метрики при добавлении в очередь
+        """
+        self.spool.start()
+        self.spool.put(self.metrics(3))
+        self.assertTrue(self.delivery.sent.wait(5))
+        self.spool.stop()
+        self.assertEqual(self.spool.pending, 0)
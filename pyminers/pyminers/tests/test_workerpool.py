@@ -0,0 +1,109 @@
+import unittest
+import threading
+
+from pyminers.workerpool import WorkerPool
+
+
+class WorkerPoolTest(unittest.TestCase):
+    """Тестирование пула нитей WorkerPool
+    """
+
+    def setUp(self):
+        self.pool = WorkerPool(size=2)
+
+    def tearDown(self):
+        self.pool.shutdown()
+
+    def test_size_invalid(self):
+        """Недопустимый размер пула
+        """
+        with self.assertRaises(ValueError):
+            WorkerPool(size=0)
+
+    def test_submit(self):
+        """Выполнение всех заданий из очереди
+        """
+        results = []
+        lock = threading.Lock()
+
+        def task(value):
+            with lock:
+                results.append(value)
+
+        for value in range(10):
+            self.pool.submit(task, value)
+        self.pool.join()
+
+        self.assertListEqual(sorted(results), list(range(10)))
+        self.assertEqual(self.pool.queued, 0)
+        self.assertEqual(self.pool.busy, 0)
+
+    def test_size_limit(self):
+        """Количество нитей не превышает размер пула
+        """
+        event = threading.Event()
+
+        for _ in range(5):
+            self.pool.submit(event.wait)
+
+        self.assertEqual(self.pool.workers, 2)
+        self.assertGreaterEqual(self.pool.queued, 3)
+
+        event.set()
+        self.pool.join()
+        self.assertEqual(self.pool.workers, 2)
+
+    def test_task_error(self):
+        """Ошибка в задании не останавливает нить
+        """
+        def task():
+            raise RuntimeError("task error")
+
+        with self.assertLogs('pyminers.workerpool', level='ERROR'):
+            self.pool.submit(task)
+            self.pool.join()
+
+        results = []
+        self.pool.submit(results.append, 1)
+        self.pool.join()
+        self.assertListEqual(results, [1])
+
+    def test_shutdown(self):
+        """Остановленный пул не принимает задания
+        """
+        self.pool.submit(lambda: None)
+        self.pool.shutdown()
+
+        self.assertTrue(self.pool.closed)
+        with self.assertRaises(RuntimeError):
+            self.pool.submit(lambda: None)
+
+    def test_spawn_while_task_starting(self):
+        """Нить, взявшая задание, не считается свободной:
+        следующее задание выполняется новой нитью, не
+        дожидаясь завершения первого
+        """
+        started = threading.Event()
+        release = threading.Event()
+        done = threading.Event()
+
+        def first():
+            started.set()
+            release.wait(5)
+
+        self.pool.submit(first)
+        self.pool.submit(done.set)
+        self.assertTrue(done.wait(5))
+        self.assertTrue(started.wait(5))
+        self.assertEqual(self.pool.workers, 2)
+
+        release.set()
+        self.pool.join()
+
+    def test_reuse(self):
+        """Освободившиеся нити используются повторно
+        """
+        for _ in range(3):
+            self.pool.submit(lambda: None)
+            self.pool.join()
+        self.assertEqual(self.pool.workers, 1)
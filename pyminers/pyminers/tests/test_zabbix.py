@@ -0,0 +1,149 @@
+import unittest
+import threading
+import time
+
+from pyzabbix import ZabbixMetric
+
+from pyminers.zabbix import ZabbixDelivery
+
+
+class Response():
+    """Ответ сервера: все метрики пакета приняты"""
+
+    def __init__(self, count):
+        self.processed = count
+        self.failed = 0
+
+
+class FakeSender():
+    """Отправка пакетов без соединения с сервером. Пакеты,
+    содержащие метрики хостов из failing, отклоняются
+    указанное количество раз
+    """
+    lock = threading.Lock()
+    chunks = []
+    active = 0
+    maxActive = 0
+    failing = {}
+
+    def __init__(self, server, port, chunk_size=250, timeout=10):
+        self.chunkSize = chunk_size
+
+    def send(self, metrics):
+        cls = type(self)
+        with cls.lock:
+            cls.active += 1
+            cls.maxActive = max(cls.maxActive, cls.active)
+        try:
+            # Даем другим нитям начать отправку
+            threading.Event().wait(0.01)
+            with cls.lock:
+                for metric in metrics:
+                    if cls.failing.get(metric.host):
+                        cls.failing[metric.host] -= 1
+                        raise Exception("connection refused")
+                cls.chunks.append(len(metrics))
+            return Response(len(metrics))
+        finally:
+            with cls.lock:
+                cls.active -= 1
+
+
+class ZabbixDeliveryTest(unittest.TestCase):
+    """Тестирование пакетной отправки метрик ZabbixDelivery
+    """
+
+    def setUp(self):
+        FakeSender.chunks = []
+        FakeSender.active = 0
+        FakeSender.maxActive = 0
+        FakeSender.failing = {}
+        self.metrics = [
+            ZabbixMetric('rig{}'.format(host), 'miner.status', 1)
+            for host in range(10)
+            for _ in range(10)
+        ]
+
+    def delivery(self, **kwargs):
+        delivery = ZabbixDelivery(
+            chunkSize=25,
+            connections=2,
+            retryDelay=0,
+            senderClass=FakeSender,
+            **kwargs
+        )
+        self.addCleanup(delivery.shutdown)
+        return delivery
+
+    def test_init_invalid(self):
+        """Недопустимые параметры
+        """
+        for kwargs in ({'chunkSize': 0}, {'retries': -1},
+                       {'connections': 0}, {'retries': True}):
+            with self.subTest(**kwargs):
+                with self.assertRaises(ValueError):
+                    ZabbixDelivery(senderClass=FakeSender, **kwargs)
+
+    def test_send(self):
+        """Метрики всех хостов отправляются пакетами
+        с ограниченным количеством соединений
+        """
+        result = self.delivery().send(self.metrics)
+
+        self.assertEqual(result.processed, 100)
+        self.assertEqual(result.chunks, 4)
+        self.assertListEqual(result.undelivered, [])
+        self.assertListEqual(FakeSender.chunks, [25] * 4)
+        self.assertLessEqual(FakeSender.maxActive, 2)
+
+    def test_retry(self):
+        """Пакет, отправка которого завершилась
+        ошибкой, отправляется повторно
+        """
+        FakeSender.failing = {'rig0': 2}
+        result = self.delivery(retries=2).send(self.metrics)
+
+        self.assertEqual(result.processed, 100)
+        self.assertListEqual(result.undelivered, [])
+
+    def test_undelivered(self):
+        """Ошибка отправки пакета не прерывает отправку
+        остальных, недоставленные метрики возвращаются
+        """
+        FakeSender.failing = {'rig0': 10}
+        result = self.delivery(retries=1).send(self.metrics)
+
+        self.assertEqual(result.processed, 75)
+        self.assertEqual(len(result.undelivered), 25)
+        self.assertListEqual(result.undelivered, self.metrics[:25])
+
+    def test_send_empty(self):
+        """Отправка пустого списка метрик
+        """
+        result = self.delivery().send([])
+        self.assertEqual(result.chunks, 0)
+        self.assertEqual(result.processed, 0)
+
+    def test_submit(self):
+        """Метрики, переданные по хостам, объединяются в пакеты,
+        заполненный пакет отправляется до вызова flush
+        """
+        delivery = self.delivery()
+        for host in range(3):
+            delivery.submit(self.metrics[host * 10:host * 10 + 10])
+
+        deadline = time.monotonic() + 5
+        while not FakeSender.chunks and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertListEqual(FakeSender.chunks, [25])
+
+        for host in range(3, 10):
+            delivery.submit(self.metrics[host * 10:host * 10 + 10])
+        result = delivery.flush()
+
+        self.assertEqual(result.processed, 100)
+        self.assertEqual(result.chunks, 4)
+        self.assertListEqual(FakeSender.chunks, [25] * 4)
+
+        # Следующий вызов flush учитывает только новые пакеты
+        self.assertEqual(delivery.flush().chunks, 0)
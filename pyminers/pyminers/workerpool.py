@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+
+"""Модуль содержит реализацию класса WorkerPool"""
+
+import logging
+import queue as Queue
+import threading
+
+
+class WorkerPool():
+    """Пул нитей ограниченного размера для выполнения заданий.
+    Нити создаются по мере необходимости и используются повторно,
+    поэтому один пул может обслуживать множество циклов опроса
+    """
+
+    def __init__(self, size=128):
+        """Аргументы:
+        size: максимальное количество нитей в пуле
+        """
+        self.size = size
+
+        # Очередь заданий
+        self.__queue = Queue.Queue()
+        # Замок на изменение счетчиков и списка нитей
+        self.__lock = threading.Lock()
+        self.__threads = []
+        self.__busy = 0
+        # Нити, ожидающие задания, которым еще
+        # не передано ни одно из добавленных заданий
+        self.__idle = 0
+        self.__closed = False
+
+    @property
+    def size(self):
+        """Максимальное количество нитей в пуле"""
+        try:
+            return self.__size
+        except AttributeError:
+            return None
+
+    @size.setter
+    def size(self, value):
+        """Максимальное количество нитей в пуле,
+        должно быть целым числом больше 0
+        """
+        if isinstance(value, int) and not isinstance(value, bool) \
+                and value > 0:
+            self.__size = value
+        else:
+            raise ValueError(
+                "worker pool size '{size}' must be "
+                "positive integer".format(size=value),
+            )
+
+    @property
+    def queued(self):
+        """Количество заданий, ожидающих выполнения"""
+        return self.__queue.qsize()
+
+    @property
+    def busy(self):
+        """Количество нитей, выполняющих задания"""
+        return self.__busy
+
+    @property
+    def workers(self):
+        """Количество созданных нитей"""
+        return len(self.__threads)
+
+    @property
+    def closed(self):
+        """Пул остановлен и не принимает задания"""
+        return self.__closed
+
+    def submit(self, function, *args, **kwargs):
+        """Добавляет задание в очередь пула"""
+        with self.__lock:
+            if self.__closed:
+                raise RuntimeError(
+                    "cannot submit task to closed worker pool",
+                )
+            self.__queue.put((function, args, kwargs))
+
+            # Задание передается ожидающей нити, если таких нет,
+            # создаем новую нить, если размер пула позволяет
+            if self.__idle:
+                self.__idle -= 1
+            elif len(self.__threads) < self.__size:
+                thread = threading.Thread(target=self.__work)
+                thread.daemon = True
+                thread.start()
+                self.__threads.append(thread)
+
+    def join(self):
+        """Ожидает выполнения всех заданий из очереди"""
+        self.__queue.join()
+
+    def shutdown(self, wait=True):
+        """Останавливает нити пула после выполнения
+        заданий, уже находящихся в очереди
+        """
+        with self.__lock:
+            if self.__closed:
+                return None
+            self.__closed = True
+            threads = list(self.__threads)
+            # По одному сигналу остановки на каждую нить
+            for _ in threads:
+                self.__queue.put(None)
+
+        if wait:
+            for thread in threads:
+                thread.join()
+
+    def __work(self):
+        """Выполняет задания из очереди. Новая нить создается для
+        уже добавленного задания, после его выполнения нить
+        считается ожидающей до передачи ей следующего
+        """
+        while True:
+            task = self.__queue.get()
+            # Сигнал остановки
+            if task is None:
+                self.__queue.task_done()
+                break
+
+            function, args, kwargs = task
+            with self.__lock:
+                self.__busy += 1
+            try:
+                function(*args, **kwargs)
+            except Exception:
+                # Ошибка в задании не должна останавливать нить
+                logging.getLogger(__name__).exception(
+                    "unhandled error in worker pool task",
+                )
+            finally:
+                with self.__lock:
+                    self.__busy -= 1
+                    self.__idle += 1
+                self.__queue.task_done()
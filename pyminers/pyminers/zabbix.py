@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+
+"""Модуль содержит реализацию класса ZabbixDelivery"""
+
+import logging
+import threading
+import time
+
+from collections import namedtuple
+
+from pyzabbix import ZabbixSender
+
+from .workerpool import WorkerPool
+
+# Результат отправки: количество метрик, принятых и отклоненных
+# сервером, количество пакетов и список недоставленных метрик
+DeliveryResult = namedtuple(
+    'DeliveryResult',
+    ['processed', 'failed', 'chunks', 'undelivered'],
+)
+
+
+class ZabbixDelivery():
+    """Пакетная отправка метрик Zabbix серверу.
+    Метрики всех хостов объединяются в пакеты по chunkSize и
+    отправляются параллельно не более чем connections соединениями.
+    Отправка пакета, завершившаяся ошибкой, повторяется до retries
+    раз, ошибка одного пакета не прерывает отправку остальных.
+
+    Метрики можно передавать по мере получения (submit): заполненный
+    пакет отправляется сразу, оставшиеся метрики - при вызове flush.
+    Методы submit и flush вызываются из одной нити
+    """
+
+    def __init__(self, server='127.0.0.1', port=10051, timeout=5,
+                 chunkSize=250, connections=4, retries=2,
+                 retryDelay=1, log=None, senderClass=ZabbixSender):
+        """Аргументы:
+        server: адрес сервера
+        port: порт сервера
+        timeout: время ожидания ответа сервера (секунд)
+        chunkSize: количество метрик в пакете
+        connections: максимальное количество
+            одновременных соединений с сервером
+        retries: количество повторных попыток отправки пакета
+        retryDelay: задержка перед повторной попыткой (секунд),
+            увеличивается с каждой попыткой
+        log: экземпляр logging.Logger
+        senderClass: класс отправки пакета с интерфейсом ZabbixSender
+        """
+        self.server = server
+        self.port = port
+        self.timeout = timeout
+        self.chunkSize = chunkSize
+        self.retries = retries
+        self.retryDelay = retryDelay
+        self.log = log or logging.getLogger(__name__)
+        self.__senderClass = senderClass
+
+        # Нити пула ограничивают количество соединений
+        self.__workers = WorkerPool(size=connections)
+
+        # Метрики неполного пакета и результат отправки
+        # пакетов, переданных пулу после вызова flush
+        self.__buffer = []
+        self.__lock = threading.Lock()
+        self.__result = self.__emptyResult()
+
+    @property
+    def chunkSize(self):
+        """Количество метрик в пакете"""
+        try:
+            return self.__chunkSize
+        except AttributeError:
+            return None
+
+    @chunkSize.setter
+    def chunkSize(self, value):
+        """Количество метрик в пакете, должно быть
+        целым числом больше 0
+        """
+        if isinstance(value, int) and not isinstance(value, bool) \
+                and value > 0:
+            self.__chunkSize = value
+        else:
+            raise ValueError(
+                "chunk size '{size}' must be "
+                "positive integer".format(size=value),
+            )
+
+    @property
+    def retries(self):
+        """Количество повторных попыток отправки пакета"""
+        try:
+            return self.__retries
+        except AttributeError:
+            return None
+
+    @retries.setter
+    def retries(self, value):
+        """Количество повторных попыток отправки пакета,
+        должно быть целым числом не меньше 0
+        """
+        if isinstance(value, int) and not isinstance(value, bool) \
+                and value >= 0:
+            self.__retries = value
+        else:
+            raise ValueError(
+                "retries '{retries}' must be "
+                "non-negative integer".format(retries=value),
+            )
+
+    @property
+    def connections(self):
+        """Максимальное количество одновременных соединений"""
+        return self.__workers.size
+
+    def submit(self, metrics):
+        """Добавляет метрики к отправке, заполненные пакеты
+        передаются нитям пула, не дожидаясь остальных метрик
+
+        Аргументы:
+        metrics: список экземпляров ZabbixMetric
+        """
+        self.__buffer.extend(metrics)
+        while len(self.__buffer) >= self.chunkSize:
+            chunk = self.__buffer[:self.chunkSize]
+            del self.__buffer[:self.chunkSize]
+            self.__workers.submit(self.__sendOne, chunk)
+
+    def flush(self):
+        """Отправляет оставшиеся метрики и ожидает завершения
+        отправки всех пакетов, переданных после предыдущего вызова
+
+        return:
+        экземпляр DeliveryResult
+        """
+        if self.__buffer:
+            self.__workers.submit(self.__sendOne, self.__buffer)
+            self.__buffer = []
+        self.__workers.join()
+
+        with self.__lock:
+            result, self.__result = self.__result, self.__emptyResult()
+        return DeliveryResult(**result)
+
+    def send(self, metrics):
+        """Отправляет метрики на сервер и ожидает
+        завершения отправки всех пакетов
+
+        Аргументы:
+        metrics: список экземпляров ZabbixMetric
+
+        return:
+        экземпляр DeliveryResult
+        """
+        self.submit(metrics)
+        return self.flush()
+
+    def shutdown(self):
+        """Останавливает нити пула"""
+        self.__workers.shutdown()
+
+    @staticmethod
+    def __emptyResult():
+        """Результат отправки до передачи пакетов"""
+        return {'processed': 0, 'failed': 0, 'chunks': 0, 'undelivered': []}
+
+    def __sendOne(self, chunk):
+        """Отправляет пакет метрик и учитывает результат"""
+        response = self.__sendChunk(chunk)
+        with self.__lock:
+            self.__result['chunks'] += 1
+            if response is None:
+                self.__result['undelivered'].extend(chunk)
+            else:
+                self.__result['processed'] += response.processed
+                self.__result['failed'] += response.failed
+
+    def __sendChunk(self, chunk):
+        """Отправляет пакет метрик, при ошибке
+        повторяет отправку до retries раз
+
+        return:
+        ответ сервера ZabbixResponse или None,
+        если пакет не удалось отправить
+        """
+        for attempt in range(self.retries + 1):
+            if attempt:
+                time.sleep(self.retryDelay * attempt)
+            try:
+                return self.__senderClass(
+                    self.server,
+                    self.port,
+                    chunk_size=len(chunk),
+                    timeout=self.timeout,
+                ).send(chunk)
+            except Exception as e:
+                # ZabbixSender при ошибке соединения
+                # или отказе сервера вызывает Exception
+                self.log.warning(
+                    "error on sending {count} metrics to {server}:{port}, "
+                    "attempt {attempt} of {attempts} ({message})".format(
+                        count=len(chunk),
+                        server=self.server,
+                        port=self.port,
+                        attempt=attempt + 1,
+                        attempts=self.retries + 1,
+                        message=e,
+                    ),
+                )
+        return None
@@ -4,14 +4,68 @@
 
 import json
 
-from validictory import validate
-
 from .miner import Miner
+from .schema import compileSchema
 
 
 class ZCash(Miner):
     """Отправляет запросы к майнеру ZCash"""
 
+    # Ответ EWBF заканчивается переводом строки
+    terminator = b'\n'
+
+    # Поддерживаемые запросы
+    __requests = {
+        'Statistic':
+        {
+            "id": 0,
+            "method": "getstat",
+        },
+    }
+
+    # Поля ответа и их тип и размер
+    __templates = {
+        'Statistic': {
+            "type": "object",
+            "properties": {
+                "id": {"type": "integer"},
+                "method": {"type": "string"},
+                "error": {"type": "null"},
+                "start_time": {"format": "utc-millisec"},
+                "current_server": {"type": "string"},
+                "available_servers": {"type": "integer"},
+                "server_status": {"type": "integer"},
+                "result": {
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "gpuid": {"type": "integer"},
+                            "cudaid": {"type": "integer"},
+                            "busid": {"type": "string"},
+                            "name": {"type": "string"},
+                            "gpu_status": {"type": "integer"},
+                            "solver": {"type": "integer"},
+                            "temperature": {"type": "integer"},
+                            "gpu_power_usage": {"type": "integer"},
+                            "speed_sps": {"type": "integer"},
+                            "accepted_shares": {"type": "integer"},
+                            "rejected_shares": {"type": "integer"},
+                            "start_time": {"format": "utc-millisec"},
+                        },
+                    },
+                    "minItems": 1,
+                },
+            },
+        },
+    }
+
+    # Функции проверки ответов, шаблоны
+    # компилируются один раз для всего класса
+    __validators = {
+        name: compileSchema(template, disallowUnknown=True)
+        for name, template in __templates.items()
+    }
+
     def __init__(self, host='127.0.0.1', port=42000,
                  request='Statistic', timeout=5):
         """Аргументы:
@@ -22,51 +76,6 @@ class ZCash(Miner):
         timeout: время ожидани ответа сервера
         """
 
-        # Поддерживаемые запросы
-        self.__requests = {
-            'Statistic':
-            {
-                "id": 0,
-                "method": "getstat",
-            },
-        }
-
-        # Поля ответа и их тип и размер
-        self.__templates = {
-            'Statistic': {
-                "type": "object",
-                "properties": {
-                    "id": {"type": "integer"},
-                    "method": {"type": "string"},
-                    "error": {"type": "null"},
-                    "start_time": {"format": "utc-millisec"},
-                    "current_server": {"type": "string"},
-                    "available_servers": {"type": "integer"},
-                    "server_status": {"type": "integer"},
-                    "result": {
-                        "items": {
-                            "type": "object",
-                            "properties": {
-                                "gpuid": {"type": "integer"},
-                                "cudaid": {"type": "integer"},
-                                "busid": {"type": "string"},
-                                "name": {"type": "string"},
-                                "gpu_status": {"type": "integer"},
-                                "solver": {"type": "integer"},
-                                "temperature": {"type": "integer"},
-                                "gpu_power_usage": {"type": "integer"},
-                                "speed_sps": {"type": "integer"},
-                                "accepted_shares": {"type": "integer"},
-                                "rejected_shares": {"type": "integer"},
-                                "start_time": {"format": "utc-millisec"},
-                            },
-                        },
-                        "minItems": 1,
-                    },
-                },
-            },
-        }
-
         self.host = host
         self.port = port
         self.timeout = timeout
@@ -95,7 +104,7 @@ class ZCash(Miner):
                         json.dumps(self.__requests[value]),
                         encoding='utf-8') + b'\n')
                 # Определяем шаблон для проверки ответа
-                self.__template = self.__templates[value]
+                self.__validator = self.__validators[value]
                 return None
             else:
                 # Прередан запрос в виде строки
@@ -129,38 +138,23 @@ class ZCash(Miner):
                  if request == value),
             )
             # Определяем шаблон для проверки ответа
-            self.__template = self.__templates[value]
+            self.__validator = self.__validators[value]
         else:
             raise ValueError(
                 "request = '{request}' request not supported"
                 " by this miner".format(request=value))
 
     @property
-    def response(self):
-        """Ответ от сервера в формате dict,
+    def responseExpected(self):
+        """Ожидается ли ответ сервера на текущий запрос"""
+        return self.__validator is not None
+
+    def checkResponse(self, value):
+        """Проверяет ответ от сервера на соответствие API
+
+        return:
         только статистика работы майнера
         """
-        value = super().response
-        return value if self.error or value is None else value['result']
-
-    @response.setter
-    def response(self, value):
-        """Ответ от сервера должен соответсвовать API"""
-        # Если ответа не ожидается
-        if not self.__template:
-            super(self.__class__, self.__class__).response.fset(self, None)
-            return None
-
-        try:
-            # В ответе присутствую все поля и их тип соответствует
-            validate(
-                json.loads(value),
-                self.__template,
-                disallow_unknown_properties=True,
-            )
-        except ValueError as e:
-            self.errorResponse(e, value)
-            return None
-
-        super(self.__class__, self.__class__).response.fset(self, value)
-        return None
+        # В ответе присутствуют все поля и их тип соответствует
+        self.__validator(value)
+        return value['result']
@@ -16,7 +16,6 @@ import json
 import logging
 import os
 import re
-import socket
 import sys
 
 from collections import namedtuple
@@ -28,11 +27,11 @@ from string import Template
 from configobj import ConfigObj, ConfigObjError
 from configobj import flatten_errors, get_extra_values
 from json2html import json2html
-from pyzabbix import ZabbixMetric, ZabbixSender
+from pyzabbix import ZabbixMetric
 from systemd import journal
 from validate import Validator
 
-from pyminers import Sender
+from pyminers import Sender, ZabbixDelivery
 
 
 class ConfigParser():
@@ -193,7 +192,7 @@ class HtmlPage():
         self.__results = {item: {'statistic': [], 'errors': []}
                           for item in self.supportedMiners}
 
-        self.miners = deepcopy(miners)
+        self.miners = miners
         self.template = template
         self.refresh = refresh
         self.url = url
@@ -540,7 +539,7 @@ class Zabbix():
             'Etherium': self.__etherium
         }
 
-        self.miners = deepcopy(miners)
+        self.miners = miners
         self.server = server
         self.port = port
         self.log = log
@@ -660,34 +659,41 @@ class Zabbix():
         return deepcopy(self.__metrics)
 
     def send(self):
-        """Отправляет статистику работы майнеров на серввер"""
-
-        for name, metrics in self.__metrics.items():
-            server = ZabbixSender(
-                self.server,
-                self.port,
-                chunk_size=len(metrics),
+        """Отправляет статистику работы майнеров на серввер.
+        Метрики всех майнеров отправляются пакетами через
+        ZabbixDelivery, недоставленные пакеты повторяются
+        """
+        delivery = ZabbixDelivery(self.server, self.port, log=self.log)
+        try:
+            result = delivery.send([
+                metric
+                for metrics in self.__metrics.values()
+                for metric in metrics
+            ])
+        finally:
+            delivery.shutdown()
+
+        self.log.info(
+            "metrics sended to {server}:{port} for {count} miners "
+            "(processed: {processed}, failed: {failed}, "
+            "chunks: {chunks})".format(
+                server=self.server,
+                port=self.port,
+                count=len(self.__metrics),
+                processed=result.processed,
+                failed=result.failed,
+                chunks=result.chunks,
+            ),
+        )
+        if result.undelivered:
+            self.log.error(
+                "error on sending metrics to {server}:{port}, "
+                "{count} metrics not delivered".format(
+                    server=self.server,
+                    port=self.port,
+                    count=len(result.undelivered),
+                ),
             )
-            try:
-                self.log.info(
-                    "metrics sended to {server}:{port} "
-                    "for {miner} ({result})".format(
-                        server=self.server,
-                        port=self.port,
-                        miner=name,
-                        result=server.send(metrics),
-                    ),
-                )
-            except socket.error as e:
-                self.log.error(
-                    "error on sending metrics to {server}:{port} "
-                    "for {miner} ({message})".format(
-                        server=self.server,
-                        port=self.port,
-                        miner=name, message=e,
-                    ),
-                )
-                break
 
     def __createMetrics(self):
         """Формирует метрики для отправки статистики на сервер"""
@@ -728,11 +734,11 @@ class Zabbix():
         # К маинеру делается два запроса. В зависимости от
         # того какой ответ попал в список первым назначаем переменные
         if 'SUMMARY' in value[0]['Response']:
-            summary = deepcopy(value[0]['Response']['SUMMARY'][0])
-            stats = deepcopy(value[1]['Response']['STATS'][0])
+            summary = value[0]['Response']['SUMMARY'][0]
+            stats = value[1]['Response']['STATS'][0]
         else:
-            summary = deepcopy(value[1]['Response']['SUMMARY'][0])
-            stats = deepcopy(value[0]['Response']['STATS'][0])
+            summary = value[1]['Response']['SUMMARY'][0]
+            stats = value[0]['Response']['STATS'][0]
 
         metric = {}
         metric['miner.status'] = 1
@@ -832,19 +838,18 @@ class Zabbix():
                       for num in range(metric['miner.gpu.number'])]}
         )
 
-        for index, item in enumerate(value['ETH Detailed']):
-            if not isinstance(item, int):
-                value['ETH Detailed'][index] = 0
-
-        for index, item in enumerate(value['DCR Detailed']):
-            if not isinstance(item, int):
-                value['DCR Detailed'][index] = 0
+        # Нечисловые значения хешрейта считаем нулевыми,
+        # ответ майнера при этом не изменяется
+        eth = [item if isinstance(item, int) else 0
+               for item in value['ETH Detailed']]
+        dcr = [item if isinstance(item, int) else 0
+               for item in value['DCR Detailed']]
 
-        for num, _ in enumerate(value['ETH Detailed']):
+        for num, _ in enumerate(eth):
             metric['miner.gpu.dcr.hashrate[{gpu}]'.format(
-                gpu=num)] = value['DCR Detailed'][num] * 10**6
+                gpu=num)] = dcr[num] * 10**6
             metric['miner.gpu.eth.hashrate[{gpu}]'.format(
-                gpu=num)] = value['ETH Detailed'][num] * 10**6
+                gpu=num)] = eth[num] * 10**6
             metric['miner.gpu.fspeed[{gpu}]'.format(
                 gpu=num)] = value['GPU']['Fan Speeds'][num]
             metric['miner.gpu.temperature[{gpu}]'.format(
@@ -11,7 +11,6 @@ __author__ = "varga"
 
 import sys
 import os
-import socket
 import logging
 from ipaddress import ip_address
 from copy import deepcopy
@@ -19,7 +18,8 @@ from collections import namedtuple
 from systemd import journal
 from validate import Validator
 from configobj import ConfigObj, ConfigObjError, flatten_errors, get_extra_values
-from pyzabbix import ZabbixMetric, ZabbixSender
+from pyzabbix import ZabbixMetric
+from pyminers import ZabbixDelivery
 from pypools import Sender
 
 class ConfigParser():
@@ -235,17 +235,20 @@ class Zabbix():
         return deepcopy(self.__metrics)
 
     def send(self):
-        """Отправляет статистику работы майнеров на пуле на серввер"""
-
-        for name, metrics in self.__metrics.items():
-            server = ZabbixSender(self.server, self.port, chunk_size=len(metrics))
-            try:
-                self.log.info("metrics sended to {server}:{port} for {miner} ({result})".format(
-                    server=self.server, port=self.port, miner=name, result=server.send(metrics)))
-            except socket.error as e:
-                self.log.error("error on sending metrics to {server}:{port} for {miner} ({message})".format(
-                    server=self.server, port=self.port, miner=name, message=e))
-                break
+        """Отправляет статистику работы майнеров на пуле на серввер.
+        Метрики всех воркеров отправляются пакетами через ZabbixDelivery"""
+
+        delivery = ZabbixDelivery(self.server, self.port, log=self.log)
+        try:
+            result = delivery.send([metric for metrics in self.__metrics.values() for metric in metrics])
+        finally:
+            delivery.shutdown()
+
+        self.log.info("metrics sended to {server}:{port} for {count} workers (processed: {processed}, failed: {failed})".format(
+            server=self.server, port=self.port, count=len(self.__metrics), processed=result.processed, failed=result.failed))
+        if result.undelivered:
+            self.log.error("error on sending metrics to {server}:{port}, {count} metrics not delivered".format(
+                server=self.server, port=self.port, count=len(result.undelivered)))
 
     def __createMetrics(self):
         """Формирует метрики для отправки статистики на сервер"""